@@ -0,0 +1,143 @@
+"""
+附件存储（按内容寻址）
+- 上传内容在工作线程中分块写入临时文件，同时计算 SHA-256，不阻塞事件循环
+- 文件按哈希存放为 <UPLOAD_DIR>/<哈希前两位>/<哈希><扩展名>，同一文件发给多个事项只存一份，
+  同名的不同文件也不会互相覆盖
+- 写入过程中累计大小，超过上限立即中止并返回 413，不会把整个文件读入内存
+- 返回前端沿用的元数据 {"name": 原文件名, "path": "/api/uploads/<相对路径>"}
+- 大附件可走分块上传会话（routers/uploads.py）：分块依次追加到 <UPLOAD_DIR>/.sessions/<会话ID>.part，
+  完成时再计算哈希并移入存储
+
+配置（环境变量）：
+- FEEDBACK_UPLOAD_DIR=uploads          存储目录
+- FEEDBACK_MAX_UPLOAD_MB=50            单个附件大小上限
+- FEEDBACK_UPLOAD_CHUNK_MB=8           分块上传时单个分块的大小上限
+"""
+import hashlib
+import os
+import re
+import tempfile
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_DIR = os.environ.get("FEEDBACK_UPLOAD_DIR", "uploads")
+MAX_UPLOAD_BYTES = int(float(os.environ.get("FEEDBACK_MAX_UPLOAD_MB", 50)) * 1024 * 1024)
+MAX_CHUNK_BYTES = int(float(os.environ.get("FEEDBACK_UPLOAD_CHUNK_MB", 8)) * 1024 * 1024)
+CHUNK_SIZE = 1024 * 1024
+URL_PREFIX = "/api/uploads/"
+
+_EXT_RE = re.compile(r"^\.[A-Za-z0-9]{1,10}$")
+
+
+def _extension(filename):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if _EXT_RE.match(ext) else ""
+
+
+def _place(tmp_path, digest, filename, upload_dir):
+    """将已写完的临时文件按哈希移入存储，返回相对路径"""
+    name = digest + _extension(filename)
+    rel_path = f"{name[:2]}/{name}"
+    final_path = os.path.join(upload_dir, name[:2], name)
+    if os.path.exists(final_path):
+        # 相同内容已存在，直接复用
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+    return rel_path
+
+
+def store_stream(fileobj, filename, upload_dir=None, max_bytes=None):
+    """
+    同步地将文件对象写入存储，返回 (相对路径, 字节数)；在工作线程中调用
+    """
+    upload_dir = upload_dir or UPLOAD_DIR
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=upload_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"附件 {filename} 超过大小上限 {max_bytes} 字节")
+                digest.update(chunk)
+                out.write(chunk)
+        return _place(tmp_path, digest.hexdigest(), filename, upload_dir), size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# ---- 分块上传会话的临时文件 ----
+
+def session_part_path(session_id, upload_dir=None):
+    return os.path.join(upload_dir or UPLOAD_DIR, ".sessions", f"{session_id}.part")
+
+
+def append_chunk(session_id, offset, data, upload_dir=None):
+    """
+    在 offset 处写入一个分块并截断其后的内容（上次写入中断留下的残余），返回写入后的文件大小
+    """
+    path = session_part_path(session_id, upload_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "r+b" if os.path.exists(path) else "wb") as out:
+        out.seek(offset)
+        out.truncate()
+        out.write(data)
+        return out.tell()
+
+
+def finalize_part(session_id, filename, upload_dir=None):
+    """
+    计算会话临时文件的哈希并移入存储，返回 (相对路径, 字节数)
+    """
+    upload_dir = upload_dir or UPLOAD_DIR
+    path = session_part_path(session_id, upload_dir)
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)
+    return _place(path, digest.hexdigest(), filename, upload_dir), size
+
+
+def discard_part(session_id, upload_dir=None):
+    path = session_part_path(session_id, upload_dir)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def attachment_meta(filename, rel_path):
+    return {"name": filename, "path": URL_PREFIX + rel_path}
+
+
+async def save_upload(file, upload_dir=None, max_bytes=None):
+    """
+    保存一个 UploadFile，返回 {"name", "path"}
+    """
+    rel_path, _ = await run_in_threadpool(store_stream, file.file, file.filename, upload_dir, max_bytes)
+    return attachment_meta(file.filename, rel_path)
+
+
+async def save_uploads(files, upload_dir=None, max_bytes=None):
+    """
+    保存多个 UploadFile，跳过没有文件名的空字段
+    """
+    attachments = []
+    for file in files or []:
+        if not file.filename:
+            continue
+        attachments.append(await save_upload(file, upload_dir, max_bytes))
+    return attachments
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from jose import jwt
 import bcrypt
 from datetime import datetime, timedelta, timezone
+from fastapi.responses import StreamingResponse
+from sqlalchemy import literal, select
 from sqlalchemy.orm import Session
+from typing import Optional
+import hashlib
 try:
     from .database import get_db
-    from . import models, schemas
+    from . import exporting, models, schemas
+    from .directory import directory_version
+    from .pagination import encode_cursor, decode_cursor
 except (ImportError, ValueError):
     from database import get_db
-    import models, schemas
+    import exporting, models, schemas
+    from directory import directory_version
+    from pagination import encode_cursor, decode_cursor
 
 SECRET_KEY = "secret123"
 ALGORITHM = "HS256"
@@ -42,7 +50,59 @@ def login(login_data: schemas.UserLogin, db: Session = Depends(get_db)):
 
 @router.get("/users")
 def list_users(db: Session = Depends(get_db)):
-    return db.query(models.User).all()
+    # 只投影需要的列，不返回 password_hash；大规模组织请使用 /users/directory
+    rows = db.query(models.User.id, models.User.username, models.User.name, models.User.role,
+                    models.User.group, models.User.created_at).all()
+    return [row._asdict() for row in rows]
+
+DIRECTORY_COLUMNS = [models.User.id, models.User.name, models.User.group, models.User.role]
+DIRECTORY_MAX_LIMIT = 5000
+
+@router.get("/users/directory", response_model=schemas.UserDirectoryPage)
+def user_directory(
+    request: Request,
+    response: Response,
+    group: Optional[str] = None,
+    group_id: Optional[int] = None,
+    name_prefix: Optional[str] = None,
+    limit: int = 1000,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    用户目录：只返回 id / name / group / role，按 id 游标分页
+    - group: 按部门（User.group）过滤；group_id: 按分组成员过滤；name_prefix: 姓名前缀
+    - ETag 由目录版本与查询参数组成，目录未变化时返回 304，不再执行查询
+    """
+    limit = max(1, min(limit, DIRECTORY_MAX_LIMIT))
+    version = directory_version(db)
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.items()))
+    etag = f'"{version}-{hashlib.sha1(params.encode("utf-8")).hexdigest()[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    query = db.query(*DIRECTORY_COLUMNS)
+    if group is not None:
+        query = query.filter(models.User.group == group)
+    if group_id is not None:
+        members = select(models.group_users.c.user_id).where(models.group_users.c.group_id == group_id)
+        query = query.filter(models.User.id.in_(members))
+    if name_prefix:
+        # 用范围条件代替 LIKE 'x%'，可以直接使用 name 索引
+        query = query.filter(models.User.name >= name_prefix, models.User.name < name_prefix + "\U0010ffff")
+    if cursor:
+        state = decode_cursor(cursor)
+        if not isinstance(state.get("id"), int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(models.User.id > state["id"])
+    rows = query.order_by(models.User.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"id": rows[-1].id})
+    return {"users": [row._asdict() for row in rows], "next_cursor": next_cursor, "version": version}
 
 @router.post("/users", response_model=schemas.User)
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
@@ -72,50 +132,44 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     db.commit()
     return {"detail": "User deleted"}
 
+# 用户导出可选列：键 -> (表头, 列表达式)
+# 数据库只存储密码哈希，无法还原明文；Default_Password_Note 仅提示默认初始密码（参见 init_users.py / simulation_test.py）
+USER_EXPORT_COLUMNS = {
+    "id": ("ID", models.User.id),
+    "username": ("Username", models.User.username),
+    "name": ("Name", models.User.name),
+    "role": ("Role", models.User.role),
+    "group": ("Group", models.User.group),
+    "password_hash": ("Password_Hash", models.User.password_hash),
+    "password_note": ("Default_Password_Note", literal("123456 (Default)")),
+}
+USER_EXPORT_BATCH_SIZE = 1000
+
 @router.get("/users/export")
-def export_users(db: Session = Depends(get_db)):
-    users = db.query(models.User).all()
-    # 导出 CSV 格式
-    import csv
-    import io
-    from fastapi.responses import StreamingResponse
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    # 包含密码列，但注意：数据库只存储哈希值，无法还原明文密码。
-    # 如果用户需要"初始密码"，我们只能提供已知的默认值（如123456），
-    # 或者如果不确定，只能导出空或哈希值。
-    # 根据 simulation_test.py，大部分用户密码是 "123456"
-    # 根据 init_users.py，部分是 "admin"
-    # 这里我们导出一列 "password_note"，提示默认密码。
-    
-    writer.writerow(['ID', 'Username', 'Name', 'Role', 'Group', 'Password_Hash', 'Default_Password_Note'])
-    
-    for user in users:
-        # 简单推断一下默认密码（仅作辅助参考）
-        note = "Unknown"
-        # 123456 hash check (slow, but okay for export)
-        # 实际生产中不应在导出中做哈希比对，这里为了满足用户"查看密码"的需求，做个简单备注
-        note = "123456 (Default)" 
-        
-        writer.writerow([
-            user.id, 
-            user.username, 
-            user.name, 
-            user.role, 
-            user.group, 
-            user.password_hash,
-            note
-        ])
-        
-    output.seek(0)
-    
-    response = StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv"
-    )
-    response.headers["Content-Disposition"] = "attachment; filename=users_export.csv"
-    return response
+def export_users(format: str = "csv", columns: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    导出用户列表（format=csv|xlsx）
+    - columns: 逗号分隔的列键（id,username,name,role,group,password_hash,password_note），默认全部
+    - 按主键顺序以流式游标分批读取，边读边写，内存占用与用户数无关；csv 边查询边发送，xlsx 生成完整工作簿后才发送
+    """
+    keys = [c.strip() for c in columns.split(",") if c.strip()] if columns else list(USER_EXPORT_COLUMNS)
+    unknown = [k for k in keys if k not in USER_EXPORT_COLUMNS]
+    if unknown or not keys:
+        raise HTTPException(status_code=400, detail=f"未知的导出列: {unknown}，可选: {list(USER_EXPORT_COLUMNS)}")
+    if format not in ("csv", "xlsx"):
+        raise HTTPException(status_code=400, detail="format 仅支持 csv 或 xlsx")
+
+    header = [USER_EXPORT_COLUMNS[k][0] for k in keys]
+    rows = db.query(*[USER_EXPORT_COLUMNS[k][1] for k in keys])\
+        .order_by(models.User.id)\
+        .execution_options(stream_results=True)\
+        .yield_per(USER_EXPORT_BATCH_SIZE)
+    if format == "csv":
+        body, media_type = exporting.stream_csv(header, rows), exporting.CSV_MEDIA_TYPE
+    else:
+        body, media_type = exporting.stream_xlsx(header, rows, title="Users"), exporting.XLSX_MEDIA_TYPE
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": exporting.content_disposition(f"users_export.{format}")})
 
 @router.get("/operation_logs")
 def get_operation_logs(limit: int = 200, db: Session = Depends(get_db)):
@@ -0,0 +1,82 @@
+"""
+事项冗余计数 (Item.assigned_count / done_count / overdue_count)
+写路径在同一事务内增量维护；本模块同时提供全量重算，用于修复历史数据或批量导入后的校正。
+overdue_count 按分配状态计数：截止后仍未反馈的分配由调度任务（transitions.py）置为 'overdue'。
+
+用法：
+    python -m backend.counters              # 重算全部事项
+    python -m backend.counters 12 34        # 仅重算指定事项
+"""
+import sys
+from sqlalchemy import select, func, case, update, bindparam, Integer
+try:
+    from .database import SessionLocal
+    from . import models
+except (ImportError, ValueError):
+    from database import SessionLocal
+    import models
+
+# 为兼容历史数据，"done" 与 "completed" 均表示已反馈
+DONE_STATUSES = ("done", "completed")
+OVERDUE_STATUS = "overdue"
+# 待反馈（含已逾期）
+OPEN_STATUSES = ("pending", OVERDUE_STATUS)
+
+
+def mark_assignments_done(db, done_per_item, overdue_per_item=None):
+    """
+    若干分配由未反馈变为已反馈：done_per_item 为 {item_id: 新增已反馈数}，
+    overdue_per_item 为其中原状态为 'overdue' 的数量
+    每个事项 done_count + n、overdue_count - m；
+    全部反馈后自动将事项置为 finished —— 单条 UPDATE（批量时 executemany），无需加载事项的所有分配
+    """
+    if not done_per_item:
+        return
+    overdue_per_item = overdue_per_item or {}
+    # 使用 Core 表对象：ORM 的 executemany UPDATE 会被当作按主键批量更新
+    item = models.Item.__table__.c
+    n = bindparam("n", type_=Integer)
+    m = bindparam("m", type_=Integer)
+    stmt = update(models.Item.__table__).where(item.id == bindparam("item_id", type_=Integer)).values(
+        done_count=item.done_count + n,
+        overdue_count=func.max(item.overdue_count - m, 0),
+        status=case((item.done_count + n >= item.assigned_count, "finished"), else_=item.status),
+    )
+    db.execute(stmt, [{"item_id": item_id, "n": count, "m": overdue_per_item.get(item_id, 0)}
+                      for item_id, count in done_per_item.items()])
+
+
+def mark_assignment_done(db, item_id, was_overdue=False):
+    mark_assignments_done(db, {item_id: 1}, {item_id: int(was_overdue)})
+
+
+def recompute_item_counters(db, item_ids=None):
+    """
+    按 item_users 实际数据重算计数，返回更新的事项数
+    db 可以是 Session 或 Connection（迁移时直接在连接上执行）
+    """
+    iu = models.ItemUser
+    item = models.Item
+
+    def count_where(*conditions):
+        return select(func.count(iu.id)).where(iu.item_id == item.id, *conditions).scalar_subquery()
+
+    stmt = update(item).values(
+        assigned_count=count_where(),
+        done_count=count_where(iu.feedback_status.in_(DONE_STATUSES)),
+        overdue_count=count_where(iu.feedback_status == OVERDUE_STATUS),
+    )
+    if item_ids is not None:
+        stmt = stmt.where(item.id.in_(item_ids))
+    return db.execute(stmt).rowcount
+
+
+if __name__ == "__main__":
+    ids = [int(a) for a in sys.argv[1:]] or None
+    session = SessionLocal()
+    try:
+        updated = recompute_item_counters(session, ids)
+        session.commit()
+        print(f"已重算 {updated} 个事项的计数")
+    finally:
+        session.close()
@@ -1,9 +1,87 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'feedback.db').replace('\\', '/')}"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+DB_PATH = os.environ.get("FEEDBACK_DB_PATH", os.path.join(BASE_DIR, "feedback.db")).replace("\\", "/")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
+
+# SQLite 引擎配置档
+# - legacy: 与早期版本一致，仅关闭线程检查（回滚日志，整库写锁）
+# - production: WAL 模式，读写互不阻塞；写锁冲突时等待 busy_timeout 而不是立即报 "database is locked"
+# 可通过环境变量 FEEDBACK_DB_PROFILE 切换，单项参数可用 FEEDBACK_DB_<KEY> 覆盖（如 FEEDBACK_DB_BUSY_TIMEOUT=10000）
+ENGINE_PROFILES = {
+    "legacy": {
+        "pragmas": {},
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,        # 毫秒
+            "cache_size": -64000,        # 负数表示 KiB，即约 64MB 页缓存
+            "mmap_size": 268435456,      # 256MB 内存映射读
+            "temp_store": "MEMORY",
+        },
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+    },
+}
+DB_PROFILE = os.environ.get("FEEDBACK_DB_PROFILE", "production")
+
+
+def _profile_settings(profile):
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown database profile: {profile}")
+    settings = dict(ENGINE_PROFILES[profile])
+    pragmas = dict(settings["pragmas"])
+    for key in list(pragmas) + ["pool_size", "max_overflow", "pool_timeout"]:
+        env_value = os.environ.get(f"FEEDBACK_DB_{key.upper()}")
+        if env_value is None:
+            continue
+        if key in pragmas:
+            pragmas[key] = env_value
+        else:
+            settings[key] = int(env_value)
+    settings["pragmas"] = pragmas
+    return settings
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """在每个新建的 DBAPI 连接上执行 PRAGMA（连接级设置不会跨连接保留）"""
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # journal_mode 需最先设置，其余 PRAGMA 与其无依赖
+            for key in sorted(pragmas, key=lambda k: k != "journal_mode"):
+                cursor.execute(f"PRAGMA {key}={pragmas[key]}")
+        finally:
+            cursor.close()
+
+
+def build_engine(url=SQLALCHEMY_DATABASE_URL, profile=DB_PROFILE):
+    settings = _profile_settings(profile)
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    # 内存库使用单连接池，不支持 QueuePool 的容量参数
+    if ":memory:" not in url and "mode=memory" not in url:
+        kwargs.update(
+            pool_size=settings["pool_size"],
+            max_overflow=settings["max_overflow"],
+            pool_timeout=settings["pool_timeout"],
+        )
+    engine = create_engine(url, **kwargs)
+    apply_sqlite_pragmas(engine, settings["pragmas"])
+    return engine
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
 class Base(DeclarativeBase):
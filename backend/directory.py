@@ -0,0 +1,85 @@
+"""
+用户目录版本
+- app_meta.directory_version 在 users / group_users 的任何增删改后由触发器递增，
+  ORM、批量导入与手工 SQL 都会被计入，无需在各写路径上维护
+- /api/users/directory 以 (版本, 查询参数) 生成 ETag：目录未变化时只需读取一行即可返回 304
+- app_meta.directory_epoch 在建库时取随机值：数据库被重建后版本号可能重复，
+  进程内缓存（membership.py）以 (纪元, 版本) 判断是否过期
+- 另有触发器把成员的增删写入 membership_changes，成员位图索引据此增量更新
+"""
+import secrets
+from sqlalchemy import event, select, text
+try:
+    from . import models
+    from .database import Base
+except (ImportError, ValueError):
+    import models
+    from database import Base
+
+VERSION_KEY = "directory_version"
+EPOCH_KEY = "directory_epoch"
+
+_BUMP = f"UPDATE app_meta SET value = value + 1 WHERE key = '{VERSION_KEY}';"
+
+_TRIGGER_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS directory_version_{table}_{suffix} AFTER {op} ON {table} BEGIN {_BUMP} END"
+    for table in ("users", "group_users")
+    for op, suffix in (("INSERT", "ai"), ("UPDATE", "au"), ("DELETE", "ad"))
+]
+
+
+_LOG = "INSERT INTO membership_changes (group_id, user_id, added) VALUES"
+
+_CHANGE_TRIGGER_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS membership_changes_{name} {when} BEGIN {body} END"
+    for name, when, body in (
+        ("group_users_ai", "AFTER INSERT ON group_users", f"{_LOG} (NEW.group_id, NEW.user_id, 1);"),
+        ("group_users_ad", "AFTER DELETE ON group_users", f"{_LOG} (OLD.group_id, OLD.user_id, 0);"),
+        ("group_users_au", "AFTER UPDATE ON group_users",
+         f"{_LOG} (OLD.group_id, OLD.user_id, 0); {_LOG} (NEW.group_id, NEW.user_id, 1);"),
+        ("users_ai", "AFTER INSERT ON users", f"{_LOG} (NULL, NEW.id, 1);"),
+        ("users_ad", "AFTER DELETE ON users", f"{_LOG} (NULL, OLD.id, 0);"),
+        ("users_au", "AFTER UPDATE OF id ON users WHEN OLD.id != NEW.id",
+         f"{_LOG} (NULL, OLD.id, 0); {_LOG} (NULL, NEW.id, 1);"),
+    )
+]
+
+
+def install_version_triggers(conn):
+    """创建版本行与触发器（幂等）；返回是否新建了版本行"""
+    created = conn.execute(
+        text("INSERT OR IGNORE INTO app_meta (key, value) VALUES (:key, 1)"), {"key": VERSION_KEY}
+    ).rowcount > 0
+    conn.execute(
+        text("INSERT OR IGNORE INTO app_meta (key, value) VALUES (:key, :value)"),
+        {"key": EPOCH_KEY, "value": secrets.randbits(48)},
+    )
+    for ddl in _TRIGGER_DDL + _CHANGE_TRIGGER_DDL:
+        conn.exec_driver_sql(ddl)
+    return created
+
+
+def version_triggers_installed(conn):
+    names = {row[0] for row in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+        "AND (name LIKE 'directory_version_%' OR name LIKE 'membership_changes_%')"
+    ))}
+    return len(names) == len(_TRIGGER_DDL) + len(_CHANGE_TRIGGER_DDL)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_version_triggers(target, connection, **kw):
+    install_version_triggers(connection)
+
+
+def directory_version(db):
+    version = db.execute(select(models.AppMeta.value).where(models.AppMeta.key == VERSION_KEY)).scalar()
+    return version or 0
+
+
+def directory_stamp(db):
+    """(纪元, 版本)，一次查询读取"""
+    rows = dict(db.execute(
+        select(models.AppMeta.key, models.AppMeta.value).where(models.AppMeta.key.in_([EPOCH_KEY, VERSION_KEY]))
+    ).all())
+    return rows.get(EPOCH_KEY, 0), rows.get(VERSION_KEY, 0)
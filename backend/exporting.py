@@ -0,0 +1,71 @@
+"""
+导出工具
+- stream_csv: 逐批把行写成 CSV 字节块，边读边发，首批数据很快到达客户端；
+  bom=True 时开头写 UTF-8 BOM（Excel 直接打开不乱码），默认不写，保持原有导出的输出不变
+- stream_xlsx: 使用 openpyxl write-only 模式逐行写入，工作簿在临时文件中完整生成后才分块发送：
+  生成期间客户端收不到任何字节，超大导出可能触发代理的空闲超时，此时应改用 CSV
+两者都只消费行迭代器，配合 Query.yield_per 使用时内存占用与总行数无关。
+"""
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from urllib.parse import quote
+
+CSV_FLUSH_ROWS = 1000
+FILE_CHUNK_SIZE = 64 * 1024
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def stream_csv(header, rows, bom=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if bom:
+        buffer.write("\ufeff")
+    writer.writerow(header)
+    pending = 0
+    for row in rows:
+        writer.writerow([_cell(v) for v in row])
+        pending += 1
+        if pending >= CSV_FLUSH_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def stream_xlsx(header, rows, title="Sheet1"):
+    """先生成再发送：xlsx 是 zip 包，openpyxl 保存时才写出各部件，第一个字节在全部行写完之后才发出"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title)
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_cell(v) for v in row])
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def content_disposition(filename):
+    return f"attachment; filename*=utf-8''{quote(filename)}"
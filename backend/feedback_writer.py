@@ -0,0 +1,73 @@
+"""
+批量反馈写入
+在调用方的事务内完成：插入 Feedback（executemany）、按集合更新 ItemUser 状态、
+按事项汇总更新冗余计数并检测自动完成、更新统计汇总表。不负责提交。
+"""
+from datetime import datetime, timezone
+from sqlalchemy import insert, update
+try:
+    from . import models, stats
+    from .counters import DONE_STATUSES, OVERDUE_STATUS, mark_assignments_done
+except (ImportError, ValueError):
+    import models, stats
+    from counters import DONE_STATUSES, OVERDUE_STATUS, mark_assignments_done
+
+
+def submit_feedbacks(db, entries, now=None):
+    """
+    entries: [schemas.FeedbackCreate]
+    返回与 entries 一一对应的结果：
+    {"index", "item_user_id", "status": "created" | "not_found", "feedback": {id, content, created_at, updated_at} | None}
+    """
+    now = now or datetime.now(timezone.utc)
+    targets = stats.feedback_targets(db, {e.item_user_id for e in entries}) if entries else {}
+
+    rows = []
+    submissions = []
+    done_per_item = {}
+    overdue_per_item = {}
+    newly_done_ids = set()
+    for e in entries:
+        target = targets.get(e.item_user_id)
+        if target is None:
+            continue
+        rows.append({"item_user_id": e.item_user_id, "content": e.content, "created_at": now, "updated_at": now})
+        # 同一批次内对同一分配的多次提交只计一次完成
+        newly_done = target.feedback_status not in DONE_STATUSES and e.item_user_id not in newly_done_ids
+        if newly_done:
+            newly_done_ids.add(e.item_user_id)
+            done_per_item[target.item_id] = done_per_item.get(target.item_id, 0) + 1
+            if target.feedback_status == OVERDUE_STATUS:
+                overdue_per_item[target.item_id] = overdue_per_item.get(target.item_id, 0) + 1
+        submissions.append((target, newly_done))
+
+    created = []
+    if rows:
+        # 不使用 sort_by_parameter_order：SQLite 上它会退化为逐行 INSERT；
+        # 同一条多值 INSERT 按参数顺序分配递增的 id，按 id 排序即与 rows 一一对应
+        created = sorted(db.execute(
+            insert(models.Feedback).returning(
+                models.Feedback.id, models.Feedback.content, models.Feedback.created_at,
+                models.Feedback.updated_at,
+            ),
+            rows,
+        ).all(), key=lambda r: r.id)
+        db.execute(
+            update(models.ItemUser.__table__)
+            .where(models.ItemUser.__table__.c.id.in_({r["item_user_id"] for r in rows}))
+            .values(feedback_status="done", last_feedback_time=now)
+        )
+        mark_assignments_done(db, done_per_item, overdue_per_item)
+        stats.record_feedbacks(db, submissions)
+
+    results = []
+    created_iter = iter(created)
+    for index, e in enumerate(entries):
+        if e.item_user_id in targets:
+            fb = next(created_iter)
+            results.append({"index": index, "item_user_id": e.item_user_id, "status": "created",
+                            "feedback": fb._asdict()})
+        else:
+            results.append({"index": index, "item_user_id": e.item_user_id, "status": "not_found",
+                            "feedback": None})
+    return results
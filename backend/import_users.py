@@ -1,19 +1,15 @@
-import csv
 import sys
 import os
-from datetime import datetime, timezone
 
 # 添加后端目录到路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from database import SessionLocal, engine, Base
-    import models
-    from auth import get_password_hash
+    from user_import import parse_csv, import_users
 except ImportError:
     from .database import SessionLocal, engine, Base
-    from . import models
-    from .auth import get_password_hash
+    from .user_import import parse_csv, import_users
 
 # 在import_from_csv函数开头添加
 print("脚本连接的数据库：", engine.url)
@@ -29,39 +25,18 @@ def import_from_csv(file_path):
     
     try:
         with open(file_path, mode='r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            success_count = 0
-            skip_count = 0
-            print("csv解析到的表头",reader.fieldnames)
-            
-            for row in reader:
-                username = row.get('username')
-                print("当前数据",row)
-                if not username:
-                    print(f'跳过{row}，因为username为空')
-                    continue
-                
-                # 检查重复
-                if db.query(models.User).filter_by(username=username).first():
-                    skip_count += 1
-                    continue
-                
-                user = models.User(
-                    username=username,
-                    name=row.get('name', username),
-                    password_hash=get_password_hash(row.get('password', '123')),
-                    role=row.get('role', 'feedbacker'),
-                    group=row.get('group', '')
-                )
-                db.add(user)
-                success_count += 1
-                
-                if success_count % 50 == 0:
-                    db.commit()
-                    print(f"已处理 {success_count} 个...")
-
-            db.commit()
-            print(f"导入完成！成功: {success_count}, 跳过(已存在): {skip_count}")
+            rows = parse_csv(f.read(), default_password='123')
+        print(f"csv解析到 {len(rows)} 行")
+
+        def progress(phase, processed, total):
+            if phase == "hashing":
+                print(f"正在计算 {total} 个新用户的密码哈希...")
+            elif phase == "writing":
+                print(f"已写入 {processed}/{total} 个...")
+
+        report = import_users(db, rows, progress=progress)
+        db.commit()
+        print(f"导入完成！成功: {report['users_created']}, 跳过(已存在): {report['users_skipped']}")
 
     except Exception as e:
         print(f"发生错误: {e}")
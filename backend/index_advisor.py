@@ -0,0 +1,151 @@
+"""
+索引顾问 (Index Advisor)
+对各路由实际发出的热点查询执行 EXPLAIN QUERY PLAN，标记出全表扫描（SCAN <table>）。
+新增路由查询时，请同步在 ADVISOR_QUERIES 中登记其查询形状。
+
+用法：
+    python -m backend.index_advisor          # 检查默认数据库，存在全表扫描时退出码为 1
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func, case, tuple_, exists
+from sqlalchemy.dialects import sqlite
+try:
+    from .database import SessionLocal
+    from . import models
+except (ImportError, ValueError):
+    from database import SessionLocal
+    import models
+
+_NOW = datetime.now(timezone.utc)
+_DONE = ["done", "completed"]
+
+
+def _items_assigned_to(user_id):
+    return select(models.ItemUser.item_id).where(models.ItemUser.user_id == user_id)
+
+
+# (路由/任务, 查询说明, 语句)
+ADVISOR_QUERIES = [
+    ("GET /api/items", "scope=mine_created 按创建时间分页",
+     select(models.Item).where(models.Item.creator_id == 1)
+     .order_by(models.Item.created_at.desc()).limit(20)),
+    ("GET /api/items", "scope=mine_assigned",
+     select(models.Item).where(models.Item.id.in_(_items_assigned_to(1)))
+     .order_by(models.Item.created_at.desc()).limit(20)),
+    ("GET /api/items", "游标分页（按截止日期）",
+     select(models.Item).where(tuple_(models.Item.deadline, models.Item.id) < (_NOW, 100))
+     .order_by(models.Item.deadline.desc(), models.Item.id.desc()).limit(21)),
+    ("GET /api/items", "截止日期范围过滤",
+     select(models.Item).where(models.Item.deadline >= _NOW, models.Item.deadline <= _NOW + timedelta(days=7))),
+    ("GET /api/items", "发起日期范围过滤",
+     select(models.Item).where(models.Item.created_at >= _NOW - timedelta(days=7))),
+    ("GET /api/items/{id}", "参与人及反馈",
+     select(models.ItemUser, models.User, models.Feedback)
+     .join(models.User, models.ItemUser.user_id == models.User.id)
+     .outerjoin(models.Feedback, models.Feedback.item_user_id == models.ItemUser.id)
+     .where(models.ItemUser.item_id == 1)),
+    ("DELETE /api/items/{id}", "删除反馈",
+     select(models.Feedback.id).where(models.Feedback.item_user_id.in_([1, 2, 3]))),
+    ("DELETE /api/items/{id}", "删除分配",
+     select(models.ItemUser.id).where(models.ItemUser.item_id == 1)),
+    ("GET /api/items/stats/summary", "mine_created 部门排行",
+     select(models.User.group, func.count(models.ItemUser.id),
+            func.sum(case((models.ItemUser.feedback_status.in_(_DONE), 1), else_=0)))
+     .join(models.User, models.ItemUser.user_id == models.User.id)
+     .where(models.ItemUser.item_id.in_(select(models.Item.id).where(models.Item.creator_id == 1)))
+     .group_by(models.User.group)),
+    ("GET /api/todos", "用户待办（按截止时间）",
+     select(models.ItemUser.id, models.Item)
+     .join(models.Item, models.Item.id == models.ItemUser.item_id)
+     .where(models.ItemUser.user_id == 1, models.ItemUser.feedback_status.in_(["pending", "overdue"]))
+     .order_by(models.Item.deadline, models.ItemUser.id)),
+    ("GET /api/users/directory", "按部门 + 姓名前缀",
+     select(models.User.id, models.User.name).where(models.User.group == "研发部", models.User.name >= "张",
+                                                    models.User.name < "张\U0010ffff")
+     .order_by(models.User.id).limit(1001)),
+    ("GET /api/users/directory", "分组成员",
+     select(models.User.id, models.User.name)
+     .where(models.User.id.in_(select(models.group_users.c.user_id).where(models.group_users.c.group_id == 1)))
+     .order_by(models.User.id).limit(1001)),
+    ("GET /api/operation_logs", "最近操作日志",
+     select(models.OperationLog, models.User)
+     .join(models.User, models.OperationLog.user_id == models.User.id)
+     .order_by(models.OperationLog.timestamp.desc()).limit(200)),
+    ("POST /api/login", "按用户名查找",
+     select(models.User).where(models.User.username == "admin")),
+    ("GET /api/groups", "分组成员",
+     select(models.group_users.c.user_id).where(models.group_users.c.group_id == 1)),
+    ("DELETE /api/users/{id}", "用户所属分组",
+     select(models.group_users.c.group_id).where(models.group_users.c.user_id == 1)),
+    ("scheduler", "提醒：新进入前瞻窗口的事项",
+     select(models.Item.id, models.Item.deadline)
+     .where(models.Item.deadline > _NOW + timedelta(hours=24), models.Item.deadline <= _NOW + timedelta(hours=25),
+            models.Item.id <= 1000)),
+    ("scheduler", "提醒：水位线之后新建的事项",
+     select(models.Item.id, models.Item.deadline)
+     .where(models.Item.id > 900, models.Item.id <= 1000,
+            models.Item.deadline > _NOW, models.Item.deadline <= _NOW + timedelta(hours=24))),
+    ("scheduler", "提醒：到点事项中尚未提醒的分配",
+     select(models.ItemUser.id, models.ItemUser.user_id, models.Item.deadline)
+     .join(models.Item, models.Item.id == models.ItemUser.item_id)
+     .where(models.ItemUser.item_id.in_([1, 2, 3]), models.ItemUser.feedback_status == "pending",
+            ~exists().where(models.Reminder.item_user_id == models.ItemUser.id,
+                            models.Reminder.kind == "due_soon"))),
+    ("scheduler", "逾期：水位线之后到期事项的待反馈分配",
+     select(models.ItemUser.id)
+     .where(models.ItemUser.feedback_status == "pending",
+            models.ItemUser.item_id.in_(select(models.Item.id).where(models.Item.deadline > _NOW - timedelta(minutes=5),
+                                                                     models.Item.deadline <= _NOW)))),
+    ("scheduler", "自动关闭：水位线之后到期的进行中事项",
+     select(models.Item.id)
+     .where(models.Item.deadline > _NOW - timedelta(days=8), models.Item.deadline <= _NOW - timedelta(days=7),
+            models.Item.status == "ongoing")),
+    ("DELETE /api/items/{id}", "删除提醒台账",
+     select(models.Reminder.id).where(models.Reminder.item_id == 1)),
+]
+
+
+def _is_table_scan(detail):
+    # SQLite >= 3.36: "SCAN items"；旧版本: "SCAN TABLE items"
+    # "SCAN ... USING [COVERING] INDEX" 是按索引顺序遍历（如 ORDER BY ... LIMIT），不视为问题
+    return detail.startswith("SCAN") and "USING" not in detail and "CONSTANT ROW" not in detail
+
+
+def explain(db, stmt):
+    sql = str(stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql).fetchall()
+    return [row[-1] for row in rows]
+
+
+def advise(db, queries=None):
+    """
+    返回每条查询的执行计划及是否存在全表扫描
+    """
+    report = []
+    for route, label, stmt in queries or ADVISOR_QUERIES:
+        plan = explain(db, stmt)
+        scans = [d for d in plan if _is_table_scan(d)]
+        report.append({"route": route, "query": label, "plan": plan, "scans": scans})
+    return report
+
+
+def main():
+    db = SessionLocal()
+    try:
+        report = advise(db)
+    finally:
+        db.close()
+    flagged = 0
+    for entry in report:
+        mark = "SCAN" if entry["scans"] else "ok"
+        print(f"[{mark:>4}] {entry['route']:<28} {entry['query']}")
+        for detail in entry["plan"]:
+            print(f"         {detail}")
+        flagged += bool(entry["scans"])
+    print(f"\n{flagged} / {len(report)} 条查询存在全表扫描")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+按请求统计 SQL（定位 N+1 查询）
+- instrument(engine) 在引擎上挂 before/after_cursor_execute 事件，把每条语句的耗时记入当前请求的 QueryStats
+  （contextvars 传递，同步路由在线程池中执行时同样归属到发起的请求；调度线程等请求之外的查询不统计）
+- QueryStats 记录查询数、SQL 总耗时、最慢语句，以及语句指纹（字面量与 IN 列表归一）出现的次数，
+  同一指纹在一次请求中重复 N_PLUS_ONE_THRESHOLD 次及以上视为 N+1
+- SQLInstrumentationMiddleware 在响应头写入 Server-Timing（db / app 两项）与 X-Query-Count
+- 滚动报表默认关闭（包含原始语句文本）：FEEDBACK_QUERY_REPORT=1 时才记录最近 REPORT_WINDOW 个请求，
+  并挂载 GET / DELETE /api/debug/queries 按端点汇总、清空；流式响应在响应头发出之后执行的查询只计入报表
+- 严格模式（FEEDBACK_QUERY_BUDGET=strict，测试套件默认开启）下，端点查询数超过 BUDGETS 中的预算
+  或出现 N+1 时抛出 QueryBudgetExceeded，TestClient 会把它作为测试失败抛出
+
+配置：FEEDBACK_SQL_INSTRUMENT=0 关闭统计，FEEDBACK_QUERY_REPORT=1 开启报表与调试端点，
+FEEDBACK_QUERY_BUDGET=strict 开启严格模式
+"""
+import os
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from fastapi import APIRouter
+from sqlalchemy import event
+
+ENABLED = os.environ.get("FEEDBACK_SQL_INSTRUMENT", "1") != "0"
+REPORT_ENABLED = os.environ.get("FEEDBACK_QUERY_REPORT") == "1"
+STRICT = os.environ.get("FEEDBACK_QUERY_BUDGET") == "strict"
+REPORT_WINDOW = 1000
+N_PLUS_ONE_THRESHOLD = 5
+DEFAULT_BUDGET = 15
+# 每个端点（"方法 路由模板"）一次请求允许的查询数，未列出的使用 DEFAULT_BUDGET
+# 使用成员索引的端点按冷启动整体重建计（membership.py，3 条查询），增量更新只需 1 条
+BUDGETS = {
+    "GET /api/todos": 2,
+    "GET /api/groups": 2,
+    "POST /api/groups/resolve": 4,
+    "GET /api/items": 4,
+    "GET /api/items/{item_id}": 3,
+    "GET /api/items/stats/summary": 3,
+    "GET /api/users/directory": 2,
+    "POST /api/feedbacks": 8,
+    "POST /api/feedbacks/bulk": 8,
+    "POST /api/items": 13,
+    "DELETE /api/items/{item_id}": 12,
+}
+
+_current = ContextVar("sql_query_stats", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement):
+    """归一字面量、占位符列表与空白，参数不同的同一语句得到相同指纹（语句文本来自编译缓存，按文本缓存结果）"""
+    s = _STRING.sub("?", statement)
+    s = _NUMBER.sub("?", s)
+    s = _LIST.sub("(?)", s)
+    return _SPACE.sub(" ", s).strip()
+
+
+class QueryStats:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.slowest = None
+        self.slowest_seconds = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement, seconds):
+        self.queries += 1
+        self.seconds += seconds
+        if self.slowest is None or seconds > self.slowest_seconds:
+            self.slowest, self.slowest_seconds = statement, seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """出现 threshold 次及以上的指纹，按次数降序"""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+
+@contextmanager
+def track():
+    """在请求之外（脚本、MCP 工具、测试）统计一段代码的查询"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 开始时间记在本次执行的 context 上：语句出错时 after 事件不会触发，context 随执行结束释放，不会残留
+    if _current.get() is not None and context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = getattr(context, "_query_start", None)
+    if stats is not None and start is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def instrument(engine):
+    """
+    重复调用不会重复挂载。挂载游标事件本身使每条语句多出约 20 微秒（SQLAlchemy 的事件分发路径），
+    关闭统计（FEEDBACK_SQL_INSTRUMENT=0）时不挂载
+    """
+    if ENABLED and not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def check_budget(endpoint, stats):
+    budget = BUDGETS.get(endpoint, DEFAULT_BUDGET)
+    if stats.queries > budget:
+        raise QueryBudgetExceeded(f"{endpoint} 执行了 {stats.queries} 条查询，超出预算 {budget}")
+    repeated = stats.repeated()
+    if repeated:
+        fp, n = repeated[0]
+        raise QueryBudgetExceeded(f"{endpoint} 疑似 N+1：同一语句执行 {n} 次：{fp}")
+
+
+class QueryReport:
+    def __init__(self, window=REPORT_WINDOW):
+        self.entries = deque(maxlen=window)
+
+    def add(self, endpoint, status, stats, seconds):
+        self.entries.append({
+            "endpoint": endpoint, "status": status, "queries": stats.queries,
+            "sql_ms": stats.seconds * 1000, "total_ms": seconds * 1000,
+            "slowest": stats.slowest, "slowest_ms": stats.slowest_seconds * 1000,
+            "repeated": stats.repeated(),
+        })
+
+    def clear(self):
+        self.entries.clear()
+
+    def summary(self):
+        """按端点汇总，SQL 总耗时高的在前"""
+        by_endpoint = {}
+        for e in list(self.entries):
+            by_endpoint.setdefault(e["endpoint"], []).append(e)
+        rows = []
+        for endpoint, entries in by_endpoint.items():
+            queries = [e["queries"] for e in entries]
+            sql_ms = sorted(e["sql_ms"] for e in entries)
+            slowest = max(entries, key=lambda e: e["slowest_ms"])
+            repeated = Counter()
+            for e in entries:
+                for fp, n in e["repeated"]:
+                    repeated[fp] = max(repeated[fp], n)
+            budget = BUDGETS.get(endpoint, DEFAULT_BUDGET)
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(entries),
+                "queries_avg": round(sum(queries) / len(queries), 2),
+                "queries_max": max(queries),
+                "budget": budget,
+                "over_budget": sum(q > budget for q in queries),
+                "sql_ms_total": round(sum(sql_ms), 2),
+                "sql_ms_avg": round(sum(sql_ms) / len(sql_ms), 2),
+                "sql_ms_p95": round(sql_ms[min(len(sql_ms) - 1, int(len(sql_ms) * 0.95))], 2),
+                "total_ms_avg": round(sum(e["total_ms"] for e in entries) / len(entries), 2),
+                "slowest": slowest["slowest"],
+                "slowest_ms": round(slowest["slowest_ms"], 2),
+                "repeated": [{"statement": fp, "count": n} for fp, n in repeated.most_common(5)],
+            })
+        rows.sort(key=lambda r: r["sql_ms_total"], reverse=True)
+        return {"window": self.entries.maxlen, "requests": len(self.entries), "endpoints": rows}
+
+
+report = QueryReport()
+
+
+def _endpoint(scope):
+    """"方法 路由模板"；路由的 path 不含 include_router 的前缀，前缀取自请求路径中未被路由匹配的部分"""
+    path, route = scope["path"], scope.get("route")
+    regex = getattr(route, "path_regex", None)
+    if regex is not None:
+        for i, ch in enumerate(path):
+            if ch == "/" and regex.match(path[i:]):
+                return f"{scope['method']} {path[:i]}{route.path}"
+    return f"{scope['method']} <unmatched>"
+
+
+class SQLInstrumentationMiddleware:
+    """纯 ASGI 中间件（不缓冲响应体，流式下载与导出不受影响）；report 为 None 时只写响应头"""
+
+    def __init__(self, app, report=None, strict=None):
+        self.app = app
+        self.report = report
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED or scope["path"].startswith("/api/debug/"):
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                timing = (f'db;dur={stats.seconds * 1000:.1f};desc="{stats.queries} queries", '
+                          f"app;dur={total_ms:.1f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode()))
+                headers.append((b"x-query-count", str(stats.queries).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+        endpoint = _endpoint(scope)
+        if self.report is not None:
+            self.report.add(endpoint, status, stats, time.perf_counter() - start)
+        if self.strict if self.strict is not None else STRICT:
+            check_budget(endpoint, stats)
+
+
+# 仅在 REPORT_ENABLED 时挂载（见 main.py）
+router = APIRouter()
+
+
+@router.get("/debug/queries")
+def query_report():
+    return report.summary()
+
+
+@router.delete("/debug/queries")
+def clear_query_report():
+    report.clear()
+    return {"message": "cleared"}
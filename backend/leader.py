@@ -0,0 +1,133 @@
+"""
+调度任务的单主选举（多 worker 部署，如 uvicorn --workers 4）
+- 每个 worker 都尝试以非阻塞方式对同一个锁文件加排他锁（POSIX flock / Windows msvcrt），
+  只有持锁的进程启动调度器，定时任务只执行一份
+- 锁由操作系统持有：主进程退出或崩溃时立即释放，其余 worker 每隔 retry_seconds 重试，
+  其中一个接管并启动调度器，无需外部服务，也没有租约过期的等待窗口
+- 锁文件默认放在数据库文件旁（FEEDBACK_LEADER_LOCK 可覆盖），同一数据库的 worker 才互斥；
+  锁文件中记录当前主进程的 PID，便于排查
+- exclusive() 以阻塞方式加锁，用于让各 worker 启动时依次执行数据库迁移（否则并发 create_all 会报表已存在）
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+try:
+    from .database import DB_PATH
+except (ImportError, ValueError):
+    from database import DB_PATH
+
+LOCK_PATH = os.environ.get("FEEDBACK_LEADER_LOCK", DB_PATH + ".scheduler.lock")
+MIGRATION_LOCK_PATH = DB_PATH + ".migrate.lock"
+RETRY_SECONDS = float(os.environ.get("FEEDBACK_LEADER_RETRY_SECONDS", 5))
+
+
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def try_acquire(self):
+        """非阻塞加锁，成功返回 True；已被其他进程持有时返回 False"""
+        if self._file is not None:
+            return True
+        f = open(self.path, "a+")
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._file = f
+        return True
+
+    def acquire(self, poll_seconds=0.05):
+        """阻塞直到加锁成功"""
+        while not self.try_acquire():
+            time.sleep(poll_seconds)
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+@contextmanager
+def exclusive(path=MIGRATION_LOCK_PATH):
+    lock = FileLock(path)
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class LeaderElector:
+    """
+    start() 立即尝试一次（单进程部署时调度器随应用启动，与原行为一致），
+    未当选则在后台线程中重试，当选后调用 on_elected 并一直持锁到进程退出或 stop()
+    锁随文件句柄存在，调用方须在进程生命周期内持有该对象（如模块级变量）
+    """
+
+    def __init__(self, on_elected, lock_path=LOCK_PATH, retry_seconds=RETRY_SECONDS):
+        self.on_elected = on_elected
+        self.lock = FileLock(lock_path)
+        self.retry_seconds = retry_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self):
+        return self.lock.held
+
+    def _try_lead(self):
+        if not self.lock.try_acquire():
+            return False
+        try:
+            self.on_elected()
+        except Exception:
+            # 启动失败时不能占着锁，让其他 worker 接管
+            self.lock.release()
+            raise
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.retry_seconds):
+            if self._try_lead():
+                return
+
+    def start(self):
+        if self._try_lead():
+            return
+        self._thread = threading.Thread(target=self._run, name="leader-elector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.lock.release()
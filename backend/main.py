@@ -1,28 +1,35 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 try:
-    from .database import Base, engine
-    from .routers import items, feedback, groups
+    from .database import engine
+    from .migrations import upgrade
+    from .routers import items, feedback, groups, uploads
     from .auth import router as auth_router
     from .scheduler import scheduler
+    from .leader import LeaderElector, exclusive
+    from .attachments import UPLOAD_DIR
+    from .instrumentation import REPORT_ENABLED, SQLInstrumentationMiddleware, instrument, report, router as debug_router
 except (ImportError, ValueError):
-    from database import Base, engine
-    from routers import items, feedback, groups
+    from database import engine
+    from migrations import upgrade
+    from routers import items, feedback, groups, uploads
     from auth import router as auth_router
     from scheduler import scheduler
+    from leader import LeaderElector, exclusive
+    from attachments import UPLOAD_DIR
+    from instrumentation import REPORT_ENABLED, SQLInstrumentationMiddleware, instrument, report, router as debug_router
 
-from fastapi.staticfiles import StaticFiles
 import os
 import uvicorn
 
-if not os.path.exists("uploads"):
-    os.makedirs("uploads")
+if not os.path.exists(UPLOAD_DIR):
+    os.makedirs(UPLOAD_DIR)
 
-Base.metadata.create_all(bind=engine)
+# 多个 worker 同时启动时依次迁移
+with exclusive():
+    upgrade(engine)
 app = FastAPI(title="事项反馈管理系统 V1.1")
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -31,12 +38,22 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+# 按请求统计 SQL：Server-Timing 响应头；FEEDBACK_QUERY_REPORT=1 时另有 /api/debug/queries 报表（见 instrumentation.py）
+instrument(engine)
+app.add_middleware(SQLInstrumentationMiddleware, report=report if REPORT_ENABLED else None)
 app.include_router(groups.router, prefix="/api")
 app.include_router(items.router, prefix="/api")
 app.include_router(feedback.router, prefix="/api")
 app.include_router(auth_router, prefix="/api")
-
-scheduler.start()
+if REPORT_ENABLED:
+    app.include_router(debug_router, prefix="/api")
+# 附件同时在 /api/uploads（附件元数据中的路径）与旧的 /uploads 下提供
+app.include_router(uploads.router, prefix="/api")
+app.include_router(uploads.download_router, include_in_schema=False)
+
+# 多 worker 部署时只有当选的进程运行定时任务，主进程退出后由其他 worker 接管（见 leader.py）
+scheduler_elector = LeaderElector(scheduler.start)
+scheduler_elector.start()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
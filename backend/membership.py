@@ -0,0 +1,159 @@
+"""
+分组成员位图索引
+- 每个分组的成员集合是一个以用户 ID 为位序号的位图（Python int），全部用户另有一个位图；
+  用户 ID 为自增整数、分布稠密，一个 2 万用户的分组只占约 2.5 KB，并、交、差均为整块的位运算
+- 索引按进程缓存，以目录纪元与版本（directory.py，users / group_users 变更时由触发器递增）判断是否过期；
+  过期时只读取触发器写入 membership_changes 的新增记录、在位图上逐条置位/清位（写时复制，读者不受影响），
+  任何写路径（ORM、批量导入、组织同步、手工 SQL）改动成员后，下一次解析的开销与变更条数成正比；
+  变更日志被清理而不连续、或数据库被重建（纪元变化）时才整体重建
+- resolve() 计算 (指定用户 ∪ 分组成员) ∩ 限定分组 − 排除项，供 /api/groups/resolve 与创建事项使用
+"""
+import threading
+from sqlalchemy import select, delete, text
+try:
+    from . import models
+    from .directory import directory_stamp
+except (ImportError, ValueError):
+    import models
+    from directory import directory_stamp
+
+# 每个字节值对应的置位序号
+_BYTE_BITS = [tuple(i for i in range(8) if b >> i & 1) for b in range(256)]
+
+
+def to_bitmap(ids, limit=None):
+    """limit 为位图上限（不含）；超出的 ID 不可能命中任何用户，直接丢弃以免分配过大的位图"""
+    ids = [i for i in ids if i >= 0 and (limit is None or i < limit)]
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def from_bitmap(bits):
+    """升序返回置位的用户 ID"""
+    ids = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset * 8
+            ids.extend(base + i for i in _BYTE_BITS[byte])
+    return ids
+
+
+PRUNE_KEEP = 100000  # membership_changes 保留的最近记录数
+
+
+def change_seq(db):
+    """membership_changes 已分配的最大序号（含已清理的记录）"""
+    seq = db.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'membership_changes'")).scalar()
+    return seq or 0
+
+
+class MembershipIndex:
+    def __init__(self, stamp, seq, users, groups):
+        self.stamp = stamp
+        self.seq = seq  # 已应用到的变更序号
+        self.users = users
+        self.groups = groups
+
+    @classmethod
+    def build(cls, db, stamp):
+        seq = change_seq(db)
+        members = {}
+        for group_id, user_id in db.execute(select(models.group_users.c.group_id, models.group_users.c.user_id)):
+            members.setdefault(group_id, []).append(user_id)
+        users = to_bitmap(db.execute(select(models.User.id)).scalars())
+        return cls(stamp, seq, users, {gid: to_bitmap(ids) for gid, ids in members.items()})
+
+    def apply(self, stamp, seq, changes):
+        """按序应用变更 [(group_id, user_id, added)]，返回新的索引（不修改当前索引）"""
+        users = self.users
+        groups = dict(self.groups)
+        for group_id, user_id, added in changes:
+            bit = 1 << user_id
+            if group_id is None:
+                users = users | bit if added else users & ~bit
+            else:
+                bits = groups.get(group_id, 0)
+                bits = bits | bit if added else bits & ~bit
+                if bits:
+                    groups[group_id] = bits
+                else:
+                    groups.pop(group_id, None)
+        return MembershipIndex(stamp, seq, users, groups)
+
+    def group_bitmap(self, group_id):
+        # 外键未强制时 group_users 可能残留已删除用户，统一与全部用户相交
+        return self.groups.get(group_id, 0) & self.users
+
+    def resolve(self, user_ids=(), group_ids=(), intersect_group_ids=(), exclude_user_ids=(), exclude_group_ids=()):
+        """
+        返回选中用户的位图；不存在的用户与分组按空集处理
+        """
+        limit = self.users.bit_length()
+        selected = to_bitmap(user_ids, limit) & self.users
+        for gid in group_ids:
+            selected |= self.group_bitmap(gid)
+        for gid in intersect_group_ids:
+            selected &= self.group_bitmap(gid)
+        if exclude_user_ids:
+            selected &= ~to_bitmap(exclude_user_ids, limit)
+        for gid in exclude_group_ids:
+            selected &= ~self.group_bitmap(gid)
+        return selected
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def _refresh(db, index, stamp):
+    """
+    同一数据库（纪元相同）且变更日志连续时增量应用（一次查询），否则整体重建
+    序号由 AUTOINCREMENT 连续分配（回滚的事务连同 sqlite_sequence 一起回滚），清理总保留最近的记录：
+    读到的首条序号紧接 index.seq 即为连续；一条也没有说明只有不影响成员的改动（如改姓名）
+    """
+    if index is not None and index.stamp[0] == stamp[0]:
+        change = models.MembershipChange
+        changes = db.execute(
+            select(change.id, change.group_id, change.user_id, change.added)
+            .where(change.id > index.seq).order_by(change.id)
+        ).all()
+        if not changes:
+            return MembershipIndex(stamp, index.seq, index.users, index.groups)
+        if changes[0].id == index.seq + 1:
+            return index.apply(stamp, changes[-1].id, [c[1:] for c in changes])
+    return MembershipIndex.build(db, stamp)
+
+
+def get_index(db):
+    """
+    返回与数据库当前目录版本一致的索引；版本变化时增量更新（见 _refresh）
+    """
+    global _current
+    stamp = directory_stamp(db)
+    index = _current
+    if index is not None and index.stamp == stamp:
+        return index
+    with _lock:
+        if _current is None or _current.stamp != stamp:
+            _current = _refresh(db, _current, stamp)
+        return _current
+
+
+def prune_changes(db, keep=PRUNE_KEEP):
+    """
+    删除较早的变更记录，至少保留最近一条（见 _refresh），返回删除条数；
+    落后超过 keep 条的进程下一次整体重建。不负责提交
+    """
+    return db.execute(
+        delete(models.MembershipChange).where(models.MembershipChange.id <= change_seq(db) - max(keep, 1))
+    ).rowcount
+
+
+def resolve_user_ids(db, **selection):
+    """按 resolve() 的参数解析选择，返回升序的用户 ID 列表"""
+    return from_bitmap(get_index(db).resolve(**selection))
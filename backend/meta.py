@@ -0,0 +1,30 @@
+"""
+app_meta 键值读写（版本号、水位线等整数值）
+"""
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+try:
+    from . import models
+except (ImportError, ValueError):
+    import models
+
+
+def get_meta(db, key):
+    return db.execute(select(models.AppMeta.value).where(models.AppMeta.key == key)).scalar()
+
+
+def set_meta(db, key, value):
+    stmt = sqlite_insert(models.AppMeta.__table__).values(key=key, value=value)
+    db.execute(stmt.on_conflict_do_update(index_elements=["key"], set_={"value": stmt.excluded.value}))
+
+
+def to_epoch(when):
+    """水位线以 UTC 秒存储；无时区的时间按 UTC 处理（与库中的截止时间一致）"""
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return int(when.timestamp())
+
+
+def from_epoch(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc)
@@ -0,0 +1,90 @@
+"""
+轻量级数据库迁移
+项目未引入 Alembic，create_all 只会创建缺失的表，不会给已存在的表补列或索引。
+upgrade() 在启动时执行，幂等地把已有 feedback.db 升级到当前模型声明的结构。
+
+用法：
+    python -m backend.migrations            # 升级默认数据库
+"""
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+try:
+    from .database import Base, engine as default_engine
+    from . import models  # noqa: F401  注册所有模型到 Base.metadata
+    from .search import fts_installed, install_item_fts
+    from .directory import install_version_triggers, version_triggers_installed
+    from .counters import recompute_item_counters
+    from .transitions import mark_overdue
+    from .stats import rebuild_rollups
+except (ImportError, ValueError):
+    from database import Base, engine as default_engine
+    import models  # noqa: F401
+    from search import fts_installed, install_item_fts
+    from directory import install_version_triggers, version_triggers_installed
+    from counters import recompute_item_counters
+    from transitions import mark_overdue
+    from stats import rebuild_rollups
+
+
+def _add_missing_columns(conn):
+    # SQLite 的 ADD COLUMN 只能追加可空或带常量默认值的列，新增列须声明 server_default
+    added = []
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in existing:
+                ddl = CreateColumn(col).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+                added.append(f"{table.name}.{col.name}")
+    return added
+
+
+def _create_missing_indexes(conn):
+    created = []
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=conn)
+                created.append(index.name)
+    return created
+
+
+def upgrade(engine=None):
+    """
+    执行所有迁移步骤，返回本次实际做出的变更列表
+    """
+    engine = engine or default_engine
+    existing_tables = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    changes = []
+    with engine.begin() as conn:
+        added = _add_missing_columns(conn)
+        changes += [f"add column {name}" for name in added]
+        if any(name.startswith("items.") and name.endswith("_count") for name in added):
+            # 冗余计数列首次出现时按现有数据回填；overdue_count 按状态计数，先把已过截止的待反馈分配置为逾期
+            mark_overdue(conn)
+            recompute_item_counters(conn)
+        created = _create_missing_indexes(conn)
+        changes += [f"create index {name}" for name in created]
+        if created:
+            # 新索引需要统计信息，查询规划器才会优先选用
+            conn.exec_driver_sql("ANALYZE")
+        if "stats_scope_rollup" not in existing_tables:
+            # 汇总表首次创建时按现有数据填充
+            rebuild_rollups(conn)
+            changes.append("build stats rollups")
+        # 旧库没有全文索引：建表、建触发器并按现有数据重建
+        if not fts_installed(conn) and install_item_fts(conn, rebuild=True):
+            changes.append("create fts items_fts")
+        if not version_triggers_installed(conn):
+            install_version_triggers(conn)
+            changes.append("create directory version triggers")
+    return changes
+
+
+if __name__ == "__main__":
+    applied = upgrade()
+    print("\n".join(applied) if applied else "数据库已是最新结构")
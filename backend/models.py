@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 try:
     from .database import Base
@@ -12,6 +12,8 @@ group_users = Table(
     Base.metadata,
     Column("group_id", Integer, ForeignKey("groups.id"), primary_key=True),
     Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    # 主键 (group_id, user_id) 无法按用户反查所属分组
+    Index("ix_group_users_user_id", "user_id"),
 )
 
 class User(Base):
@@ -22,42 +24,88 @@ class User(Base):
     """
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String)
+    name = Column(String, index=True)
     username = Column(String, unique=True, index=True)
     password_hash = Column(String)
     role = Column(String)  # admin / creator / feedbacker
-    group = Column(String, nullable=True)
+    group = Column(String, nullable=True, index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
 class Item(Base):
     """
     事项模型 (Items)
-    - status: 'ongoing' / 'finished'
+    - status: 'ongoing' / 'finished' / 'closed'（截止后自动关闭，见 transitions.py）
     - attachments: JSON 存储的附件列表
+    - assigned_count / done_count / overdue_count: 分配数、已反馈数、逾期未反馈数
     """
     __tablename__ = "items"
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String)
+    title = Column(String, index=True)
     description = Column(String)
-    status = Column(String, default="ongoing")
+    status = Column(String, default="ongoing", index=True)
     must_feedback = Column(Boolean, default=True)
-    deadline = Column(DateTime)
+    deadline = Column(DateTime, index=True)
     creator_id = Column(Integer, ForeignKey("users.id"))
     attachments = Column(String, nullable=True) # 存储 JSON 字符串: [{"name": "file.pdf", "path": "/uploads/xxx"}]
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    # 冗余计数，随分配/反馈在同一事务内维护，可用 python -m backend.counters 重算
+    assigned_count = Column(Integer, default=0, server_default="0", nullable=False)
+    done_count = Column(Integer, default=0, server_default="0", nullable=False)
+    overdue_count = Column(Integer, default=0, server_default="0", nullable=False)  # 状态为 overdue（截止后仍未反馈）的分配数
+
+    __table_args__ = (
+        # scope=mine_created 的过滤 + 按创建时间排序
+        Index("ix_items_creator_created", "creator_id", "created_at"),
+    )
 
 class ItemUser(Base):
     __tablename__ = "item_users"
     id = Column(Integer, primary_key=True, index=True)
     item_id = Column(Integer, ForeignKey("items.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
-    feedback_status = Column(String, default="pending")
+    feedback_status = Column(String, default="pending")  # pending / overdue（截止后仍未反馈）/ done
     last_feedback_time = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # 待办查询 (user_id, feedback_status) 与 scope=mine_assigned 子查询
+        Index("ix_item_users_user_status", "user_id", "feedback_status"),
+        # 事项详情/统计/删除按 item_id 过滤，统计同时按状态计数
+        Index("ix_item_users_item_status", "item_id", "feedback_status"),
+    )
+
+class Reminder(Base):
+    """
+    提醒台账：每个分配每种提醒至多一条，记录已发出的提醒（见 reminders.py）
+    - kind: 'due_soon' 截止前提醒
+    - due_at: 计划提醒时刻；sent_at: 实际发出时刻
+    """
+    __tablename__ = "reminders"
+    id = Column(Integer, primary_key=True)
+    item_user_id = Column(Integer, ForeignKey("item_users.id"), nullable=False)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String, nullable=False)
+    due_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("item_user_id", "kind", name="uq_reminders_item_user_kind"),
+    )
+
+class ReminderReschedule(Base):
+    """
+    需要重新装入提醒时间轮的事项；由提醒引擎（可能在另一个 worker 中）消费后删除
+    - retry_at 为空：截止时间被修改，下一个 tick 装载
+    - retry_at 非空：提醒发送失败，到 retry_at 后装载重发（持久化，进程重启或主节点切换后不丢失）
+    """
+    __tablename__ = "reminder_reschedules"
+    item_id = Column(Integer, ForeignKey("items.id"), primary_key=True)
+    retry_at = Column(DateTime, nullable=True)
+
 class Feedback(Base):
     __tablename__ = "feedbacks"
     id = Column(Integer, primary_key=True, index=True)
-    item_user_id = Column(Integer, ForeignKey("item_users.id"))
+    item_user_id = Column(Integer, ForeignKey("item_users.id"), index=True)
     content = Column(String)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -80,4 +128,88 @@ class OperationLog(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     action = Column(String)  # e.g., "Login", "Create Item", "Delete User"
     target_id = Column(String, nullable=True)
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+class StatsScopeRollup(Base):
+    """
+    统计汇总（按作用域所有者）
+    - owner_id: 事项发起人 ID；0 表示全局（scope=all）
+    - 随事项创建/删除、反馈提交增量维护，调度任务定期全量校正
+    """
+    __tablename__ = "stats_scope_rollup"
+    owner_id = Column(Integer, primary_key=True, autoincrement=False)
+    item_count = Column(Integer, default=0, server_default="0", nullable=False)
+    feedback_count = Column(Integer, default=0, server_default="0", nullable=False)
+    assigned_count = Column(Integer, default=0, server_default="0", nullable=False)
+    done_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+class StatsDeptRollup(Base):
+    """
+    统计汇总（按作用域所有者 + 参与人部门），用于部门响应率排行
+    - department: User.group，未分组记为空字符串
+    """
+    __tablename__ = "stats_dept_rollup"
+    owner_id = Column(Integer, primary_key=True, autoincrement=False)
+    department = Column(String, primary_key=True)
+    assigned_count = Column(Integer, default=0, server_default="0", nullable=False)
+    done_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+class UploadSession(Base):
+    """
+    分块上传会话
+    - 分块按序号依次追加到临时文件，重试已收到的分块是幂等的
+    - status: uploading / finalized；完成后 path 为内容寻址存储中的相对路径
+    """
+    __tablename__ = "upload_sessions"
+    id = Column(String, primary_key=True)
+    filename = Column(String, nullable=False)
+    size = Column(Integer, nullable=True)  # 客户端声明的总大小，完成时校验
+    creator_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    next_index = Column(Integer, default=0, server_default="0", nullable=False)
+    received_bytes = Column(Integer, default=0, server_default="0", nullable=False)
+    status = Column(String, default="uploading", server_default="uploading", nullable=False)
+    path = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+class MembershipChange(Base):
+    """
+    成员变更日志：users / group_users 的增删由触发器写入（见 directory.py），
+    成员位图索引（membership.py）按序号增量应用，不必整体重建
+    - group_id 为空表示用户本身的增删；added: 1 加入 / 0 移出
+    - AUTOINCREMENT 保证序号不复用，删除旧记录后据 sqlite_sequence 仍能发现日志不连续
+    """
+    __tablename__ = "membership_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=False)
+    added = Column(Integer, nullable=False)
+
+class AppMeta(Base):
+    """
+    应用级键值（版本号、水位线等）
+    - directory_version: 用户目录版本，users / group_users 变更时由触发器递增，用作目录接口的 ETag
+    - directory_epoch: 建库时生成的随机值，与 directory_version 一起标识目录内容
+    """
+    __tablename__ = "app_meta"
+    key = Column(String, primary_key=True)
+    value = Column(Integer, default=0, server_default="0", nullable=False)
+
+class ImportJob(Base):
+    """
+    后台导入任务进度
+    - status: queued / running / finished / failed；phase: hashing / writing / done
+    - result: 完成后的统计 (JSON 字符串)
+    """
+    __tablename__ = "import_jobs"
+    id = Column(String, primary_key=True)
+    status = Column(String, default="queued", server_default="queued", nullable=False)
+    phase = Column(String, nullable=True)
+    total_rows = Column(Integer, default=0, server_default="0", nullable=False)
+    total_new = Column(Integer, default=0, server_default="0", nullable=False)
+    processed = Column(Integer, default=0, server_default="0", nullable=False)
+    result = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,188 @@
+"""
+提醒摘要分发
+- 同一收件人的提醒合并为一封摘要（按截止时间排序），网络调用次数等于收件人数而非分配数
+- Dispatcher 以 asyncio 信号量限制并发，失败按指数退避重试；以 (收件人, 分配集合) 为键去重，
+  同一进程内重复提交的摘要不会再次发送
+- 接收端（sink）可替换：FileSink 追加写 JSON Lines，离线可用（默认）；SMTPSink 经标准库 smtplib 发送，
+  可指向本地的 SMTP 调试服务器
+- deliver() 供提醒引擎（reminders.py）调用，返回发送失败的提醒，由引擎稍后重试
+
+配置：FEEDBACK_NOTIFY_SINK=file|smtp，FEEDBACK_NOTIFY_FILE，FEEDBACK_SMTP_HOST / FEEDBACK_SMTP_PORT /
+FEEDBACK_SMTP_FROM / FEEDBACK_MAIL_DOMAIN，FEEDBACK_NOTIFY_CONCURRENCY
+"""
+import asyncio
+import hashlib
+import json
+import os
+import smtplib
+import time
+from collections import OrderedDict
+from email.message import EmailMessage
+try:
+    from .database import BASE_DIR
+except (ImportError, ValueError):
+    from database import BASE_DIR
+
+CONCURRENCY = int(os.environ.get("FEEDBACK_NOTIFY_CONCURRENCY", 20))
+RETRIES = 3
+BACKOFF_SECONDS = 0.5
+DEDUPE_KEYS = 100000  # 去重记录的上限，超出后淘汰最早的
+
+
+class Digest:
+    def __init__(self, user_id, username, name, reminders):
+        self.user_id = user_id
+        self.username = username
+        self.name = name
+        self.reminders = reminders
+
+    @property
+    def key(self):
+        ids = ",".join(str(r["item_user_id"]) for r in sorted(self.reminders, key=lambda r: r["item_user_id"]))
+        return hashlib.sha1(f"{self.user_id}:{ids}".encode()).hexdigest()
+
+    def subject(self):
+        return f"您有 {len(self.reminders)} 个事项即将截止，尚未反馈"
+
+    def body(self):
+        lines = [f"{self.name or self.username}，您好：", ""]
+        lines += [f"- {r.get('title') or r['item_id']}（截止 {r['deadline']}）" for r in self.reminders]
+        return "\n".join(lines)
+
+
+def build_digests(reminders):
+    """按收件人合并提醒；同一分配重复出现时只保留一次"""
+    by_user = {}
+    seen = set()
+    for r in reminders:
+        if r["item_user_id"] in seen:
+            continue
+        seen.add(r["item_user_id"])
+        by_user.setdefault(r["user_id"], []).append(r)
+    return [
+        Digest(user_id, rows[0].get("username"), rows[0].get("name"), sorted(rows, key=lambda r: r["deadline"]))
+        for user_id, rows in by_user.items()
+    ]
+
+
+class FileSink:
+    """每封摘要一行 JSON；写入在事件循环线程内完成，单次追加不会交错"""
+
+    def __init__(self, path):
+        self.path = path
+
+    async def send(self, digest):
+        record = {"user_id": digest.user_id, "username": digest.username, "subject": digest.subject(),
+                  "items": [{"item_id": r["item_id"], "title": r.get("title"), "deadline": str(r["deadline"])}
+                            for r in digest.reminders]}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class SMTPSink:
+    def __init__(self, host="localhost", port=25, sender="noreply@localhost", domain="localhost", timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.domain = domain
+        self.timeout = timeout
+
+    def _send(self, digest):
+        msg = EmailMessage()
+        msg["From"] = self.sender
+        msg["To"] = f"{digest.username}@{self.domain}"
+        msg["Subject"] = digest.subject()
+        msg.set_content(digest.body())
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(msg)
+
+    async def send(self, digest):
+        # smtplib 是阻塞的，放到线程中执行；并发由 Dispatcher 的信号量控制
+        await asyncio.to_thread(self._send, digest)
+
+
+class Dispatcher:
+    def __init__(self, sink, concurrency=CONCURRENCY, retries=RETRIES, backoff=BACKOFF_SECONDS):
+        self.sink = sink
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.sent_keys = OrderedDict()
+
+    async def _send_one(self, digest, semaphore, stats):
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                try:
+                    await self.sink.send(digest)
+                    return True
+                except Exception as exc:
+                    stats["last_error"] = repr(exc)
+            if attempt < self.retries:
+                stats["retries"] += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        return False
+
+    async def dispatch(self, digests):
+        """
+        发送摘要，返回统计：sent / failed / deduped / retries / seconds / digests_per_sec，
+        failed_digests 为最终失败的摘要
+        """
+        stats = {"sent": 0, "failed": 0, "deduped": 0, "retries": 0, "reminders": 0}
+        pending = []
+        for d in digests:
+            if d.key in self.sent_keys:
+                stats["deduped"] += 1
+            else:
+                self.sent_keys[d.key] = None
+                pending.append(d)
+        while len(self.sent_keys) > DEDUPE_KEYS:
+            self.sent_keys.popitem(last=False)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._send_one(d, semaphore, stats) for d in pending))
+        stats["seconds"] = time.perf_counter() - start
+        failed = [d for d, ok in zip(pending, results) if not ok]
+        # 失败的摘要允许之后重新提交
+        for d in failed:
+            self.sent_keys.pop(d.key, None)
+        stats["sent"] = len(pending) - len(failed)
+        stats["failed"] = len(failed)
+        stats["reminders"] = sum(len(d.reminders) for d, ok in zip(pending, results) if ok)
+        stats["digests_per_sec"] = stats["sent"] / stats["seconds"] if stats["seconds"] else 0.0
+        stats["failed_digests"] = failed
+        return stats
+
+    def dispatch_sync(self, digests):
+        """供调度线程（无事件循环）调用"""
+        return asyncio.run(self.dispatch(digests))
+
+
+def sink_from_env():
+    kind = os.environ.get("FEEDBACK_NOTIFY_SINK", "file")
+    if kind == "smtp":
+        return SMTPSink(
+            host=os.environ.get("FEEDBACK_SMTP_HOST", "localhost"),
+            port=int(os.environ.get("FEEDBACK_SMTP_PORT", 25)),
+            sender=os.environ.get("FEEDBACK_SMTP_FROM", "noreply@localhost"),
+            domain=os.environ.get("FEEDBACK_MAIL_DOMAIN", "localhost"),
+        )
+    if kind == "file":
+        return FileSink(os.environ.get("FEEDBACK_NOTIFY_FILE", os.path.join(BASE_DIR, "notifications.jsonl")))
+    raise ValueError(f"Unknown notification sink: {kind}")
+
+
+_dispatcher = None
+
+
+def deliver(reminders):
+    """
+    提醒引擎的分发回调：合并为摘要并发送，返回发送失败的提醒
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = Dispatcher(sink_from_env())
+    stats = _dispatcher.dispatch_sync(build_digests(reminders))
+    if stats["sent"] or stats["failed"]:
+        print(f"提醒摘要: 发送 {stats['sent']} 封（{stats['reminders']} 条提醒），失败 {stats['failed']} 封，"
+              f"重试 {stats['retries']} 次，耗时 {stats['seconds']:.2f}s")
+    return [r for d in stats["failed_digests"] for r in d.reminders]
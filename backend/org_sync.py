@@ -0,0 +1,97 @@
+"""
+组织分组同步：按 User.group（部门）维护同名的组织分组 (is_org) 及其成员
+整个同步是固定的几条集合语句，在调用方的一个事务内完成，语句数与用户数、部门数无关：
+1. INSERT ... SELECT 为尚无组织分组的部门创建分组
+2. DELETE 移出部门已变更的成员
+3. INSERT ... SELECT 加入新成员
+只改动有差异的 group_users 行；名称不对应任何现有部门的组织分组保持不变。
+
+sync_if_changed() 借助用户目录版本（directory.py）跳过无变化的同步，供调度任务定期执行。
+"""
+from datetime import datetime, timezone
+from sqlalchemy import select, insert, delete, func, exists, and_
+try:
+    from . import models
+    from .directory import directory_version
+except (ImportError, ValueError):
+    import models
+    from directory import directory_version
+
+SYNCED_VERSION_KEY = "org_sync_version"
+
+
+def _departments():
+    user = models.User
+    return select(user.group).where(user.group.is_not(None), user.group != "").distinct()
+
+
+def _managed_groups():
+    # 每个现有部门对应的组织分组（同名多个时取最早创建的一个）
+    # 用子查询而非 CTE：以 WITH 开头的语句 sqlite3 驱动不会报告 rowcount
+    group = models.Group
+    return select(group.name.label("name"), func.min(group.id).label("id"))\
+        .where(group.is_org.is_(True), group.name.in_(_departments()))\
+        .group_by(group.name).subquery("managed")
+
+
+def sync_org_groups(db):
+    """
+    执行一次同步，返回变更报告；不负责提交
+    """
+    user, group, gu = models.User, models.Group, models.group_users
+    now = datetime.now(timezone.utc)
+
+    missing = select(user.group).where(
+        user.group.is_not(None), user.group != "",
+        ~exists().where(group.is_org.is_(True), group.name == user.group),
+    ).distinct().order_by(user.group)
+    created_names = list(db.execute(missing).scalars())
+    if created_names:
+        db.execute(insert(group.__table__), [{"name": n, "is_org": True, "created_at": now} for n in created_names])
+
+    managed = _managed_groups()
+    # 成员的部门已不是分组名称：按主键逐行核对 users / groups
+    removed = db.execute(
+        delete(gu).where(
+            gu.c.group_id.in_(select(managed.c.id)),
+            ~exists().where(user.id == gu.c.user_id, group.id == gu.c.group_id, user.group == group.name),
+        )
+    ).rowcount
+
+    managed = _managed_groups()
+    added = db.execute(
+        insert(gu).from_select(
+            ["group_id", "user_id"],
+            select(managed.c.id, user.id).join(user, user.group == managed.c.name).where(
+                ~exists().where(and_(gu.c.group_id == managed.c.id, gu.c.user_id == user.id))
+            ),
+        )
+    ).rowcount
+
+    total = db.execute(select(func.count(group.id)).where(group.is_org.is_(True))).scalar()
+    return {
+        "created": len(created_names),
+        "created_groups": created_names,
+        "members_added": added,
+        "members_removed": removed,
+        "total_org_groups": total,
+    }
+
+
+def sync_if_changed(db):
+    """
+    用户目录版本自上次同步后未变化时跳过；返回报告或 None。不负责提交
+    """
+    version = directory_version(db)
+    synced = db.get(models.AppMeta, SYNCED_VERSION_KEY)
+    if synced is not None and synced.value == version:
+        return None
+    report = sync_org_groups(db)
+    # 同步本身写 group_users 会再次递增目录版本，记录同步后的版本
+    db.flush()
+    version = directory_version(db)
+    if synced is None:
+        db.add(models.AppMeta(key=SYNCED_VERSION_KEY, value=version))
+    else:
+        synced.value = version
+    return report
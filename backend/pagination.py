@@ -0,0 +1,65 @@
+"""
+游标（Keyset）分页工具
+游标是对 {排序键, 方向, 最后一行的排序值, 最后一行 id} 的 base64url 编码，对客户端不透明。
+按 (排序列, id) 做范围条件而非 OFFSET，任意页的代价都与第一页相同。
+"""
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+def encode_cursor(payload: dict) -> str:
+    def default(o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        raise TypeError(type(o))
+    raw = json.dumps(payload, default=default, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(payload, dict):
+            raise ValueError
+        return payload
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query, column, id_column, descending, after, size):
+    """
+    在已按 (column, id) 同向排序的 query 上取 after 之后的 size 行
+    after 为 None 表示第一页，否则为上一页最后一行的 (排序值, id)
+    非 NULL 部分使用行值比较 (column, id) < (?, ?)，可直接走索引范围查找；
+    SQLite 中 NULL 在升序时排最前、降序时排最后，跨越 NULL 边界时再补一次查询
+    """
+    if after is None:
+        return query.limit(size).all()
+    value, last_id = after
+    nulls = query.filter(column.is_(None))
+    if descending:
+        if value is None:
+            return nulls.filter(id_column < last_id).limit(size).all()
+        rows = query.filter(tuple_(column, id_column) < (value, last_id)).limit(size).all()
+        if len(rows) < size:
+            rows += nulls.limit(size - len(rows)).all()
+        return rows
+    if value is None:
+        rows = nulls.filter(id_column > last_id).limit(size).all()
+        if len(rows) < size:
+            rows += query.filter(column.is_not(None)).limit(size - len(rows)).all()
+        return rows
+    return query.filter(tuple_(column, id_column) > (value, last_id)).limit(size).all()
@@ -0,0 +1,244 @@
+"""
+截止提醒引擎（取代每小时全量扫描的 check_pending_feedback）
+- 提醒台账 reminders：每个分配每种提醒至多一条（唯一约束），已提醒过的分配不会再次提醒
+- 时间轮：事项按提醒时刻（截止时间 - LEAD）放入分钟级槽位，每个 tick 只取出到点的槽位，
+  提醒在到点后一个 tick 内发出，而不是每小时统一发一次
+- 水位线（app_meta）：reminder_fired_until 为已处理到的提醒时刻，reminder_item_id 为已装载过的最大事项 ID；
+  每次运行只按 items.deadline 索引读取新进入前瞻窗口的事项、按主键读取新建的事项，
+  开销随新增工作量增长，与积压的待反馈总量无关
+- 时间轮只在内存中，进程重启后从 reminder_fired_until 重新装载，未发出的提醒不会丢失
+- run() 先提交台账与水位线，提交之后才调用 dispatch 回调（默认 notifications.deliver，可能包含网络 I/O 与重试退避），
+  写事务不跨越网络调用，提交失败也不会已经发出提醒；回调返回发送失败的提醒，
+  在新的短事务中删除其台账记录并登记到 reminder_reschedules（retry_at = 失败时刻 + RETRY_DELAY），
+  到点后重新装入时间轮；重试登记在库中，重试前进程重启或调度主节点切换也会重发
+
+分配只在创建事项时写入；截止时间可由 PUT /api/items/{id} 修改，修改时 reschedule() 在同一事务内登记到
+reminder_reschedules，引擎下一个 tick 按新的截止时间重新装入时间轮（提前到已处理过的窗口内也不会漏发），
+时间轮中按旧截止时间留下的条目到点时按当前截止时间过滤（推迟后不会提前提醒）。
+截止时间已过的事项不再发截止前提醒。
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func, exists, delete, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+try:
+    from . import models
+    from .meta import get_meta, set_meta, to_epoch, from_epoch
+except (ImportError, ValueError):
+    import models
+    from meta import get_meta, set_meta, to_epoch, from_epoch
+
+LEAD = timedelta(hours=float(os.environ.get("FEEDBACK_REMINDER_LEAD_HOURS", 24)))
+TICK_SECONDS = 60
+LOOKAHEAD = timedelta(hours=1)
+RETRY_DELAY = timedelta(minutes=5)
+KIND_DUE_SOON = "due_soon"
+FIRED_KEY = "reminder_fired_until"
+ITEM_KEY = "reminder_item_id"
+
+
+class TimingWheel:
+    """
+    单层哈希时间轮：len(slots) 个槽位，每槽 tick_seconds 秒；条目记录所属 tick，超过一圈的条目留在槽中等下一圈
+    """
+
+    def __init__(self, tick_seconds=TICK_SECONDS, slots=64):
+        self.tick_seconds = tick_seconds
+        self.slots = [[] for _ in range(slots)]
+        self.current = None  # 最近一次 advance 到的 tick
+        self.size = 0
+
+    def add(self, when, value):
+        tick = to_epoch(when) // self.tick_seconds
+        if self.current is not None and tick < self.current:
+            # 已过期的条目放入当前槽位，下一次 advance 立即取出
+            tick = self.current
+        self.slots[tick % len(self.slots)].append((tick, when, value))
+        self.size += 1
+
+    def advance(self, now):
+        """取出所属 tick 不晚于 now 的全部条目，按时刻排序"""
+        target = to_epoch(now) // self.tick_seconds
+        n = len(self.slots)
+        if self.current is None or target - self.current >= n:
+            ticks = range(n)
+        else:
+            ticks = range(max(self.current, target - n + 1), target + 1)
+        due = []
+        for tick in ticks:
+            slot = self.slots[tick % n]
+            if slot:
+                due += [e for e in slot if e[0] <= target]
+                self.slots[tick % n] = [e for e in slot if e[0] > target]
+        self.current = target if self.current is None else max(self.current, target)
+        self.size -= len(due)
+        due.sort(key=lambda e: e[1])
+        return [(when, value) for _, when, value in due]
+
+
+def reschedule(db, item_id, old_deadline, new_deadline):
+    """
+    事项截止时间修改后调用（与修改在同一事务内）：登记到 reminder_reschedules 供引擎重新装载；
+    推迟时删除该事项已发出的提醒台账，按新的截止时间再提醒一次
+    """
+    if new_deadline > old_deadline:
+        db.execute(delete(models.Reminder).where(
+            models.Reminder.item_id == item_id, models.Reminder.kind == KIND_DUE_SOON,
+        ))
+    # 覆盖待重发的登记：按新的截止时间在下一个 tick 装载
+    db.execute(
+        sqlite_insert(models.ReminderReschedule.__table__).values(item_id=item_id, retry_at=None)
+        .on_conflict_do_update(index_elements=["item_id"], set_={"retry_at": None})
+    )
+
+
+def print_reminders(reminders):
+    for r in reminders:
+        print(f"提醒: 用户 {r['user_id']} 在事项 {r['item_id']} 截止前未反馈（截止 {r['deadline']}）")
+
+
+class ReminderEngine:
+    def __init__(self, dispatch=print_reminders, lead=LEAD, lookahead=LOOKAHEAD, tick_seconds=TICK_SECONDS):
+        self.dispatch = dispatch
+        self.lead = lead
+        self.lookahead = lookahead
+        self.tick_seconds = tick_seconds
+        self.reset()
+
+    def reset(self):
+        """丢弃内存中的时间轮，下次运行从持久化的水位线重新装载（事务失败后调用）"""
+        slots = int(self.lookahead.total_seconds() // self.tick_seconds) + 2
+        self.wheel = TimingWheel(self.tick_seconds, slots)
+        self.loaded_until = None  # 已装入时间轮的提醒时刻上限
+        self.item_watermark = 0
+
+    def _refill(self, db, now):
+        item = models.Item
+        if self.loaded_until is None:
+            fired = get_meta(db, FIRED_KEY)
+            # 首次部署从 now - LEAD 开始，截止时间在 LEAD 以内的现有事项也会提醒一次
+            self.loaded_until = from_epoch(fired) if fired else now - self.lead
+            self.item_watermark = get_meta(db, ITEM_KEY) or 0
+        max_id = db.execute(select(func.max(item.id))).scalar() or 0
+        loaded_deadline = self.loaded_until + self.lead
+
+        # 装载之后新建、提醒时刻已落入已装载范围的事项（主键范围扫描）
+        if max_id > self.item_watermark:
+            for item_id, deadline in db.execute(
+                select(item.id, item.deadline).where(
+                    item.id > self.item_watermark, item.id <= max_id,
+                    item.deadline > now, item.deadline <= loaded_deadline,
+                )
+            ):
+                self.wheel.add(deadline - self.lead, item_id)
+
+        # 新进入前瞻窗口的事项（items.deadline 索引范围扫描）
+        until = now + self.lookahead
+        if until > self.loaded_until:
+            for item_id, deadline in db.execute(
+                select(item.id, item.deadline).where(
+                    item.deadline > max(loaded_deadline, now), item.deadline <= until + self.lead,
+                    item.id <= max_id,
+                )
+            ):
+                self.wheel.add(deadline - self.lead, item_id)
+            self.loaded_until = until
+        self.item_watermark = max_id
+
+        # 截止时间被修改、发送失败到了重试时刻的事项：提醒时刻已在装载范围内的重新放入时间轮，
+        # 其余由前瞻窗口扫描装载
+        rr = models.ReminderReschedule
+        rescheduled = db.execute(
+            select(item.id, item.deadline)
+            .join(rr, rr.item_id == item.id)
+            .where(or_(rr.retry_at.is_(None), rr.retry_at <= now))
+        ).all()
+        if rescheduled:
+            db.execute(delete(models.ReminderReschedule).where(
+                models.ReminderReschedule.item_id.in_([item_id for item_id, _ in rescheduled])
+            ))
+            for item_id, deadline in rescheduled:
+                if now < deadline.replace(tzinfo=timezone.utc) <= self.loaded_until + self.lead:
+                    self.wheel.add(deadline - self.lead, item_id)
+
+    def _fire(self, db, item_ids, now):
+        iu, item, user, reminder = models.ItemUser, models.Item, models.User, models.Reminder
+        rows = db.execute(
+            select(iu.id, iu.item_id, iu.user_id, item.deadline, item.title, user.username, user.name)
+            .join(item, item.id == iu.item_id)
+            .join(user, user.id == iu.user_id)
+            .where(
+                iu.item_id.in_(item_ids), iu.feedback_status == "pending",
+                # 按当前截止时间判断是否到点：截止时间推迟后，时间轮中的旧条目不会提前提醒
+                item.deadline <= now + self.lead,
+                ~exists().where(reminder.item_user_id == iu.id, reminder.kind == KIND_DUE_SOON),
+            )
+            .order_by(item.deadline, iu.id)
+        ).all()
+        if not rows:
+            return []
+        db.execute(
+            sqlite_insert(reminder.__table__).on_conflict_do_nothing(),
+            [{"item_user_id": r.id, "item_id": r.item_id, "user_id": r.user_id, "kind": KIND_DUE_SOON,
+              "due_at": r.deadline - self.lead, "sent_at": now} for r in rows],
+        )
+        return [{"item_user_id": r.id, "item_id": r.item_id, "user_id": r.user_id, "deadline": r.deadline,
+                 "title": r.title, "username": r.username, "name": r.name} for r in rows]
+
+    def collect(self, db, now=None):
+        """
+        处理到 now 为止到点的提醒：写入台账、推进水位线，返回到点的提醒；不分发，不负责提交
+        """
+        now = now or datetime.now(timezone.utc)
+        self._refill(db, now)
+        due = self.wheel.advance(now)
+        reminders = self._fire(db, sorted({item_id for _, item_id in due}), now) if due else []
+        set_meta(db, FIRED_KEY, to_epoch(now))
+        set_meta(db, ITEM_KEY, self.item_watermark)
+        return reminders
+
+    def _commit(self, db):
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            # 内存中的时间轮可能已与库中状态不一致，从持久化的水位线重新装载
+            self.reset()
+            raise
+
+    def run(self, db, now=None):
+        """
+        一个 tick，负责提交：collect() 的台账与水位线先提交，再分发，失败的在新的短事务中安排重试
+        返回成功发出的提醒。提交之后、分发之前进程退出时，这一批提醒不会重发（至多一次）
+        """
+        now = now or datetime.now(timezone.utc)
+        try:
+            sent = self.collect(db, now)
+        except Exception:
+            db.rollback()
+            self.reset()
+            raise
+        self._commit(db)
+        if not sent:
+            return sent
+        try:
+            failed = self.dispatch(sent) or []
+        except Exception as exc:
+            print(f"提醒分发失败: {exc!r}")
+            failed = sent
+        if failed:
+            self._retry_later(db, failed, now)
+            self._commit(db)
+            failed_ids = {r["item_user_id"] for r in failed}
+            sent = [r for r in sent if r["item_user_id"] not in failed_ids]
+        return sent
+
+    def _retry_later(self, db, failed, now):
+        reminder = models.Reminder
+        db.execute(delete(reminder).where(
+            reminder.item_user_id.in_([r["item_user_id"] for r in failed]), reminder.kind == KIND_DUE_SOON,
+        ))
+        db.execute(
+            sqlite_insert(models.ReminderReschedule.__table__).on_conflict_do_nothing(),
+            [{"item_id": item_id, "retry_at": now + RETRY_DELAY} for item_id in sorted({r["item_id"] for r in failed})],
+        )
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timezone
 try:
     from .. import models, schemas
     from ..database import get_db
+    from ..counters import DONE_STATUSES, OPEN_STATUSES, OVERDUE_STATUS, mark_assignment_done
+    from .. import stats
+    from ..pagination import encode_cursor, decode_cursor, parse_datetime, keyset_page
+    from ..feedback_writer import submit_feedbacks
+    from ..write_queue import get_feedback_queue, QueueFull, CommitTimeout
 except (ImportError, ValueError):
     import models, schemas
     from database import get_db
+    from counters import DONE_STATUSES, OPEN_STATUSES, OVERDUE_STATUS, mark_assignment_done
+    import stats
+    from pagination import encode_cursor, decode_cursor, parse_datetime, keyset_page
+    from feedback_writer import submit_feedbacks
+    from write_queue import get_feedback_queue, QueueFull, CommitTimeout
 
 router = APIRouter()
 
@@ -24,38 +34,107 @@ def create_feedback(feedback: schemas.FeedbackCreate, db: Session = Depends(get_
     1. 创建 Feedback 记录
     2. 更新 ItemUser 状态为 'done'
     3. [自动完成检测]: 检查该事项下是否所有 Assigned Users 都已反馈，若是，则将 Item.status 更新为 'finished'
+       通过事项上的 done_count / assigned_count 计数比较完成，无需加载全部分配
+    开启组提交 (FEEDBACK_GROUP_COMMIT=1) 时交由写入队列与并发请求合并为一个事务提交
     """
+    commit_queue = get_feedback_queue()
+    if commit_queue is not None:
+        try:
+            result = commit_queue.submit(feedback)
+        except QueueFull:
+            raise HTTPException(status_code=503, detail="反馈提交繁忙，请稍后重试", headers={"Retry-After": "1"})
+        except CommitTimeout:
+            raise HTTPException(status_code=503, detail="反馈提交超时，请刷新后确认是否已提交")
+        if result["status"] == "not_found":
+            raise HTTPException(status_code=404, detail="Item user not found")
+        return result["feedback"]
+
+    # 与组提交路径一致：分配不存在时返回 404，不写入孤立的反馈
+    item_user = db.query(models.ItemUser).filter(models.ItemUser.id == feedback.item_user_id).first()
+    if not item_user:
+        raise HTTPException(status_code=404, detail="Item user not found")
     db_feedback = models.Feedback(**feedback.model_dump())
     db.add(db_feedback)
     # 更新 ItemUser 状态
-    item_user = db.query(models.ItemUser).filter(models.ItemUser.id == feedback.item_user_id).first()
-    if item_user:
-        item_user.feedback_status = "done"
-        item_user.last_feedback_time = datetime.now(timezone.utc)
-        
-        # Check if all users have finished feedback for this item
-        item_id = item_user.item_id
-        all_item_users = db.query(models.ItemUser).filter(models.ItemUser.item_id == item_id).all()
-        if all(u.feedback_status == "done" for u in all_item_users):
-            item = db.query(models.Item).filter(models.Item.id == item_id).first()
-            if item:
-                item.status = "finished"
+    now = datetime.now(timezone.utc)
+    # 重复提交（已反馈过）不再计数
+    newly_done = item_user.feedback_status not in DONE_STATUSES
+    if newly_done:
+        mark_assignment_done(db, item_user.item_id, item_user.feedback_status == OVERDUE_STATUS)
+    stats.record_feedback(db, item_user.id, newly_done)
+    item_user.feedback_status = "done"
+    item_user.last_feedback_time = now
 
     db.commit()
     db.refresh(db_feedback)
     return db_feedback
 
+@router.post("/feedbacks/bulk", response_model=schemas.FeedbackBulkResponse)
+def create_feedbacks_bulk(payload: schemas.FeedbackBulkCreate, db: Session = Depends(get_db)):
+    """
+    批量提交反馈（如组长代多名参与人提交）
+    所有条目在一个事务内写入：Feedback 一次 executemany 插入，ItemUser 状态按集合更新，
+    每个受影响事项只做一次计数更新与自动完成检测。返回逐条结果，不存在的 item_user_id 标记为 not_found。
+    """
+    results = submit_feedbacks(db, payload.entries)
+    db.commit()
+    return {"created": sum(r["status"] == "created" for r in results), "results": results}
+
+# 待办列表直接投影的列（与 schemas.TodoItem 字段一一对应）
+TODO_COLUMNS = [
+    models.ItemUser.id.label("item_user_id"),
+    models.Item.id,
+    models.Item.title,
+    models.Item.description,
+    models.Item.must_feedback,
+    models.Item.deadline,
+    models.Item.status,
+    models.Item.creator_id,
+    models.Item.created_at,
+    models.Item.assigned_count,
+    models.Item.done_count,
+    models.Item.overdue_count,
+    models.ItemUser.feedback_status,
+]
+
 @router.get("/todos", response_model=List[schemas.TodoItem])
-def get_todos(user_id: int, db: Session = Depends(get_db)):
-    # 获取待办事项并附带 item_user_id
-    item_users = db.query(models.ItemUser).filter(models.ItemUser.user_id == user_id, models.ItemUser.feedback_status=="pending").all()
-    results = []
-    for iu in item_users:
-        item = db.query(models.Item).filter(models.Item.id == iu.item_id).first()
-        if item:
-            # 转换为 TodoItem，并注入 item_user_id
-            todo_data = schemas.Item.model_validate(item).model_dump()
-            todo_data["item_user_id"] = iu.id
-            todo = schemas.TodoItem(**todo_data)
-            results.append(todo)
-    return results
+def get_todos(
+    user_id: int,
+    response: Response,
+    status: Optional[str] = None,
+    due_before: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    获取待办事项并附带 item_user_id
+    - 单条 JOIN 查询直接投影为响应结构，按截止时间升序
+    - status: 分配状态（pending / overdue / done），默认返回全部待反馈（pending 与已逾期的 overdue）；due_before: 只返回截止时间早于该时间的待办（YYYY-MM-DD 或 ISO 时间）
+    - 传 limit 启用游标分页，下一页游标通过响应头 X-Next-Cursor 返回
+    """
+    query = db.query(*TODO_COLUMNS)\
+        .join(models.Item, models.Item.id == models.ItemUser.item_id)\
+        .filter(models.ItemUser.user_id == user_id,
+                models.ItemUser.feedback_status.in_([status] if status else OPEN_STATUSES))
+    if due_before:
+        try:
+            query = query.filter(models.Item.deadline < datetime.fromisoformat(due_before))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid due_before")
+    query = query.order_by(models.Item.deadline.asc(), models.ItemUser.id.asc())
+    if limit is None:
+        return [row._asdict() for row in query.all()]
+
+    after = None
+    if cursor:
+        state = decode_cursor(cursor)
+        if "id" not in state:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (parse_datetime(state.get("value")), state["id"])
+    rows = keyset_page(query, models.Item.deadline, models.ItemUser.id, False, after, limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor({"value": last.deadline, "id": last.item_user_id})
+    return [row._asdict() for row in rows]
@@ -1,118 +1,124 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from typing import List
-import csv
-import io
+import json
 try:
     from ..database import get_db
-    from .. import models, schemas
-    from ..auth import get_password_hash
+    from .. import models, schemas, membership, org_sync, user_import
 except (ImportError, ValueError):
     from database import get_db
-    import models, schemas
-    from auth import get_password_hash
+    import models, schemas, membership, org_sync, user_import
 
 router = APIRouter(tags=["groups"])
 
 @router.post("/groups/sync_org")
 def sync_org_groups(db: Session = Depends(get_db)):
-    names = [n for (n,) in db.query(models.User.group).distinct().all() if n]
-    created = 0
-    for name in names:
-        g = db.query(models.Group).filter(models.Group.name == name).first()
-        if not g:
-            g = models.Group(name=name, is_org=True)
-            db.add(g)
-            db.flush()
-            created += 1
-        users = db.query(models.User).filter(models.User.group == name).all()
-        g.users = users
+    """
+    按用户部门同步组织分组：集合语句计算成员差异，一个事务内只写有变化的行（见 org_sync.py）
+    返回 created / total_org_groups 以及新增分组名、加入与移出的成员数
+    """
+    report = org_sync.sync_org_groups(db)
     db.commit()
-    return {"created": created, "total_org_groups": db.query(models.Group).filter(models.Group.is_org == True).count()}
+    return report
 
 @router.post("/groups/import")
 async def import_groups(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     owner_id: int = None,
+    background: bool = False,
     db: Session = Depends(get_db)
 ):
+    """
+    从 CSV 导入用户并按 group 列归入组织分组（分组不存在时创建）
+    - 预取已存在用户名、并行计算密码哈希、批量写入，见 user_import.py
+    - background=true 时立即返回 job_id，通过 GET /api/import_jobs/{job_id} 查询进度
+    """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
     
     content = await file.read()
-    decoded = content.decode('utf-8-sig')
-    reader = csv.DictReader(io.StringIO(decoded))
-    
-    stats = {"groups_created": 0, "users_created": 0, "rows_processed": 0}
-    
-    # 辅助缓存
-    group_cache = {} # name -> model
-    
-    for row in reader:
-        stats["rows_processed"] += 1
-        username = row.get('username')
-        user_name = row.get('name', username)
-        password = row.get('password', 'admin') # 默认密码改为 admin
-        role = row.get('role', 'feedbacker')
-        group_name = row.get('group') or row.get('group_name')
-        
-        if not username or not group_name:
-            continue
-            
-        # 1. 获取或创建分组
-        if group_name not in group_cache:
-            db_group = db.query(models.Group).filter(models.Group.name == group_name).first()
-            if not db_group:
-                db_group = models.Group(
-                    name=group_name,
-                    is_org=True,
-                    owner_id=owner_id
-                )
-                db.add(db_group)
-                db.flush()
-                stats["groups_created"] += 1
-            group_cache[group_name] = db_group
-        else:
-            db_group = group_cache[group_name]
-            
-        # 2. 获取或创建用户
-        db_user = db.query(models.User).filter(models.User.username == username).first()
-        if not db_user:
-            db_user = models.User(
-                username=username,
-                name=user_name,
-                password_hash=get_password_hash(password),
-                role=role,
-                group=group_name
-            )
-            db.add(db_user)
-            db.flush()
-            stats["users_created"] += 1
-            
-        # 3. 关联用户到分组
-        if db_user not in db_group.users:
-            db_group.users.append(db_user)
-            
+    rows = user_import.parse_csv(content.decode('utf-8-sig'), default_password="admin") # 默认密码改为 admin
+    if background:
+        job = user_import.create_job(db, len(rows))
+        session_factory = sessionmaker(bind=db.get_bind())
+        background_tasks.add_task(user_import.run_job, session_factory, job.id, rows, owner_id, True)
+        return {"job_id": job.id, "status": job.status}
+
+    report = await run_in_threadpool(user_import.import_users, db, rows, owner_id, True)
     db.commit()
-    return stats
+    return report
+
+@router.get("/import_jobs/{job_id}")
+def get_import_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.get(models.ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "phase": job.phase,
+        "total_rows": job.total_rows,
+        "total_new": job.total_new,
+        "processed": job.processed,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+    }
+
+GROUP_COLUMNS = [
+    models.Group.id, models.Group.name, models.Group.description,
+    models.Group.is_org, models.Group.owner_id, models.Group.created_at,
+]
 
 @router.get("/groups", response_model=List[schemas.Group])
-def get_groups(user_id: int, role: str, db: Session = Depends(get_db)):
-    if role == "admin":
-        groups = db.query(models.Group).all()
-    else:
+def get_groups(user_id: int, role: str, members: str = "ids", db: Session = Depends(get_db)):
+    """
+    分组列表：分组一条查询、成员一条查询（不再逐组懒加载 g.users）
+    - members=ids（默认）返回 user_ids 与 member_count；members=count 只返回 member_count，user_ids 为空
+    """
+    if members not in ("ids", "count"):
+        raise HTTPException(status_code=400, detail="members 仅支持 ids 或 count")
+    query = db.query(*GROUP_COLUMNS)
+    if role != "admin":
         # 职员可以看到公开组（is_org=True）和自己拥有的组
-        groups = db.query(models.Group).filter(
-            (models.Group.is_org == True) | (models.Group.owner_id == user_id)
-        ).all()
-    
-    # 填充 user_ids
-    result = []
+        query = query.filter((models.Group.is_org == True) | (models.Group.owner_id == user_id))
+    groups = [row._asdict() for row in query.order_by(models.Group.id).all()]
+    visible = query.with_entities(models.Group.id).subquery()
+    gu = models.group_users
+
+    if members == "count":
+        counts = dict(db.query(gu.c.group_id, func.count())
+                      .filter(gu.c.group_id.in_(select(visible.c.id)))
+                      .group_by(gu.c.group_id).all())
+        for g in groups:
+            g["user_ids"] = []
+            g["member_count"] = counts.get(g["id"], 0)
+        return groups
+
+    member_ids = {}
+    for group_id, member_id in db.query(gu.c.group_id, gu.c.user_id)\
+            .filter(gu.c.group_id.in_(select(visible.c.id)))\
+            .order_by(gu.c.group_id, gu.c.user_id):
+        member_ids.setdefault(group_id, []).append(member_id)
     for g in groups:
-        g_data = schemas.Group.model_validate(g)
-        g_data.user_ids = [u.id for u in g.users]
-        result.append(g_data)
-    return result
+        g["user_ids"] = member_ids.get(g["id"], [])
+        g["member_count"] = len(g["user_ids"])
+    return groups
+
+@router.post("/groups/resolve", response_model=schemas.GroupSelectionResult)
+def resolve_selection(selection: schemas.GroupSelection, db: Session = Depends(get_db)):
+    """
+    解析参与人选择：在服务端成员位图索引上完成并、交、差，返回去重后的用户 ID（升序）与人数
+    - count_only=true 时只返回人数
+    """
+    index = membership.get_index(db)
+    bits = index.resolve(**selection.model_dump(exclude={"count_only"}))
+    if selection.count_only:
+        return {"count": bits.bit_count()}
+    user_ids = membership.from_bitmap(bits)
+    return {"user_ids": user_ids, "count": len(user_ids)}
 
 @router.post("/groups", response_model=schemas.Group)
 def create_group(group: schemas.GroupCreate, owner_id: int, role: str, db: Session = Depends(get_db)):
@@ -137,6 +143,7 @@ def create_group(group: schemas.GroupCreate, owner_id: int, role: str, db: Sessi
     
     res = schemas.Group.model_validate(db_group)
     res.user_ids = [u.id for u in db_group.users]
+    res.member_count = len(res.user_ids)
     return res
 
 @router.put("/groups/{group_id}", response_model=schemas.Group)
@@ -162,6 +169,7 @@ def update_group(group_id: int, group: schemas.GroupUpdate, user_id: int, role:
     
     res = schemas.Group.model_validate(db_group)
     res.user_ids = [u.id for u in db_group.users]
+    res.member_count = len(res.user_ids)
     return res
 
 @router.delete("/groups/{group_id}")
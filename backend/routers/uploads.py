@@ -0,0 +1,227 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timezone
+from mimetypes import guess_type
+import os
+import re
+import stat
+import uuid
+try:
+    from .. import attachments, models, schemas
+    from ..database import get_db
+except (ImportError, ValueError):
+    import attachments, models, schemas
+    from database import get_db
+
+router = APIRouter()
+# 仅含附件下载，另以无前缀方式挂载以兼容旧的 /uploads/... 链接（分块上传等接口只在 /api 下提供）
+download_router = APIRouter()
+
+# 内容寻址文件：<哈希前两位>/<sha256><扩展名>，内容永不改变
+HASHED_PATH_RE = re.compile(r"^([0-9a-f]{2})/(\1[0-9a-f]{62})(\.[a-z0-9]{1,10})?$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+# 按优先顺序尝试的预压缩副本：扩展名 -> Content-Encoding
+PRECOMPRESSED = ((".br", "br"), (".gz", "gzip"))
+
+
+def _resolve(file_path):
+    root = os.path.realpath(attachments.UPLOAD_DIR)
+    full = os.path.realpath(os.path.join(root, file_path))
+    # 不对外提供目录外的文件，也不提供 .sessions 等隐藏目录中的上传中文件
+    hidden = any(part.startswith(".") for part in os.path.relpath(full, root).split(os.sep))
+    if not full.startswith(root + os.sep) or hidden:
+        raise HTTPException(status_code=404, detail="File not found")
+    return full
+
+
+def _stat_file(path):
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # 比较时忽略弱校验前缀 W/
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag in tags
+
+
+def _pick_variant(request, full_path):
+    """
+    选择要发送的文件：有 Range 请求时总是发送原文件；否则按 Accept-Encoding 选择已存在的预压缩副本
+    返回 (路径, stat, Content-Encoding 或 None, 是否存在任何副本)
+    """
+    variants = []
+    for suffix, coding in PRECOMPRESSED:
+        st = _stat_file(full_path + suffix)
+        if st is not None:
+            variants.append((full_path + suffix, st, coding))
+    if variants and "range" not in request.headers:
+        accepted = _accepted_encodings(request)
+        for path, st, coding in variants:
+            if coding in accepted:
+                return path, st, coding, True
+    return full_path, None, None, bool(variants)
+
+
+@download_router.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"])
+async def download_attachment(file_path: str, request: Request):
+    """
+    下载附件
+    - 内容寻址文件使用以哈希为值的强 ETag 并允许永久缓存；旧的按文件名存放的文件按 mtime/大小生成 ETag 并要求重新验证
+    - If-None-Match 命中返回 304；Range / If-Range 支持断点续传（206）
+    - 存在 .br / .gz 预压缩副本且客户端接受时直接发送副本
+    - 服务器支持 http.response.pathsend 扩展时由 FileResponse 零拷贝发送
+    """
+    full_path = _resolve(file_path)
+    path, st, encoding, has_variants = await run_in_threadpool(_pick_variant, request, full_path)
+    if st is None:
+        st = await run_in_threadpool(_stat_file, path)
+    if st is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    hashed = HASHED_PATH_RE.match(file_path.replace(os.sep, "/"))
+    if hashed:
+        tag = hashed.group(2)
+        cache_control = IMMUTABLE_CACHE
+    else:
+        tag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        cache_control = REVALIDATE_CACHE
+    etag = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if has_variants:
+        headers["Vary"] = "Accept-Encoding"
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    media_type = guess_type(full_path)[0] or "application/octet-stream"
+    return FileResponse(path, headers=headers, media_type=media_type, stat_result=st)
+
+
+# ---- 分块上传会话 ----
+
+def _session_out(session):
+    return {
+        "id": session.id,
+        "filename": session.filename,
+        "size": session.size,
+        "next_index": session.next_index,
+        "received_bytes": session.received_bytes,
+        "status": session.status,
+        "path": attachments.URL_PREFIX + session.path if session.path else None,
+        "max_chunk_bytes": attachments.MAX_CHUNK_BYTES,
+    }
+
+
+def _get_session(db, session_id):
+    session = db.get(models.UploadSession, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+@router.post("/upload_sessions", response_model=schemas.UploadSession)
+def create_upload_session(payload: schemas.UploadSessionCreate, db: Session = Depends(get_db)):
+    """
+    创建分块上传会话；之后按序号 PUT 分块（0, 1, 2, ...），最后 POST finalize
+    """
+    if payload.size is not None and payload.size > attachments.MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"附件 {payload.filename} 超过大小上限 {attachments.MAX_UPLOAD_BYTES} 字节")
+    session = models.UploadSession(id=uuid.uuid4().hex, filename=payload.filename,
+                                   size=payload.size, creator_id=payload.creator_id)
+    db.add(session)
+    db.commit()
+    return _session_out(session)
+
+
+@router.get("/upload_sessions/{session_id}", response_model=schemas.UploadSession)
+def get_upload_session(session_id: str, db: Session = Depends(get_db)):
+    """查询会话进度，断线后客户端从 next_index 继续上传"""
+    return _session_out(_get_session(db, session_id))
+
+
+def _store_chunk(db, session, index, data):
+    received = attachments.append_chunk(session.id, session.received_bytes, data)
+    # 以 next_index 为条件推进，并发重试同一分块时只有一个生效
+    db.execute(
+        update(models.UploadSession.__table__)
+        .where(models.UploadSession.id == session.id, models.UploadSession.next_index == index)
+        .values(next_index=index + 1, received_bytes=received, updated_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+    db.refresh(session)
+    return _session_out(session)
+
+
+@router.put("/upload_sessions/{session_id}/chunks/{index}", response_model=schemas.UploadSession)
+async def upload_chunk(session_id: str, index: int, request: Request, db: Session = Depends(get_db)):
+    """
+    上传第 index 个分块（请求体为原始字节）
+    - index 小于 next_index：该分块已收到，直接返回（重试幂等）
+    - index 大于 next_index：409，客户端应从 next_index 继续
+    异步读取请求体；数据库查询、写文件与提交都在线程池中执行（SQLite 写锁等待 busy_timeout 时不阻塞事件循环）
+    """
+    session = await run_in_threadpool(_get_session, db, session_id)
+    if session.status != "uploading":
+        raise HTTPException(status_code=409, detail="Upload session already finalized")
+    if index < session.next_index:
+        return _session_out(session)
+    if index > session.next_index:
+        raise HTTPException(status_code=409, detail=f"Expected chunk {session.next_index}")
+
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > attachments.MAX_CHUNK_BYTES:
+            raise HTTPException(status_code=413, detail=f"分块超过大小上限 {attachments.MAX_CHUNK_BYTES} 字节")
+    limit = session.size if session.size is not None else attachments.MAX_UPLOAD_BYTES
+    if session.received_bytes + len(data) > limit:
+        raise HTTPException(status_code=413, detail=f"附件 {session.filename} 超过声明大小或上限")
+
+    return await run_in_threadpool(_store_chunk, db, session, index, bytes(data))
+
+
+@router.post("/upload_sessions/{session_id}/finalize", response_model=schemas.UploadSession)
+def finalize_upload_session(session_id: str, db: Session = Depends(get_db)):
+    """
+    完成上传：校验大小、计算哈希并移入内容寻址存储；重复调用返回相同结果
+    """
+    session = _get_session(db, session_id)
+    if session.status == "finalized":
+        return _session_out(session)
+    if session.size is not None and session.received_bytes != session.size:
+        raise HTTPException(status_code=400, detail=f"已收到 {session.received_bytes} 字节，声明大小为 {session.size}")
+    if session.received_bytes == 0:
+        # 空文件没有分块，补一个空的临时文件
+        attachments.append_chunk(session.id, 0, b"")
+    rel_path, _ = attachments.finalize_part(session.id, session.filename)
+    session.status = "finalized"
+    session.path = rel_path
+    db.commit()
+    return _session_out(session)
+
+
+# /api/uploads/... 是附件元数据中保存的下载路径（attachments.URL_PREFIX），download_router 另以无前缀方式挂载
+router.include_router(download_router)
@@ -3,20 +3,99 @@ from datetime import datetime, timedelta, timezone
 try:
     from .database import get_db
     from . import models
+    from .stats import rebuild_rollups
+    from .attachments import discard_part
+    from .org_sync import sync_if_changed
+    from .reminders import ReminderEngine, TICK_SECONDS
+    from .notifications import deliver
+    from .transitions import apply_transitions
+    from .membership import prune_changes
 except (ImportError, ValueError):
     from database import get_db
     import models
+    from stats import rebuild_rollups
+    from attachments import discard_part
+    from org_sync import sync_if_changed
+    from reminders import ReminderEngine, TICK_SECONDS
+    from notifications import deliver
+    from transitions import apply_transitions
+    from membership import prune_changes
 
-def check_pending_feedback():
+reminder_engine = ReminderEngine(dispatch=deliver)
+
+def send_reminders():
+    # 时间轮每个 tick 发出到点的截止提醒，按收件人合并为摘要发送（见 reminders.py / notifications.py）
+    # 引擎自行提交：台账先提交，分发在事务之外进行
+    db = next(get_db())
+    try:
+        reminder_engine.run(db)
+    finally:
+        db.close()
+
+def status_transitions():
+    # 截止后未反馈的分配置为逾期、（启用时）关闭过期事项，每步一条 UPDATE，只处理水位线之后到期的事项
+    db = next(get_db())
+    try:
+        report = apply_transitions(db)
+        db.commit()
+        if report["assignments_marked"] or report["items_closed"]:
+            print(f"状态迁移: 逾期分配 {report['assignments_marked']} 条（{report['items_updated']} 个事项），"
+                  f"关闭事项 {report['items_closed'] or 0} 个")
+    finally:
+        db.close()
+
+def reconcile_stats():
+    # 全量重建统计汇总表，校正增量维护可能产生的漂移（如用户调整部门、直接改库）
+    db = next(get_db())
+    try:
+        owners, depts = rebuild_rollups(db)
+        db.commit()
+        print(f"统计汇总已校正: {owners} 个作用域, {depts} 个部门汇总")
+    finally:
+        db.close()
+
+def purge_upload_sessions(max_age_hours=24):
+    # 清理超时未完成的分块上传会话及其临时文件；已完成会话的文件在内容寻址存储中，只删除会话记录
+    db = next(get_db())
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+        stale = db.query(models.UploadSession).filter(models.UploadSession.updated_at < cutoff).all()
+        for session in stale:
+            if session.status != "finalized":
+                discard_part(session.id)
+            db.delete(session)
+        db.commit()
+        if stale:
+            print(f"已清理 {len(stale)} 个过期上传会话")
+    finally:
+        db.close()
+
+def sync_org():
+    # 用户目录有变化时增量同步组织分组
+    db = next(get_db())
+    try:
+        report = sync_if_changed(db)
+        db.commit()
+        if report and (report["created"] or report["members_added"] or report["members_removed"]):
+            print(f"组织分组已同步: 新建 {report['created']} 个, 加入 {report['members_added']} 人, 移出 {report['members_removed']} 人")
+    finally:
+        db.close()
+
+def prune_membership_changes():
+    # 成员索引增量更新所用的变更日志只保留最近的记录，落后太多的进程整体重建索引
     db = next(get_db())
-    now = datetime.now(timezone.utc)
-    pending_items = db.query(models.ItemUser)\
-        .join(models.Item)\
-        .filter(models.ItemUser.feedback_status=="pending")\
-        .filter(models.Item.deadline <= now + timedelta(hours=24))\
-        .all()
-    for pi in pending_items:
-        print(f"提醒: 用户 {pi.user_id} 在事项 {pi.item_id} 前24小时未反馈")
+    try:
+        pruned = prune_changes(db)
+        db.commit()
+        if pruned:
+            print(f"已清理 {pruned} 条成员变更记录")
+    finally:
+        db.close()
 
 scheduler = BackgroundScheduler()
-scheduler.add_job(check_pending_feedback, "interval", minutes=60)
+scheduler.add_job(send_reminders, "interval", seconds=TICK_SECONDS)
+scheduler.add_job(status_transitions, "interval", minutes=5)
+scheduler.add_job(reconcile_stats, "cron", hour=3)
+scheduler.add_job(purge_upload_sessions, "interval", hours=6)
+scheduler.add_job(sync_org, "interval", minutes=10)
+scheduler.add_job(prune_membership_changes, "cron", hour=4)
@@ -35,14 +35,19 @@ class Item(ItemBase):
     status: str
     creator_id: int
     created_at: datetime
+    assigned_count: int = 0
+    done_count: int = 0
+    overdue_count: int = 0
     model_config = ConfigDict(from_attributes=True)
 
 class TodoItem(Item):
     item_user_id: int
+    feedback_status: str = "pending"
  
 class PaginatedItems(BaseModel):
     items: List[Item]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class FeedbackBase(BaseModel):
     content: str
@@ -56,6 +61,19 @@ class Feedback(FeedbackBase):
     updated_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+class FeedbackBulkCreate(BaseModel):
+    entries: List[FeedbackCreate]
+
+class FeedbackBulkResult(BaseModel):
+    index: int
+    item_user_id: int
+    status: str  # created / not_found
+    feedback: Optional[Feedback] = None
+
+class FeedbackBulkResponse(BaseModel):
+    created: int
+    results: List[FeedbackBulkResult]
+
 class GroupBase(BaseModel):
     name: str
     description: Optional[str] = ""
@@ -72,16 +90,31 @@ class Group(GroupBase):
     owner_id: Optional[int] = None
     created_at: datetime
     user_ids: List[int] = []
+    member_count: int = 0
     
     @classmethod
     def model_validate_orm(cls, obj):
         # 自定义验证以从关系中提取 user_ids
         instance = cls.model_validate(obj)
         instance.user_ids = [u.id for u in obj.users]
+        instance.member_count = len(instance.user_ids)
         return instance
     
     model_config = ConfigDict(from_attributes=True)
 
+class GroupSelection(BaseModel):
+    # (user_ids ∪ group_ids 的成员) ∩ intersect_group_ids 的每个分组 − exclude_*
+    user_ids: List[int] = []
+    group_ids: List[int] = []
+    intersect_group_ids: List[int] = []
+    exclude_user_ids: List[int] = []
+    exclude_group_ids: List[int] = []
+    count_only: bool = False
+
+class GroupSelectionResult(BaseModel):
+    user_ids: List[int] = []
+    count: int
+
 class OperationLog(BaseModel):
     id: int
     user_id: int
@@ -89,3 +122,29 @@ class OperationLog(BaseModel):
     target_id: Optional[str] = None
     timestamp: datetime
     model_config = ConfigDict(from_attributes=True)
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: Optional[int] = None
+    creator_id: Optional[int] = None
+
+class UploadSession(BaseModel):
+    id: str
+    filename: str
+    size: Optional[int] = None
+    next_index: int
+    received_bytes: int
+    status: str  # uploading / finalized
+    path: Optional[str] = None  # 完成后的下载路径 /api/uploads/...
+    max_chunk_bytes: int
+
+class DirectoryUser(BaseModel):
+    id: int
+    name: Optional[str] = None
+    group: Optional[str] = None
+    role: Optional[str] = None
+
+class UserDirectoryPage(BaseModel):
+    users: List[DirectoryUser]
+    next_cursor: Optional[str] = None
+    version: int
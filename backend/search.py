@@ -0,0 +1,134 @@
+"""
+事项全文检索 (SQLite FTS5)
+- items_fts：以 items 为外部内容表的 FTS5 虚表，索引 title / description
+- 分词器使用 trigram：按 3 字符切分，天然支持中文等无空格文本的子串匹配，且与 LIKE '%kw%' 语义一致（不区分大小写）
+- 通过触发器与 items 表保持同步，ORM、批量写入与手工 SQL 均无需额外处理
+- 关键词不足 3 个字符时 trigram 无法建立查询，退回 LIKE 扫描
+- 是否已安装全文索引按引擎缓存，不在每次搜索时查询 sqlite_master；本进程安装或删除虚表时失效
+"""
+import weakref
+from sqlalchemy import event, select, or_, table, column, literal_column, text
+try:
+    from . import models
+except (ImportError, ValueError):
+    import models
+
+FTS_TABLE = "items_fts"
+MIN_FTS_KEYWORD = 3
+
+_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, description, content='items', content_rowid='id', tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF title, description ON items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+items_fts = table(FTS_TABLE, column("rowid"), column("title"), column("description"))
+
+# 引擎 -> 是否已安装全文索引
+_fts_available = weakref.WeakKeyDictionary()
+
+
+def fts_supported(conn):
+    """当前 SQLite 是否编译了 FTS5 与 trigram 分词器 (SQLite >= 3.34)"""
+    try:
+        conn.exec_driver_sql("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x, tokenize='trigram')")
+        conn.exec_driver_sql("DROP TABLE temp._fts_probe")
+        return True
+    except Exception:
+        return False
+
+
+def install_item_fts(conn, rebuild=False):
+    """
+    创建 FTS 虚表与同步触发器；rebuild=True 时按 items 现有数据重建索引（用于旧库迁移）
+    返回是否已启用全文索引
+    """
+    if not fts_supported(conn):
+        return False
+    for ddl in _FTS_DDL:
+        conn.exec_driver_sql(ddl)
+    _fts_available.pop(conn.engine, None)
+    if rebuild:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def fts_installed(conn):
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first() is not None
+
+
+@event.listens_for(models.Item.__table__, "after_create")
+def _create_item_fts(target, connection, **kw):
+    install_item_fts(connection)
+
+
+@event.listens_for(models.Item.__table__, "before_drop")
+def _drop_item_fts(target, connection, **kw):
+    # 外部内容虚表不会随 items 一起删除，残留会导致重建后 rowid 对应错乱
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    _fts_available.pop(connection.engine, None)
+
+
+def _match_expression(keyword, columns=None):
+    # 整体作为一个短语查询，避免关键词中的 FTS5 语法字符（- * : 等）被解析
+    phrase = '"' + keyword.replace('"', '""') + '"'
+    if columns:
+        return "{" + " ".join(columns) + "} : " + phrase
+    return phrase
+
+
+def _use_fts(db, keyword):
+    if len(keyword) < MIN_FTS_KEYWORD:
+        return False
+    conn = db.connection()
+    available = _fts_available.get(conn.engine)
+    if available is None:
+        available = _fts_available[conn.engine] = fts_installed(conn)
+    return available
+
+
+def ranked_matches(keyword, columns=None):
+    """
+    返回 (item_id, rank) 子查询，rank 为 bm25 得分，越小越相关
+    """
+    return select(
+        items_fts.c.rowid.label("item_id"),
+        literal_column(f"bm25({FTS_TABLE})").label("rank"),
+    ).where(literal_column(FTS_TABLE).match(_match_expression(keyword, columns))).subquery()
+
+
+def filter_items(db, query, keyword, columns=("title", "description")):
+    """
+    为 Item 查询追加关键词过滤；可用全文索引时追加 rank 列并返回 (query, rank_column)，否则 rank_column 为 None
+    """
+    if _use_fts(db, keyword):
+        matches = ranked_matches(keyword, columns)
+        query = query.join(matches, matches.c.item_id == models.Item.id)
+        return query, matches.c.rank
+    pattern = f"%{keyword}%"
+    return query.filter(or_(*[getattr(models.Item, c).like(pattern) for c in columns])), None
+
+
+def search_items(db, keyword, limit=20):
+    """
+    按相关度排序搜索事项（标题与描述），全文索引不可用或关键词过短时按创建时间倒序；limit=None 返回全部匹配
+    """
+    query, rank = filter_items(db, db.query(models.Item), keyword)
+    if rank is not None:
+        query = query.order_by(rank, models.Item.id)
+    else:
+        query = query.order_by(models.Item.created_at.desc(), models.Item.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
@@ -0,0 +1,233 @@
+"""
+统计汇总表 (StatsScopeRollup / StatsDeptRollup) 的增量维护与读取
+- 写路径（事项创建/删除、反馈提交）在同一事务内按增量更新汇总行
+- rebuild_rollups() 按原始数据全量重建，由调度任务定期执行以校正漂移（如用户调整部门）
+- /api/items/stats/summary 对 scope=all / mine_created 直接读取汇总行，耗时与历史数据量无关
+"""
+from sqlalchemy import select, func, case, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+try:
+    from . import models
+    from .counters import DONE_STATUSES
+except (ImportError, ValueError):
+    import models
+    from counters import DONE_STATUSES
+
+GLOBAL_OWNER = 0
+UNGROUPED = "未分组"
+
+_SCOPE_FIELDS = ("item_count", "feedback_count", "assigned_count", "done_count")
+_DEPT_FIELDS = ("assigned_count", "done_count")
+
+
+def _upsert(db, model, keys, fields, rows):
+    if not rows:
+        return
+    stmt = sqlite_insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={f: getattr(model, f) + stmt.excluded[f] for f in fields},
+    )
+    db.execute(stmt, rows)
+
+
+def _owners(creator_id):
+    if creator_id is None or creator_id == GLOBAL_OWNER:
+        return [GLOBAL_OWNER]
+    return [GLOBAL_OWNER, creator_id]
+
+
+def apply_deltas(db, creator_id, scope=None, depts=None, owners=None):
+    """
+    将增量同时计入全局与发起人两个作用域（owners 指定时只计入这些作用域）
+    scope: {字段: 增量}；depts: {部门: (assigned 增量, done 增量)}
+    """
+    owners = _owners(creator_id) if owners is None else owners
+    if scope and any(scope.values()):
+        values = {f: scope.get(f, 0) for f in _SCOPE_FIELDS}
+        _upsert(db, models.StatsScopeRollup, ["owner_id"], _SCOPE_FIELDS,
+                [{"owner_id": o, **values} for o in owners])
+    rows = [
+        {"owner_id": o, "department": d, "assigned_count": a, "done_count": n}
+        for o in owners for d, (a, n) in (depts or {}).items() if a or n
+    ]
+    _upsert(db, models.StatsDeptRollup, ["owner_id", "department"], _DEPT_FIELDS, rows)
+
+
+def _dept_expr():
+    return func.coalesce(models.User.group, "")
+
+
+def _done_sum():
+    return func.sum(case((models.ItemUser.feedback_status.in_(DONE_STATUSES), 1), else_=0))
+
+
+def _item_dept_counts(db, item_id):
+    rows = db.query(_dept_expr(), func.count(models.ItemUser.id), _done_sum())\
+        .join(models.User, models.ItemUser.user_id == models.User.id)\
+        .filter(models.ItemUser.item_id == item_id)\
+        .group_by(_dept_expr()).all()
+    return {dept: (total, done or 0) for dept, total, done in rows}
+
+
+def record_item_created(db, item):
+    """事项及其分配已 flush 后调用"""
+    apply_deltas(
+        db, item.creator_id,
+        scope={"item_count": 1, "assigned_count": item.assigned_count, "done_count": item.done_count},
+        depts=_item_dept_counts(db, item.id),
+    )
+
+
+def _item_totals(db, item, sign):
+    """该事项在汇总表中的全部贡献（乘以 sign）：(scope, depts)"""
+    feedbacks = db.query(func.count(models.Feedback.id))\
+        .join(models.ItemUser, models.Feedback.item_user_id == models.ItemUser.id)\
+        .filter(models.ItemUser.item_id == item.id).scalar()
+    scope = {"item_count": sign, "feedback_count": sign * feedbacks,
+             "assigned_count": sign * item.assigned_count, "done_count": sign * item.done_count}
+    depts = {d: (sign * a, sign * n) for d, (a, n) in _item_dept_counts(db, item.id).items()}
+    return scope, depts
+
+
+def record_item_deleted(db, item):
+    """须在删除该事项的分配与反馈之前调用"""
+    scope, depts = _item_totals(db, item, -1)
+    apply_deltas(db, item.creator_id, scope=scope, depts=depts)
+
+
+def record_creator_changed(db, item, old_creator_id):
+    """事项改由 item.creator_id 发起：贡献从原发起人的作用域移到新发起人，全局作用域不变"""
+    scope, depts = _item_totals(db, item, 1)
+    old_owners = [o for o in _owners(old_creator_id) if o != GLOBAL_OWNER]
+    new_owners = [o for o in _owners(item.creator_id) if o != GLOBAL_OWNER]
+    apply_deltas(db, None, scope={f: -v for f, v in scope.items()},
+                 depts={d: (-a, -n) for d, (a, n) in depts.items()}, owners=old_owners)
+    apply_deltas(db, None, scope=scope, depts=depts, owners=new_owners)
+
+
+def feedback_targets(db, item_user_ids):
+    """
+    查询分配对应的 (item_id, 发起人, 当前状态, 参与人 ID, 部门)，返回 {item_user_id: row}
+    """
+    rows = db.query(models.ItemUser.id, models.ItemUser.item_id, models.Item.creator_id,
+                    models.ItemUser.feedback_status, models.User.id, _dept_expr())\
+        .select_from(models.ItemUser)\
+        .join(models.Item, models.Item.id == models.ItemUser.item_id)\
+        .outerjoin(models.User, models.User.id == models.ItemUser.user_id)\
+        .filter(models.ItemUser.id.in_(item_user_ids)).all()
+    return {row[0]: row for row in rows}
+
+
+def record_feedbacks(db, submissions):
+    """
+    提交若干反馈；submissions 为 [(feedback_targets 返回的行, 是否由未反馈变为已反馈)]
+    按发起人聚合后每张汇总表各执行一次 upsert
+    """
+    scope = {}
+    depts = {}
+    for (_, _, creator_id, _, assignee_id, dept), newly_done in submissions:
+        done = 1 if newly_done else 0
+        for o in _owners(creator_id):
+            fb, n = scope.get(o, (0, 0))
+            scope[o] = (fb + 1, n + done)
+            if assignee_id is not None and done:
+                depts[(o, dept)] = depts.get((o, dept), 0) + done
+    _upsert(db, models.StatsScopeRollup, ["owner_id"], _SCOPE_FIELDS, [
+        {"owner_id": o, "item_count": 0, "feedback_count": fb, "assigned_count": 0, "done_count": n}
+        for o, (fb, n) in scope.items()
+    ])
+    _upsert(db, models.StatsDeptRollup, ["owner_id", "department"], _DEPT_FIELDS, [
+        {"owner_id": o, "department": d, "assigned_count": 0, "done_count": n}
+        for (o, d), n in depts.items()
+    ])
+
+
+def record_feedback(db, item_user_id, newly_done):
+    """
+    提交一条反馈；newly_done 表示该分配由未反馈变为已反馈
+    """
+    row = feedback_targets(db, [item_user_id]).get(item_user_id)
+    if row is not None:
+        record_feedbacks(db, [(row, newly_done)])
+
+
+def rebuild_rollups(db):
+    """
+    按原始数据全量重建汇总表；db 可以是 Session 或 Connection
+    所有分组查询的结果行数只与发起人、部门数量相关
+    """
+    scope = {}
+
+    def add(owner, field, value):
+        for o in _owners(owner):
+            scope.setdefault(o, dict.fromkeys(_SCOPE_FIELDS, 0))[field] += value or 0
+
+    item = models.Item
+    iu = models.ItemUser
+    fb = models.Feedback
+    for owner, n in db.execute(select(item.creator_id, func.count(item.id)).group_by(item.creator_id)):
+        add(owner, "item_count", n)
+    for owner, total, done in db.execute(
+        select(item.creator_id, func.count(iu.id), _done_sum())
+        .select_from(iu).join(item, item.id == iu.item_id)
+        .group_by(item.creator_id)
+    ):
+        add(owner, "assigned_count", total)
+        add(owner, "done_count", done)
+    for owner, n in db.execute(
+        select(item.creator_id, func.count(fb.id))
+        .select_from(fb).join(iu, iu.id == fb.item_user_id).join(item, item.id == iu.item_id)
+        .group_by(item.creator_id)
+    ):
+        add(owner, "feedback_count", n)
+
+    depts = {}
+    for owner, dept, total, done in db.execute(
+        select(item.creator_id, _dept_expr(), func.count(iu.id), _done_sum())
+        .select_from(iu).join(item, item.id == iu.item_id).join(models.User, models.User.id == iu.user_id)
+        .group_by(item.creator_id, _dept_expr())
+    ):
+        for o in _owners(owner):
+            a, n = depts.get((o, dept), (0, 0))
+            depts[(o, dept)] = (a + total, n + (done or 0))
+
+    db.execute(delete(models.StatsScopeRollup))
+    db.execute(delete(models.StatsDeptRollup))
+    if scope:
+        db.execute(models.StatsScopeRollup.__table__.insert(),
+                   [{"owner_id": o, **values} for o, values in scope.items()])
+    if depts:
+        db.execute(models.StatsDeptRollup.__table__.insert(),
+                   [{"owner_id": o, "department": d, "assigned_count": a, "done_count": n}
+                    for (o, d), (a, n) in depts.items()])
+    return len(scope), len(depts)
+
+
+def _rate(done, total):
+    return int((done / total) * 100) if total > 0 else 0
+
+
+def read_summary(db, owner_id):
+    """
+    读取作用域汇总：总事项数、总反馈数、总体响应率与部门排行
+    """
+    row = db.get(models.StatsScopeRollup, owner_id)
+    totals = {f: getattr(row, f) if row else 0 for f in _SCOPE_FIELDS}
+    dept_ranking = []
+    for d in db.query(models.StatsDeptRollup).filter(
+        models.StatsDeptRollup.owner_id == owner_id, models.StatsDeptRollup.assigned_count > 0
+    ):
+        dept_ranking.append({
+            "name": d.department or UNGROUPED,
+            "rate": _rate(d.done_count, d.assigned_count),
+            "total": d.assigned_count,
+            "done": d.done_count,
+        })
+    dept_ranking.sort(key=lambda x: x["rate"], reverse=True)
+    return {
+        "total_items": totals["item_count"],
+        "total_feedbacks": totals["feedback_count"],
+        "completion_rate": f"{_rate(totals['done_count'], totals['assigned_count'])}%",
+        "dept_ranking": dept_ranking,
+    }
@@ -1,10 +1,17 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# 测试套件以严格模式运行：端点查询数超出预算或出现 N+1 时测试失败（见 backend/instrumentation.py）
+os.environ.setdefault("FEEDBACK_QUERY_BUDGET", "strict")
+os.environ.setdefault("FEEDBACK_QUERY_REPORT", "1")
+
 from backend.database import Base, get_db
+from backend.instrumentation import instrument
 from backend.main import app
 
 # 使用内存中的 SQLite 进行测试
@@ -15,6 +22,7 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+instrument(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="function")
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta, timezone
 import bcrypt
+import pytest
 from backend import models
 
 def get_password_hash(password):
@@ -93,3 +94,340 @@ def test_item_workflow(client, db):
     db.refresh(iu)
     assert iu.feedback_status == "done"
     assert iu.last_feedback_time is not None
+
+def test_items_cursor_pagination(client, db):
+    creator = models.User(username="c", name="发起人", role="creator")
+    db.add(creator)
+    db.commit()
+    base = datetime(2024, 1, 1)
+    # 部分事项创建时间相同，验证 id 作为次级排序键不会漏行或重复
+    for i in range(25):
+        db.add(models.Item(title=f"事项{i % 7}", description="", deadline=base + timedelta(days=i),
+                           creator_id=creator.id, created_at=base + timedelta(hours=i // 3)))
+    db.commit()
+
+    for sort_by, sort_order in [("created_at", "desc"), ("title", "asc"), ("deadline", "asc")]:
+        expected = client.get("/api/items", params={"sort_by": sort_by, "sort_order": sort_order}).json()
+        assert expected["total"] == 25
+        seen, cursor = [], None
+        while True:
+            params = {"sort_by": sort_by, "sort_order": sort_order, "pagination": "cursor", "limit": 10}
+            if cursor:
+                params["cursor"] = cursor
+            page = client.get("/api/items", params=params).json()
+            assert page["total"] is None
+            seen += [it["id"] for it in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert seen == [it["id"] for it in expected["items"]]
+
+    res = client.get("/api/items", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+
+def test_item_counters_and_auto_finish(client, db):
+    import json
+    from backend.counters import recompute_item_counters
+    users = [models.User(username=f"w{i}", name=f"员工{i}", role="feedbacker") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    res = client.post("/api/items", data={
+        "title": "计数", "deadline": deadline, "creator_id": users[0].id,
+        "user_ids": json.dumps([u.id for u in users]),
+    })
+    item_id = res.json()["id"]
+    assert res.json()["assigned_count"] == 3
+
+    ius = db.query(models.ItemUser).filter_by(item_id=item_id).all()
+    for n, iu in enumerate(ius, start=1):
+        client.post("/api/feedbacks", json={"item_user_id": iu.id, "content": "ok"})
+        # 重复提交不重复计数
+        client.post("/api/feedbacks", json={"item_user_id": iu.id, "content": "again"})
+        item = client.get(f"/api/items/{item_id}").json()["item"]
+        assert item["done_count"] == n
+        assert item["status"] == ("finished" if n == 3 else "ongoing")
+
+    db.query(models.Item).filter_by(id=item_id).update({"done_count": 0, "assigned_count": 0})
+    recompute_item_counters(db)
+    item = db.query(models.Item).filter_by(id=item_id).one()
+    db.refresh(item)
+    assert (item.assigned_count, item.done_count, item.overdue_count) == (3, 3, 0)
+
+def test_create_item_expands_groups(client, db):
+    import json
+    users = [models.User(username=f"g{i}", name=f"成员{i}", role="feedbacker") for i in range(5)]
+    db.add_all(users)
+    db.commit()
+    dept = models.Group(name="研发部", is_org=True, users=users[:3])
+    team = models.Group(name="项目组", users=users[2:4])
+    db.add_all([dept, team])
+    db.commit()
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    res = client.post("/api/items", data={
+        "title": "分组分配", "deadline": deadline, "creator_id": users[0].id,
+        # users[2] 同时属于两个分组且被直接指定，只应分配一次；不存在的用户被忽略
+        "user_ids": json.dumps([users[2].id, users[4].id, 9999]),
+        "group_ids": json.dumps([dept.id, team.id]),
+    })
+    assert res.status_code == 200
+    assert res.json()["assigned_count"] == 5
+    assigned = sorted(iu.user_id for iu in db.query(models.ItemUser).filter_by(item_id=res.json()["id"]))
+    assert assigned == sorted(u.id for u in users)
+    assert db.query(models.OperationLog).filter_by(target_id=res.json()["id"]).count() == 1
+
+    res = client.post("/api/items", data={"title": "x", "deadline": deadline, "creator_id": users[0].id,
+                                          "user_ids": "not-json"})
+    assert res.status_code == 400
+    # 不指定参与人与原接口一致，创建一个没有分配的事项
+    res = client.post("/api/items", data={"title": "x", "deadline": deadline, "creator_id": users[0].id})
+    assert res.status_code == 200
+    assert res.json()["assigned_count"] == 0
+
+def test_stats_rollups_match_full_rebuild(client, db):
+    import json
+    from backend.stats import rebuild_rollups
+    users = [models.User(username=f"s{i}", name=f"员工{i}", role="feedbacker",
+                         group=["研发部", "市场部", None][i % 3]) for i in range(6)]
+    db.add_all(users)
+    db.commit()
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    item_ids = []
+    for creator, assignees in [(users[0], users[:4]), (users[1], users[2:]), (users[0], users[1:3])]:
+        res = client.post("/api/items", data={
+            "title": "统计", "deadline": deadline, "creator_id": creator.id,
+            "user_ids": json.dumps([u.id for u in assignees]),
+        })
+        item_ids.append(res.json()["id"])
+    for iu in db.query(models.ItemUser).filter(models.ItemUser.user_id.in_([users[2].id, users[3].id])).all():
+        client.post("/api/feedbacks", json={"item_user_id": iu.id, "content": "ok"})
+    client.delete(f"/api/items/{item_ids[2]}")
+    # 改换发起人：汇总从原发起人移到新发起人
+    res = client.put(f"/api/items/{item_ids[1]}", json={"title": "统计", "deadline": deadline, "creator_id": users[0].id})
+    assert res.status_code == 200
+
+    queries = [{"scope": "all"}, {"scope": "mine_created", "user_id": users[0].id},
+               {"scope": "mine_created", "user_id": users[1].id}]
+    incremental = [client.get("/api/items/stats/summary", params=q).json() for q in queries]
+    assert incremental[0]["total_items"] == 2
+    assert incremental[0]["total_feedbacks"] == 4
+    assert incremental[0]["completion_rate"] == "50%"
+    assert (incremental[1]["total_items"], incremental[2]["total_items"]) == (2, 0)
+
+    rebuild_rollups(db)
+    db.commit()
+    rebuilt = [client.get("/api/items/stats/summary", params=q).json() for q in queries]
+    for a, b in zip(incremental, rebuilt):
+        assert a["total_items"] == b["total_items"]
+        assert a["total_feedbacks"] == b["total_feedbacks"]
+        assert a["completion_rate"] == b["completion_rate"]
+        assert sorted(map(str, a["dept_ranking"])) == sorted(map(str, b["dept_ranking"]))
+
+def test_todos_ordered_paged_and_filtered(client, db):
+    user = models.User(username="todo", name="待办人", role="feedbacker")
+    db.add(user)
+    db.commit()
+    base = datetime(2030, 1, 1)
+    for i in [3, 1, 4, 0, 2]:
+        item = models.Item(title=f"待办{i}", deadline=base + timedelta(days=i), creator_id=user.id)
+        db.add(item)
+        db.flush()
+        db.add(models.ItemUser(item_id=item.id, user_id=user.id))
+    db.commit()
+
+    res = client.get("/api/todos", params={"user_id": user.id})
+    assert [t["title"] for t in res.json()] == [f"待办{i}" for i in range(5)]
+    assert "X-Next-Cursor" not in res.headers
+
+    titles, cursor = [], None
+    while True:
+        params = {"user_id": user.id, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get("/api/todos", params=params)
+        titles += [t["title"] for t in res.json()]
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert titles == [f"待办{i}" for i in range(5)]
+
+    res = client.get("/api/todos", params={"user_id": user.id, "due_before": "2030-01-03"})
+    assert [t["title"] for t in res.json()] == ["待办0", "待办1"]
+    assert client.get("/api/todos", params={"user_id": user.id, "status": "done"}).json() == []
+
+def test_bulk_feedback_single_transaction(client, db):
+    import json
+    users = [models.User(username=f"b{i}", name=f"员工{i}", role="feedbacker", group="研发部") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    item_ids = []
+    for assignees in [users, users[:1]]:
+        res = client.post("/api/items", data={"title": "批量", "deadline": deadline, "creator_id": users[0].id,
+                                             "user_ids": json.dumps([u.id for u in assignees])})
+        item_ids.append(res.json()["id"])
+    ius = db.query(models.ItemUser).order_by(models.ItemUser.id).all()
+    entries = [{"item_user_id": iu.id, "content": f"代提交{iu.id}"} for iu in ius[:3]]
+    entries += [{"item_user_id": ius[3].id, "content": "a"}, {"item_user_id": ius[3].id, "content": "b"},
+                {"item_user_id": 99999, "content": "x"}]
+    res = client.post("/api/feedbacks/bulk", json={"entries": entries})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["created"] == 5
+    assert [r["status"] for r in body["results"]] == ["created"] * 5 + ["not_found"]
+    assert body["results"][0]["feedback"]["content"] == f"代提交{ius[0].id}"
+
+    for item_id, expected in zip(item_ids, [(3, 3), (1, 1)]):
+        item = client.get(f"/api/items/{item_id}").json()["item"]
+        assert (item["assigned_count"], item["done_count"]) == expected
+        assert item["status"] == "finished"
+    summary = client.get("/api/items/stats/summary").json()
+    assert summary["total_feedbacks"] == 5
+    assert summary["completion_rate"] == "100%"
+
+@pytest.mark.parametrize("group_commit", [False, True])
+def test_feedback_for_unknown_assignment_is_not_found(client, db, monkeypatch, group_commit):
+    from sqlalchemy.orm import sessionmaker
+    from backend.routers import feedback
+    from backend.write_queue import GroupCommitQueue
+    # 是否开启组提交，结果一致：404，且不写入孤立的反馈
+    queue = GroupCommitQueue(sessionmaker(bind=db.get_bind())) if group_commit else None
+    monkeypatch.setattr(feedback, "get_feedback_queue", lambda: queue)
+    try:
+        res = client.post("/api/feedbacks", json={"item_user_id": 99999, "content": "x"})
+    finally:
+        if queue is not None:
+            queue.stop()
+    assert res.status_code == 404
+    assert db.query(models.Feedback).count() == 0
+
+def test_export_items_stream(client, db):
+    import csv, io, json
+    from openpyxl import load_workbook
+    creator = models.User(username="exp", name="导出人", role="admin")
+    users = [models.User(username=f"e{i}", name=f"员工{i}", role="feedbacker") for i in range(2)]
+    db.add_all([creator, *users])
+    db.commit()
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    ids = []
+    for i in range(3):
+        res = client.post("/api/items", data={
+            "title": f"导出事项{i}", "deadline": deadline, "creator_id": creator.id,
+            "user_ids": json.dumps([u.id for u in users]),
+        })
+        ids.append(res.json()["id"])
+    iu = db.query(models.ItemUser).filter_by(item_id=ids[0]).first()
+    client.post("/api/feedbacks", json={"item_user_id": iu.id, "content": "ok"})
+
+    res = client.get("/api/items/export/excel", params={"format": "csv", "sort_order": "asc"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    assert res.content.startswith("\ufeff".encode("utf-8"))
+    rows = list(csv.reader(io.StringIO(res.content.decode("utf-8-sig"))))
+    assert rows[0][:3] == ["ID", "事项标题", "发起人"]
+    assert [int(r[0]) for r in rows[1:]] == ids
+    assert rows[1][2] == "导出人" and rows[1][6:10] == ["2", "1", "0", "50%"]
+
+    # 与 /items 相同的过滤条件
+    res = client.get("/api/items/export/excel", params={"format": "csv", "title_like": "导出事项2"})
+    assert len(list(csv.reader(io.StringIO(res.content.decode("utf-8-sig"))))) == 2
+
+    res = client.get("/api/items/export/excel")
+    assert res.headers["content-type"].startswith("application/vnd.openxmlformats")
+    sheet = load_workbook(io.BytesIO(res.content), read_only=True).active
+    values = list(sheet.iter_rows(values_only=True))
+    assert len(values) == 4 and values[0][0] == "ID"
+
+    assert client.get("/api/items/export/excel", params={"format": "pdf"}).status_code == 400
+
+def test_export_users_columns(client, db):
+    import csv, io
+    db.add_all([models.User(username=f"x{i}", name=f"用户{i}", role="feedbacker", group="研发部",
+                            password_hash="h") for i in range(3)])
+    db.commit()
+    res = client.get("/api/users/export")
+    # 用户导出保持原有输出，不带 BOM
+    rows = list(csv.reader(io.StringIO(res.content.decode("utf-8"))))
+    assert rows[0] == ["ID", "Username", "Name", "Role", "Group", "Password_Hash", "Default_Password_Note"]
+    assert len(rows) == 4
+
+    res = client.get("/api/users/export", params={"columns": "username,group"})
+    rows = list(csv.reader(io.StringIO(res.content.decode("utf-8"))))
+    assert rows == [["Username", "Group"]] + [[f"x{i}", "研发部"] for i in range(3)]
+
+    res = client.get("/api/users/export", params={"format": "xlsx", "columns": "id,name"})
+    assert res.headers["content-type"].startswith("application/vnd.openxmlformats")
+    assert client.get("/api/users/export", params={"columns": "salary"}).status_code == 400
+
+def test_user_directory_pages_filters_and_etag(client, db):
+    users = [models.User(username=f"d{i}", name=f"{'张' if i % 2 else '李'}{i}", role="feedbacker",
+                         group="研发部" if i < 4 else "市场部", password_hash="secret") for i in range(6)]
+    db.add_all(users)
+    db.commit()
+    team = models.Group(name="项目组", users=users[:2])
+    db.add(team)
+    db.commit()
+
+    assert all("password_hash" not in u for u in client.get("/api/users").json())
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/users/directory", params=params).json()
+        assert set(page["users"][0]) == {"id", "name", "group", "role"}
+        seen += [u["id"] for u in page["users"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [u.id for u in users]
+
+    res = client.get("/api/users/directory", params={"group": "研发部", "name_prefix": "张"})
+    assert [u["name"] for u in res.json()["users"]] == ["张1", "张3"]
+    res = client.get("/api/users/directory", params={"group_id": team.id})
+    assert [u["id"] for u in res.json()["users"]] == [users[0].id, users[1].id]
+
+    # 未变化时 304；用户或分组成员变化后版本递增
+    res = client.get("/api/users/directory")
+    etag = res.headers["etag"]
+    assert client.get("/api/users/directory", headers={"If-None-Match": etag}).status_code == 304
+    other = client.get("/api/users/directory", params={"group": "研发部"}).headers["etag"]
+    assert other != etag
+    team.users.append(users[5])
+    db.commit()
+    res = client.get("/api/users/directory", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.json()["version"] > int(etag.strip('"').split("-")[0])
+    etag = res.headers["etag"]
+    users[3].name = "王3"
+    db.commit()
+    assert client.get("/api/users/directory", headers={"If-None-Match": etag}).status_code == 200
+
+def test_groups_listing_single_membership_query(client, db):
+    from sqlalchemy import event
+    owner = models.User(username="gowner", name="组长", role="creator")
+    users = [models.User(username=f"gm{i}", name=f"成员{i}", role="feedbacker") for i in range(6)]
+    db.add_all([owner, *users])
+    db.commit()
+    groups = [models.Group(name=f"组{i}", is_org=i % 2 == 0, owner_id=None if i % 2 == 0 else owner.id,
+                           users=users[:i]) for i in range(5)]
+    private = models.Group(name="别人的组", owner_id=users[0].id, users=users)
+    db.add_all([*groups, private])
+    db.commit()
+
+    owner_id, member_ids = owner.id, [u.id for u in users]
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    res = client.get("/api/groups", params={"user_id": owner_id, "role": "creator"})
+    event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert len(statements) == 2
+    data = res.json()
+    assert [g["name"] for g in data] == [f"组{i}" for i in range(5)]
+    assert [g["user_ids"] for g in data] == [member_ids[:i] for i in range(5)]
+    assert [g["member_count"] for g in data] == list(range(5))
+
+    res = client.get("/api/groups", params={"user_id": owner_id, "role": "admin", "members": "count"})
+    counts = {g["name"]: (g["member_count"], g["user_ids"]) for g in res.json()}
+    assert counts["别人的组"] == (6, []) and counts["组0"] == (0, [])
+    assert client.get("/api/groups", params={"user_id": 1, "role": "admin", "members": "all"}).status_code == 400
@@ -0,0 +1,142 @@
+import io
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from backend import attachments, models
+
+
+def test_store_stream_deduplicates_by_content(tmp_path):
+    rel_a, size = attachments.store_stream(io.BytesIO(b"hello"), "a.PDF", upload_dir=str(tmp_path))
+    rel_b, _ = attachments.store_stream(io.BytesIO(b"hello"), "b.pdf", upload_dir=str(tmp_path))
+    rel_c, _ = attachments.store_stream(io.BytesIO(b"other"), "a.pdf", upload_dir=str(tmp_path))
+    assert size == 5
+    assert rel_a == rel_b and rel_a.endswith(".pdf")
+    assert rel_c != rel_a
+    stored = [f for _, _, files in os.walk(tmp_path) for f in files]
+    assert len(stored) == 2
+
+
+def test_store_stream_enforces_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(attachments, "CHUNK_SIZE", 4)
+    with pytest.raises(HTTPException) as exc:
+        attachments.store_stream(io.BytesIO(b"x" * 20), "big.bin", upload_dir=str(tmp_path), max_bytes=10)
+    assert exc.value.status_code == 413
+    # 临时文件已清理
+    assert os.listdir(tmp_path) == []
+
+
+def test_create_item_attachments(client, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(attachments, "UPLOAD_DIR", str(tmp_path))
+    user = models.User(username="att", name="附件", role="feedbacker")
+    db.add(user)
+    db.commit()
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    data = {"title": "附件", "deadline": deadline, "creator_id": user.id, "user_ids": json.dumps([user.id])}
+    res = client.post("/api/items", data=data, files=[
+        ("files", ("通知.docx", b"same", "application/octet-stream")),
+        ("files", ("副本.docx", b"same", "application/octet-stream")),
+    ])
+    assert res.status_code == 200
+    saved = json.loads(db.get(models.Item, res.json()["id"]).attachments)
+    assert [a["name"] for a in saved] == ["通知.docx", "副本.docx"]
+    assert saved[0]["path"] == saved[1]["path"]
+    assert saved[0]["path"].startswith("/api/uploads/")
+    assert os.path.exists(os.path.join(tmp_path, saved[0]["path"][len("/api/uploads/"):]))
+
+    monkeypatch.setattr(attachments, "MAX_UPLOAD_BYTES", 3)
+    res = client.post("/api/items", data=data, files=[("files", ("big.bin", b"toolarge", "application/octet-stream"))])
+    assert res.status_code == 413
+    assert db.query(models.Item).count() == 1
+
+
+def test_download_attachment_caching_and_ranges(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(attachments, "UPLOAD_DIR", str(tmp_path))
+    body = bytes(range(256)) * 40
+    rel, _ = attachments.store_stream(io.BytesIO(body), "报告.pdf", upload_dir=str(tmp_path))
+    url = f"/api/uploads/{rel}"
+
+    res = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert res.status_code == 200 and res.content == body
+    etag = res.headers["etag"]
+    assert etag == f'"{rel.split("/")[1].split(".")[0]}"'
+    assert "immutable" in res.headers["cache-control"]
+    assert res.headers["content-type"] == "application/pdf"
+    assert client.get(f"/uploads/{rel}").status_code == 200
+    # 无前缀只提供旧的下载路径
+    assert client.post("/upload_sessions", json={"filename": "a.pdf", "size": 1}).status_code == 404
+
+    res = client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 304 and res.headers["etag"] == etag
+
+    res = client.get(url, headers={"Range": "bytes=100-199", "Accept-Encoding": "identity"})
+    assert res.status_code == 206
+    assert res.content == body[100:200]
+    assert res.headers["content-range"] == f"bytes 100-199/{len(body)}"
+    res = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"', "Accept-Encoding": "identity"})
+    assert res.status_code == 200
+
+    # 预压缩副本
+    import gzip
+    with open(os.path.join(tmp_path, rel) + ".gz", "wb") as f:
+        f.write(gzip.compress(body))
+    res = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == 200 and res.content == body
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["etag"] == etag[:-1] + '-gzip"'
+    assert "Accept-Encoding" in res.headers["vary"]
+    res = client.get(url, headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9"})
+    assert res.status_code == 206 and "content-encoding" not in res.headers
+
+    # 旧的按文件名存放的文件需要重新验证
+    with open(os.path.join(tmp_path, "旧文件.txt"), "wb") as f:
+        f.write(b"legacy")
+    res = client.get("/api/uploads/旧文件.txt")
+    assert res.status_code == 200 and res.headers["cache-control"] == "no-cache"
+
+    assert client.get("/api/uploads/../conftest.py").status_code == 404
+    assert client.get("/api/uploads/%2e%2e/conftest.py").status_code == 404
+    assert client.get("/api/uploads/missing.pdf").status_code == 404
+
+
+def test_chunked_upload_session(client, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(attachments, "UPLOAD_DIR", str(tmp_path))
+    body = os.urandom(2500)
+    res = client.post("/api/upload_sessions", json={"filename": "大文件.pdf", "size": len(body)})
+    assert res.status_code == 200
+    sid = res.json()["id"]
+
+    chunks = [body[i:i + 1000] for i in range(0, len(body), 1000)]
+    assert client.put(f"/api/upload_sessions/{sid}/chunks/0", content=chunks[0]).json()["next_index"] == 1
+    # 重试已收到的分块不改变进度；跳过分块被拒绝
+    assert client.put(f"/api/upload_sessions/{sid}/chunks/0", content=chunks[0]).json()["received_bytes"] == 1000
+    assert client.put(f"/api/upload_sessions/{sid}/chunks/2", content=chunks[2]).status_code == 409
+    assert client.post(f"/api/upload_sessions/{sid}/finalize").status_code == 400
+    # 会话临时文件不对外提供
+    assert client.get(f"/api/uploads/.sessions/{sid}.part").status_code == 404
+    for index in (1, 2):
+        client.put(f"/api/upload_sessions/{sid}/chunks/{index}", content=chunks[index])
+    assert client.get(f"/api/upload_sessions/{sid}").json()["received_bytes"] == len(body)
+
+    res = client.post(f"/api/upload_sessions/{sid}/finalize")
+    assert res.json()["status"] == "finalized"
+    path = res.json()["path"]
+    assert client.get(path).content == body
+    assert client.post(f"/api/upload_sessions/{sid}/finalize").json()["path"] == path
+
+    user = models.User(username="chunk", name="分块", role="feedbacker")
+    db.add(user)
+    db.commit()
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+    data = {"title": "分块附件", "deadline": deadline, "creator_id": user.id, "user_ids": json.dumps([user.id])}
+    res = client.post("/api/items", data={**data, "upload_ids": json.dumps([sid])})
+    assert res.status_code == 200
+    saved = json.loads(db.get(models.Item, res.json()["id"]).attachments)
+    assert saved == [{"name": "大文件.pdf", "path": path}]
+    assert client.post("/api/items", data={**data, "upload_ids": json.dumps(["unknown"])}).status_code == 400
+
+    res = client.post("/api/upload_sessions", json={"filename": "x.bin", "size": attachments.MAX_UPLOAD_BYTES + 1})
+    assert res.status_code == 413
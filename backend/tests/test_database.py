@@ -0,0 +1,21 @@
+from sqlalchemy import text
+
+from backend.database import build_engine
+
+
+def test_production_profile_pragmas(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'p.db'}", profile="production")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+    assert engine.pool.size() == 10
+    engine.dispose()
+
+
+def test_legacy_profile_keeps_rollback_journal(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'l.db'}", profile="legacy")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    engine.dispose()
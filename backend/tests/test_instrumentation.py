@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+from backend import instrumentation, models, schemas
+from backend.feedback_writer import submit_feedbacks
+from backend.instrumentation import QueryBudgetExceeded, fingerprint, track
+
+
+def _item_with_assignees(db, n):
+    users = [models.User(username=f"i{i}", name=f"成员{i}", role="feedbacker") for i in range(n)]
+    db.add_all(users)
+    db.flush()
+    item = models.Item(title="t", deadline=datetime(2030, 1, 1), creator_id=users[0].id,
+                       status="ongoing", assigned_count=n)
+    db.add(item)
+    db.flush()
+    db.add_all([models.ItemUser(item_id=item.id, user_id=u.id, feedback_status="pending") for u in users])
+    db.commit()
+    return item, users
+
+
+def test_fingerprint_normalizes_literals_and_in_lists():
+    assert fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'a'") == \
+        fingerprint("SELECT *\n  FROM t WHERE id IN (?, ?) AND name = 'bb'")
+    assert fingerprint("SELECT * FROM t LIMIT 10") == "SELECT * FROM t LIMIT ?"
+
+
+def test_server_timing_and_report(client, db):
+    item, users = _item_with_assignees(db, 2)
+    client.delete("/api/debug/queries")
+
+    res = client.get("/api/todos", params={"user_id": users[0].id})
+    assert res.headers["x-query-count"] == "1"
+    assert res.headers["server-timing"].startswith('db;dur=')
+    assert 'desc="1 queries", app;dur=' in res.headers["server-timing"]
+    client.get(f"/api/items/{item.id}")
+    client.get("/api/items/999999")
+
+    report = client.get("/api/debug/queries").json()
+    assert report["requests"] == 3
+    by_endpoint = {r["endpoint"]: r for r in report["endpoints"]}
+    assert set(by_endpoint) == {"GET /api/todos", "GET /api/items/{item_id}"}
+    detail = by_endpoint["GET /api/items/{item_id}"]
+    assert detail["requests"] == 2 and detail["budget"] == 3 and detail["over_budget"] == 0
+    assert detail["slowest"].startswith("SELECT")
+
+
+def test_strict_mode_fails_over_budget(client, db, monkeypatch):
+    _, users = _item_with_assignees(db, 1)
+    monkeypatch.setitem(instrumentation.BUDGETS, "GET /api/todos", 0)
+    with pytest.raises(QueryBudgetExceeded, match="GET /api/todos"):
+        client.get("/api/todos", params={"user_id": users[0].id})
+
+
+def test_detects_repeated_statements(db):
+    _, users = _item_with_assignees(db, 6)
+    user_ids = [u.id for u in users]
+    with track() as stats:
+        for user_id in user_ids:
+            db.execute(select(models.ItemUser).where(models.ItemUser.user_id == user_id)).all()
+    assert stats.queries == 6
+    [(statement, count)] = stats.repeated()
+    assert count == 6 and "FROM item_users" in statement
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+        instrumentation.check_budget("GET /example", stats)
+
+
+def test_bulk_feedback_inserts_in_one_statement(db):
+    item, users = _item_with_assignees(db, 8)
+    ius = db.query(models.ItemUser).filter_by(item_id=item.id).order_by(models.ItemUser.id.desc()).all()
+    entries = [schemas.FeedbackCreate(item_user_id=iu.id, content=f"反馈{iu.id}") for iu in ius]
+    with track() as stats:
+        results = submit_feedbacks(db, entries)
+    db.commit()
+    inserts = [fp for fp, n in stats.fingerprints.items() for _ in range(n) if fp.startswith("INSERT INTO feedbacks")]
+    assert len(inserts) == 1
+    for r in results:
+        assert db.get(models.Feedback, r["feedback"]["id"]).item_user_id == r["item_user_id"]
+        assert r["feedback"]["content"] == f"反馈{r['item_user_id']}"
+
+
+def test_failed_statement_leaves_no_state_on_connection(db):
+    with track() as stats:
+        with pytest.raises(Exception):
+            db.execute(text("SELECT * FROM no_such_table")).all()
+        db.rollback()
+        db.execute(select(models.User.id)).all()
+    assert stats.queries == 1
+    assert "query_start" not in db.connection().info
+
+
+def test_headers_only_without_report():
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {}
+
+    # 默认（未设置 FEEDBACK_QUERY_REPORT）只写响应头，不记录报表
+    app.add_middleware(instrumentation.SQLInstrumentationMiddleware)
+    recorded = len(instrumentation.report.entries)
+    with TestClient(app) as c:
+        res = c.get("/ping")
+    assert res.headers["x-query-count"] == "0" and "server-timing" in res.headers
+    assert len(instrumentation.report.entries) == recorded
@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from backend.leader import FileLock, LeaderElector, exclusive
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 模拟一个 worker：参与选举，当选时记录自己的 PID
+WORKER = """
+import os, sys, time
+from backend.leader import LeaderElector
+
+def elected():
+    with open(sys.argv[1], "a") as f:
+        f.write(f"{os.getpid()}\\n")
+
+elector = LeaderElector(elected, lock_path=sys.argv[2], retry_seconds=0.05)
+elector.start()
+time.sleep(60)
+"""
+
+
+def _leaders(log):
+    return [int(line) for line in log.read_text().split()] if log.exists() else []
+
+
+def _wait_for(log, count, timeout=10):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        leaders = _leaders(log)
+        if len(leaders) >= count:
+            return leaders
+        time.sleep(0.05)
+    raise AssertionError(f"expected {count} elections, got {_leaders(log)}")
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / "s.lock")
+    first, second = FileLock(path), FileLock(path)
+    assert first.try_acquire() and not second.try_acquire()
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+
+def test_exclusive_serializes(tmp_path):
+    path = str(tmp_path / "m.lock")
+    order = []
+
+    def other():
+        with exclusive(path):
+            order.append("other")
+
+    with exclusive(path):
+        thread = threading.Thread(target=other)
+        thread.start()
+        time.sleep(0.2)
+        order.append("first")
+    thread.join()
+    assert order == ["first", "other"]
+
+
+def test_failed_start_releases_lock(tmp_path):
+    path = str(tmp_path / "s.lock")
+
+    def broken():
+        raise RuntimeError("scheduler failed")
+
+    with pytest.raises(RuntimeError):
+        LeaderElector(broken, lock_path=path).start()
+    assert FileLock(path).try_acquire()
+
+
+def test_one_leader_among_workers_with_failover(tmp_path):
+    log, lock = tmp_path / "leaders.log", tmp_path / "scheduler.lock"
+    env = {**os.environ, "PYTHONPATH": ROOT, "FEEDBACK_DB_PATH": str(tmp_path / "w.db")}
+    workers = [subprocess.Popen([sys.executable, "-c", WORKER, str(log), str(lock)], env=env) for _ in range(3)]
+    try:
+        leaders = _wait_for(log, 1)
+        time.sleep(0.5)
+        assert _leaders(log) == leaders
+
+        # 主进程崩溃后由另一个 worker 接管，且只有一个
+        leader = next(w for w in workers if w.pid == leaders[0])
+        leader.kill()
+        leader.wait()
+        leaders = _wait_for(log, 2)
+        assert leaders[1] != leaders[0] and leaders[1] in {w.pid for w in workers}
+        time.sleep(0.5)
+        assert len(_leaders(log)) == 2
+    finally:
+        for w in workers:
+            w.kill()
+            w.wait()
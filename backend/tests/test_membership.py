@@ -0,0 +1,94 @@
+from backend import membership, models
+
+
+def test_bitmap_roundtrip():
+    ids = [0, 1, 7, 8, 63, 64, 1000, 20000]
+    assert membership.from_bitmap(membership.to_bitmap(ids + [7, -1])) == ids
+    assert membership.to_bitmap([5, 10 ** 12], limit=100) == 1 << 5
+    assert membership.from_bitmap(0) == []
+
+
+def _setup(db):
+    users = [models.User(username=f"m{i}", name=f"成员{i}", role="feedbacker") for i in range(8)]
+    db.add_all(users)
+    db.commit()
+    a = models.Group(name="A", is_org=True, users=users[:5])
+    b = models.Group(name="B", users=users[3:7])
+    db.add_all([a, b])
+    db.commit()
+    return [u.id for u in users], a.id, b.id
+
+
+def test_resolve_selection(client, db):
+    ids, a, b = _setup(db)
+    res = client.post("/api/groups/resolve", json={"user_ids": [ids[7], ids[0], 99999], "group_ids": [a, b, 12345]})
+    assert res.json() == {"user_ids": ids, "count": 8}
+
+    res = client.post("/api/groups/resolve", json={"group_ids": [a], "intersect_group_ids": [b],
+                                                   "exclude_user_ids": [ids[4]]})
+    assert res.json() == {"user_ids": [ids[3]], "count": 1}
+
+    res = client.post("/api/groups/resolve", json={"group_ids": [a, b], "exclude_group_ids": [b], "count_only": True})
+    assert res.json() == {"user_ids": [], "count": 3}
+
+
+def test_index_rebuilds_after_membership_change(client, db):
+    ids, a, b = _setup(db)
+    first = membership.get_index(db)
+    assert membership.get_index(db) is first
+
+    group = db.get(models.Group, b)
+    group.users = group.users[:1]
+    db.commit()
+    assert membership.resolve_user_ids(db, group_ids=[b]) == [ids[3]]
+
+    # 分组成员变化后创建事项即按新成员分配
+    res = client.post("/api/items", data={
+        "title": "t", "deadline": "2030-01-01 00:00:00", "creator_id": ids[0],
+        "group_ids": f"[{b}]", "user_ids": f"[{ids[7]}]",
+    })
+    assert res.json()["assigned_count"] == 2
+
+
+def test_index_updates_incrementally(db, monkeypatch):
+    ids, a, b = _setup(db)
+    membership.get_index(db)
+    builds = []
+    real_build = membership.MembershipIndex.build.__func__
+    monkeypatch.setattr(membership.MembershipIndex, "build",
+                        classmethod(lambda cls, *args: builds.append(1) or real_build(cls, *args)))
+
+    group_b = db.get(models.Group, b)
+    group_b.users = group_b.users[1:]
+    newcomer = models.User(username="m8", name="新成员", role="feedbacker")
+    group_b.users.append(newcomer)
+    db.commit()
+    db.execute(models.User.__table__.delete().where(models.User.id == ids[4]))
+    db.get(models.User, ids[0]).name = "改名"
+    db.commit()
+
+    index = membership.get_index(db)
+    assert builds == []
+    assert membership.from_bitmap(index.resolve(group_ids=[b])) == ids[5:7] + [newcomer.id]
+    assert membership.from_bitmap(index.resolve(group_ids=[a])) == ids[:4]
+    # 与整体重建的结果一致
+    rebuilt = real_build(membership.MembershipIndex, db, index.stamp)
+    assert rebuilt.users == index.users
+    assert all(rebuilt.group_bitmap(g) == index.group_bitmap(g) for g in (a, b))
+
+
+def test_pruned_change_log_falls_back_to_rebuild(db, monkeypatch):
+    ids, a, b = _setup(db)
+    membership.get_index(db)
+    db.get(models.Group, a).users = []
+    db.get(models.Group, b).users = []
+    db.commit()
+    assert membership.prune_changes(db, keep=1) > 0
+    db.commit()
+
+    builds = []
+    real_build = membership.MembershipIndex.build.__func__
+    monkeypatch.setattr(membership.MembershipIndex, "build",
+                        classmethod(lambda cls, *args: builds.append(1) or real_build(cls, *args)))
+    assert membership.resolve_user_ids(db, group_ids=[a, b]) == []
+    assert builds == [1]
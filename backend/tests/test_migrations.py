@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+
+from backend.index_advisor import advise
+from backend.migrations import upgrade
+
+
+def test_upgrade_adds_indexes_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # 旧版本 feedback.db 的 item_users 表：无任何二级索引
+        conn.exec_driver_sql(
+            "CREATE TABLE item_users (id INTEGER PRIMARY KEY, item_id INTEGER, user_id INTEGER, "
+            "feedback_status VARCHAR, last_feedback_time DATETIME)"
+        )
+    changes = upgrade(engine)
+    assert "create index ix_item_users_user_status" in changes
+    names = {ix["name"] for ix in inspect(engine).get_indexes("item_users")}
+    assert {"ix_item_users_user_status", "ix_item_users_item_status"} <= names
+    # 再次执行应无变更
+    assert upgrade(engine) == []
+
+
+def test_index_advisor_router_queries_use_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    upgrade(engine)
+    with Session(engine) as db:
+        report = advise(db)
+    flagged = [(e["route"], e["query"]) for e in report if e["scans"]]
+    assert flagged == []
+
+
+def test_upgrade_backfills_item_counters(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old_items.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE items (id INTEGER PRIMARY KEY, title VARCHAR, description VARCHAR, status VARCHAR, "
+            "must_feedback BOOLEAN, deadline DATETIME, creator_id INTEGER, attachments VARCHAR, created_at DATETIME)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE item_users (id INTEGER PRIMARY KEY, item_id INTEGER, user_id INTEGER, "
+            "feedback_status VARCHAR, last_feedback_time DATETIME)"
+        )
+        conn.exec_driver_sql("INSERT INTO items (id, title, deadline) VALUES (1, 'old', '2000-01-01 00:00:00')")
+        conn.exec_driver_sql(
+            "INSERT INTO item_users (item_id, user_id, feedback_status) VALUES (1, 1, 'done'), (1, 2, 'completed'), (1, 3, 'pending')"
+        )
+    changes = upgrade(engine)
+    assert "add column items.done_count" in changes
+    assert "create fts items_fts" in changes
+    with engine.connect() as conn:
+        row = conn.exec_driver_sql("SELECT assigned_count, done_count, overdue_count FROM items").one()
+    assert tuple(row) == (3, 2, 1)
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import socketserver
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend import models, notifications
+from backend.notifications import Dispatcher, FileSink, SMTPSink, build_digests
+from backend.reminders import RETRY_DELAY, ReminderEngine
+
+DEADLINE = datetime(2030, 1, 2)
+
+
+def _reminders(n_users, per_user):
+    return [{"item_user_id": u * 100 + i, "item_id": i, "user_id": u, "deadline": DEADLINE + timedelta(hours=-i),
+             "title": f"事项{i}", "username": f"u{u}", "name": f"用户{u}"}
+            for u in range(n_users) for i in range(per_user)]
+
+
+class FlakySink:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def send(self, digest):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("temporary")
+        self.sent.append(digest)
+
+
+def test_digests_group_per_recipient():
+    rows = _reminders(3, 4)
+    digests = build_digests(rows + rows[:2])
+    assert len(digests) == 3
+    assert [len(d.reminders) for d in digests] == [4, 4, 4]
+    assert [r["item_id"] for r in digests[0].reminders] == [3, 2, 1, 0]
+
+
+def test_dispatcher_limits_concurrency_retries_and_dedupes():
+    sink = FlakySink(failures=2)
+    dispatcher = Dispatcher(sink, concurrency=4, backoff=0)
+    digests = build_digests(_reminders(20, 2))
+    stats = dispatcher.dispatch_sync(digests)
+    assert (stats["sent"], stats["failed"], stats["retries"], stats["reminders"]) == (20, 0, 2, 40)
+    assert sink.max_in_flight <= 4
+    # 同一摘要再次提交不重复发送
+    assert dispatcher.dispatch_sync(build_digests(_reminders(20, 2)))["deduped"] == 20
+    assert len(sink.sent) == 20
+
+
+def test_dispatcher_reports_permanent_failures():
+    dispatcher = Dispatcher(FlakySink(failures=100), retries=1, backoff=0)
+    stats = dispatcher.dispatch_sync(build_digests(_reminders(2, 1)))
+    assert stats["failed"] == 2 and stats["retries"] == 2
+    assert len(stats["failed_digests"]) == 2
+    # 失败的摘要可以重新提交
+    assert dispatcher.dispatch_sync(stats["failed_digests"])["deduped"] == 0
+
+
+def test_file_sink(tmp_path):
+    path = tmp_path / "out.jsonl"
+    Dispatcher(FileSink(str(path))).dispatch_sync(build_digests(_reminders(2, 3)))
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert sorted(r["username"] for r in records) == ["u0", "u1"]
+    assert len(records[0]["items"]) == 3
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    # 最小的 SMTP 接收端，记录收到的邮件
+    def handle(self):
+        self.wfile.write(b"220 localhost\r\n")
+        while line := self.rfile.readline():
+            cmd = line[:4].upper()
+            if cmd == b"DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                data = b""
+                while not data.endswith(b"\r\n.\r\n"):
+                    data += self.rfile.readline()
+                self.server.messages.append(data.decode())
+                self.wfile.write(b"250 ok\r\n")
+            elif cmd == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+def test_smtp_sink_against_local_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        sink = SMTPSink("127.0.0.1", server.server_address[1], domain="example.com")
+        stats = Dispatcher(sink, concurrency=2).dispatch_sync(build_digests(_reminders(3, 2)))
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert stats["sent"] == 3 and len(server.messages) == 3
+    assert any("To: u1@example.com" in m for m in server.messages)
+
+
+def test_failed_delivery_is_retried_by_engine(db):
+    user = models.User(username="n1", name="成员", role="feedbacker")
+    db.add(user)
+    db.commit()
+    now = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    item = models.Item(title="t", deadline=datetime(2030, 1, 1, 6), creator_id=user.id, status="ongoing")
+    db.add(item)
+    db.flush()
+    db.add(models.ItemUser(item_id=item.id, user_id=user.id, feedback_status="pending"))
+    db.commit()
+
+    attempts = []
+
+    def dispatch(reminders):
+        attempts.append(len(reminders))
+        return reminders if len(attempts) == 1 else []
+
+    engine = ReminderEngine(dispatch=dispatch)
+    assert engine.run(db, now) == []
+    assert db.query(models.Reminder).count() == 0
+    assert engine.run(db, now + RETRY_DELAY / 2) == []
+    assert len(engine.run(db, now + RETRY_DELAY)) == 1
+    assert attempts == [1, 1] and db.query(models.Reminder).count() == 1
+
+
+def test_deliver_uses_configured_sink(tmp_path, monkeypatch):
+    monkeypatch.setenv("FEEDBACK_NOTIFY_FILE", str(tmp_path / "n.jsonl"))
+    monkeypatch.setattr(notifications, "_dispatcher", None)
+    assert notifications.deliver(_reminders(2, 2)) == []
+    assert len((tmp_path / "n.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_engine_dispatches_after_commit(db, monkeypatch):
+    user = models.User(username="c1", name="成员", role="feedbacker")
+    db.add(user)
+    db.commit()
+    now = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    item = models.Item(title="t", deadline=datetime(2030, 1, 1, 6), creator_id=user.id, status="ongoing")
+    db.add(item)
+    db.flush()
+    db.add(models.ItemUser(item_id=item.id, user_id=user.id, feedback_status="pending"))
+    db.commit()
+
+    calls = []
+    engine = ReminderEngine(dispatch=lambda reminders: calls.append(db.in_transaction()))
+
+    # 提交失败：不分发，台账回滚，下一次运行重新装载后再发
+    def fail():
+        raise RuntimeError("disk I/O error")
+    monkeypatch.setattr(db, "commit", fail)
+    with pytest.raises(RuntimeError):
+        engine.run(db, now)
+    monkeypatch.undo()
+    assert calls == [] and db.query(models.Reminder).count() == 0
+
+    # 分发时台账已提交，不持有写事务
+    assert len(engine.run(db, now + timedelta(minutes=1))) == 1
+    assert calls == [False]
@@ -0,0 +1,51 @@
+from sqlalchemy import event
+
+from backend import models
+from backend.org_sync import sync_if_changed, sync_org_groups
+
+
+def _members(db):
+    return {g.name: sorted(u.username for u in g.users) for g in db.query(models.Group).filter_by(is_org=True)}
+
+
+def test_sync_org_computes_membership_diff(client, db):
+    users = [models.User(username=f"o{i}", name=f"员工{i}", role="feedbacker", group=g)
+             for i, g in enumerate(["研发部", "研发部", "市场部", None, ""])]
+    custom = models.Group(name="研发部", is_org=False, users=[users[3]])
+    stale = models.Group(name="已撤销部门", is_org=True, users=[users[0]])
+    db.add_all([*users, custom, stale])
+    db.commit()
+
+    res = client.post("/api/groups/sync_org").json()
+    assert res["created"] == 2 and res["created_groups"] == ["市场部", "研发部"]
+    assert res["members_added"] == 3 and res["members_removed"] == 0
+    assert res["total_org_groups"] == 3
+    assert _members(db) == {"研发部": ["o0", "o1"], "市场部": ["o2"], "已撤销部门": ["o0"]}
+    # 同名的自定义分组不受影响
+    db.refresh(custom)
+    assert [u.username for u in custom.users] == ["o3"]
+
+    # 调整部门：只移动变化的成员，语句数固定
+    users[1].group = "市场部"
+    db.commit()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    report = sync_org_groups(db)
+    db.commit()
+    event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert (report["created"], report["members_added"], report["members_removed"]) == (0, 1, 1)
+    assert len(statements) <= 5
+    db.expire_all()
+    assert _members(db) == {"研发部": ["o0"], "市场部": ["o1", "o2"], "已撤销部门": ["o0"]}
+
+
+def test_sync_if_changed_skips_unchanged_directory(db):
+    db.add(models.User(username="s1", name="员工", role="feedbacker", group="研发部"))
+    db.commit()
+    assert sync_if_changed(db)["members_added"] == 1
+    db.commit()
+    assert sync_if_changed(db) is None
+    db.add(models.User(username="s2", name="员工", role="feedbacker", group="研发部"))
+    db.commit()
+    assert sync_if_changed(db)["members_added"] == 1
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+
+from backend import models, reminders
+from backend.reminders import ReminderEngine, TimingWheel
+
+NOW = datetime(2030, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def test_timing_wheel_orders_and_keeps_later_laps():
+    wheel = TimingWheel(tick_seconds=60, slots=4)
+    wheel.advance(NOW)
+    wheel.add(NOW + timedelta(minutes=2), "b")
+    wheel.add(NOW + timedelta(minutes=1), "a")
+    wheel.add(NOW + timedelta(minutes=6), "later lap")
+    wheel.add(NOW - timedelta(minutes=30), "overdue")
+    assert wheel.advance(NOW) == [(NOW - timedelta(minutes=30), "overdue")]
+    assert [v for _, v in wheel.advance(NOW + timedelta(minutes=3))] == ["a", "b"]
+    assert wheel.size == 1
+    assert [v for _, v in wheel.advance(NOW + timedelta(minutes=6))] == ["later lap"]
+
+
+def _item(db, users, deadline, done=()):
+    item = models.Item(title="t", deadline=deadline.replace(tzinfo=None), creator_id=users[0].id, status="ongoing")
+    db.add(item)
+    db.flush()
+    db.add_all([models.ItemUser(item_id=item.id, user_id=u.id,
+                                feedback_status="done" if u in done else "pending") for u in users])
+    db.commit()
+    return item
+
+
+def test_engine_reminds_once_when_due(db):
+    users = [models.User(username=f"r{i}", name=f"成员{i}", role="feedbacker") for i in range(2)]
+    db.add_all(users)
+    db.commit()
+    soon = _item(db, users, NOW + timedelta(hours=3), done=users[1:])
+    later = _item(db, users, NOW + timedelta(hours=24, minutes=30))
+    _item(db, users, NOW - timedelta(hours=1))
+
+    sent = []
+    engine = ReminderEngine(dispatch=sent.extend)
+    # 首次运行：截止时间在 24 小时以内的待反馈分配提醒一次，已反馈与已截止的不提醒
+    assert [(r["item_id"], r["user_id"]) for r in engine.run(db, NOW)] == [(soon.id, users[0].id)]
+    db.commit()
+    assert engine.run(db, NOW + timedelta(minutes=10)) == []
+
+    # 运行之后新建、已在窗口内的事项在下一个 tick 提醒
+    new = _item(db, users[:1], NOW + timedelta(hours=2))
+    assert [r["item_id"] for r in engine.run(db, NOW + timedelta(minutes=11))] == [new.id]
+    # 到点（截止前 24 小时）才提醒
+    assert engine.run(db, NOW + timedelta(minutes=29)) == []
+    assert {r["item_id"] for r in engine.run(db, NOW + timedelta(minutes=30, seconds=5))} == {later.id}
+    db.commit()
+
+    # 进程重启：从水位线继续，台账保证不重复提醒
+    restarted = ReminderEngine(dispatch=sent.extend)
+    assert restarted.run(db, NOW + timedelta(minutes=31)) == []
+    db.commit()
+    assert db.query(models.Reminder).count() == len(sent) == 4
+    assert reminders.get_meta(db, reminders.ITEM_KEY) == new.id
+
+
+def test_delete_item_removes_reminders(client, db):
+    user = models.User(username="d1", name="成员", role="feedbacker")
+    db.add(user)
+    db.commit()
+    item = _item(db, [user], datetime.now(timezone.utc) + timedelta(hours=1))
+    ReminderEngine(dispatch=lambda r: None).run(db)
+    db.commit()
+    assert db.query(models.Reminder).count() == 1
+    assert client.delete(f"/api/items/{item.id}").status_code == 200
+    assert db.query(models.Reminder).count() == 0
+
+
+def _move_deadline(client, item, deadline):
+    res = client.put(f"/api/items/{item.id}", json={
+        "title": item.title, "deadline": deadline.replace(tzinfo=None).isoformat(), "creator_id": item.creator_id,
+    })
+    assert res.status_code == 200
+
+
+def test_deadline_moved_earlier_into_processed_window(client, db):
+    user = models.User(username="e1", name="成员", role="feedbacker")
+    db.add(user)
+    db.commit()
+    item = _item(db, [user], NOW + timedelta(hours=30))
+    engine = ReminderEngine(dispatch=lambda r: None)
+    assert engine.run(db, NOW) == []
+    db.commit()
+
+    # 新的提醒时刻早于已处理的水位线：下一个 tick 立即提醒
+    _move_deadline(client, item, NOW + timedelta(hours=2))
+    assert [r["item_id"] for r in engine.run(db, NOW + timedelta(minutes=1))] == [item.id]
+    db.commit()
+    assert db.query(models.ReminderReschedule).count() == 0
+
+
+def test_deadline_moved_later_does_not_fire_early(client, db):
+    user = models.User(username="l1", name="成员", role="feedbacker")
+    db.add(user)
+    db.commit()
+    item = _item(db, [user], NOW + timedelta(hours=24, minutes=30))
+    engine = ReminderEngine(dispatch=lambda r: None)
+    engine.run(db, NOW)
+    db.commit()
+
+    # 时间轮中已有按旧截止时间（NOW + 30 分钟）的条目
+    _move_deadline(client, item, NOW + timedelta(hours=48))
+    assert engine.run(db, NOW + timedelta(minutes=31)) == []
+    db.commit()
+    assert engine.run(db, NOW + timedelta(hours=23, minutes=59)) == []
+    assert [r["item_id"] for r in engine.run(db, NOW + timedelta(hours=24, minutes=1))] == [item.id]
+    db.commit()
+
+    # 已提醒后再推迟：按新的截止时间再提醒一次
+    _move_deadline(client, item, NOW + timedelta(hours=72))
+    assert engine.run(db, NOW + timedelta(hours=24, minutes=2)) == []
+    assert [r["item_id"] for r in engine.run(db, NOW + timedelta(hours=48, minutes=1))] == [item.id]
+
+
+def test_failed_reminder_is_resent_after_restart(db):
+    user = models.User(username="f1", name="成员", role="feedbacker")
+    db.add(user)
+    db.commit()
+    item = _item(db, [user], NOW + timedelta(hours=6))
+    ReminderEngine(dispatch=lambda reminders: reminders).run(db, NOW)
+    assert db.query(models.Reminder).count() == 0
+    assert db.query(models.ReminderReschedule).one().retry_at == (NOW + reminders.RETRY_DELAY).replace(tzinfo=None)
+
+    # 重试前进程重启（或调度主节点切换）：重试登记在库中，到点后由新的引擎发出
+    sent = []
+    restarted = ReminderEngine(dispatch=sent.extend)
+    assert restarted.run(db, NOW + timedelta(minutes=1)) == []
+    assert [r["item_id"] for r in restarted.run(db, NOW + reminders.RETRY_DELAY)] == [item.id]
+    assert len(sent) == 1 and db.query(models.Reminder).count() == 1
+    assert db.query(models.ReminderReschedule).count() == 0
+    assert restarted.run(db, NOW + timedelta(hours=2)) == []
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from backend import models
+from backend.search import search_items
+
+
+def _item(db, title, description=""):
+    item = models.Item(title=title, description=description, deadline=datetime(2030, 1, 1), creator_id=1)
+    db.add(item)
+    db.commit()
+    return item
+
+
+def test_fts_tracks_create_update_delete(db):
+    a = _item(db, "年度预算编制通知", "请各部门提交")
+    b = _item(db, "安全检查", "年度预算执行情况复核")
+    assert {i.id for i in search_items(db, "年度预算")} == {a.id, b.id}
+
+    a.title = "季度总结"
+    db.commit()
+    assert [i.id for i in search_items(db, "年度预算")] == [b.id]
+
+    db.delete(b)
+    db.commit()
+    assert search_items(db, "年度预算") == []
+    assert [i.id for i in search_items(db, "季度总")] == [a.id]
+
+
+def test_short_keyword_falls_back_to_like(db):
+    a = _item(db, "的确如此")
+    _item(db, "其他")
+    assert [i.id for i in search_items(db, "的")] == [a.id]
+
+
+def test_read_items_full_text_query(client, db):
+    a = _item(db, "消防演练安排")
+    b = _item(db, "演练总结", "消防演练安排的复盘")
+    _item(db, "无关事项")
+    res = client.get("/api/items", params={"title_like": "消防演练"}).json()
+    assert [it["id"] for it in res["items"]] == [a.id]
+    res = client.get("/api/items", params={"q": "消防演练", "sort_by": "relevance"}).json()
+    assert res["total"] == 2
+    assert {it["id"] for it in res["items"]} == {a.id, b.id}
+
+
+def test_fts_check_cached_and_unlimited_search(db):
+    from backend.instrumentation import track
+    items = [_item(db, f"年度预算{i}") for i in range(25)]
+    search_items(db, "年度预算")
+    with track() as stats:
+        assert len(search_items(db, "年度预算")) == 20
+    # 全文索引是否安装按引擎缓存，只执行搜索本身这一条查询
+    assert stats.queries == 1
+    assert {i.id for i in search_items(db, "年度预算", limit=None)} == {i.id for i in items}
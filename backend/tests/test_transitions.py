@@ -0,0 +1,121 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from backend import models, transitions
+
+NOW = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _users(db, n):
+    users = [models.User(username=f"t{i}", name=f"成员{i}", role="feedbacker") for i in range(n)]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def _item(db, users, deadline, statuses):
+    item = models.Item(title="t", deadline=deadline.replace(tzinfo=None), creator_id=users[0].id,
+                       status="ongoing", assigned_count=len(statuses),
+                       done_count=sum(s == "done" for s in statuses))
+    db.add(item)
+    db.flush()
+    db.add_all([models.ItemUser(item_id=item.id, user_id=u.id, feedback_status=s) for u, s in zip(users, statuses)])
+    db.commit()
+    return item
+
+
+def test_mark_overdue_is_incremental(db):
+    users = _users(db, 3)
+    past = _item(db, users, NOW - timedelta(hours=1), ["pending", "done", "pending"])
+    later = _item(db, users, NOW + timedelta(hours=1), ["pending", "pending", "pending"])
+
+    assert transitions.mark_overdue(db, NOW) == {"assignments_marked": 2, "items_updated": 1}
+    db.commit()
+    db.refresh(past)
+    assert past.overdue_count == 2
+    statuses = sorted(iu.feedback_status for iu in db.query(models.ItemUser).filter_by(item_id=past.id))
+    assert statuses == ["done", "overdue", "overdue"]
+    # 再次运行只处理水位线之后到期的事项
+    assert transitions.mark_overdue(db, NOW + timedelta(minutes=5)) == {"assignments_marked": 0, "items_updated": 0}
+    assert transitions.mark_overdue(db, NOW + timedelta(hours=2)) == {"assignments_marked": 3, "items_updated": 1}
+    db.commit()
+    db.refresh(later)
+    assert later.overdue_count == 3
+
+
+def test_feedback_on_overdue_assignment_updates_counters(client, db):
+    users = _users(db, 2)
+    item = _item(db, users, NOW - timedelta(days=1), ["pending", "pending"])
+    transitions.mark_overdue(db, NOW)
+    db.commit()
+    ius = db.query(models.ItemUser).filter_by(item_id=item.id).order_by(models.ItemUser.id).all()
+
+    client.post("/api/feedbacks", json={"item_user_id": ius[0].id, "content": "迟到"})
+    client.post("/api/feedbacks/bulk", json={"entries": [{"item_user_id": ius[1].id, "content": "迟到"}]})
+    data = client.get(f"/api/items/{item.id}").json()["item"]
+    assert (data["done_count"], data["overdue_count"], data["status"]) == (2, 0, "finished")
+
+
+def test_todos_include_overdue_by_default(client, db):
+    users = _users(db, 1)
+    overdue = _item(db, users, NOW - timedelta(days=1), ["pending"])
+    upcoming = _item(db, users, NOW + timedelta(days=1), ["pending"])
+    transitions.mark_overdue(db, NOW)
+    db.commit()
+
+    todos = client.get("/api/todos", params={"user_id": users[0].id}).json()
+    assert [(t["id"], t["feedback_status"]) for t in todos] == [(overdue.id, "overdue"), (upcoming.id, "pending")]
+    pending = client.get("/api/todos", params={"user_id": users[0].id, "status": "pending"}).json()
+    assert [t["id"] for t in pending] == [upcoming.id]
+
+
+def test_create_item_with_past_deadline_is_overdue(client, db):
+    users = _users(db, 2)
+    res = client.post("/api/items", data={
+        "title": "补录", "deadline": "2000-01-01 00:00:00", "creator_id": users[0].id,
+        "user_ids": json.dumps([u.id for u in users]),
+    })
+    assert (res.json()["assigned_count"], res.json()["overdue_count"]) == (2, 2)
+    assert {iu.feedback_status for iu in db.query(models.ItemUser)} == {"overdue"}
+
+
+def test_close_expired(db):
+    users = _users(db, 1)
+    old = _item(db, users, NOW - timedelta(days=8), ["pending"])
+    recent = _item(db, users, NOW - timedelta(days=1), ["pending"])
+    finished = _item(db, users, NOW - timedelta(days=9), ["done"])
+    finished.status = "finished"
+    db.commit()
+
+    assert transitions.close_expired(db, NOW, after=None) is None
+    assert transitions.close_expired(db, NOW, after=timedelta(days=7)) == 1
+    assert transitions.close_expired(db, NOW + timedelta(hours=1), after=timedelta(days=7)) == 0
+    db.commit()
+    assert [db.get(models.Item, i.id).status for i in (old, recent, finished)] == ["closed", "ongoing", "finished"]
+
+
+def test_deadline_change_rederives_overdue(client, db):
+    users = _users(db, 3)
+    item = _item(db, users, datetime.now(timezone.utc) - timedelta(days=1), ["pending", "pending", "done"])
+    transitions.mark_overdue(db)
+    db.commit()
+    assert db.get(models.Item, item.id).overdue_count == 2
+
+    def move(deadline):
+        res = client.put(f"/api/items/{item.id}", json={
+            "title": "t", "deadline": deadline.replace(tzinfo=None).isoformat(), "creator_id": users[0].id,
+        })
+        assert res.status_code == 200
+        return res.json()
+
+    # 推迟到未来：已逾期的分配恢复为待反馈，已反馈的不变
+    data = move(datetime.now(timezone.utc) + timedelta(days=2))
+    assert (data["overdue_count"], data["done_count"]) == (0, 1)
+    todos = client.get("/api/todos", params={"user_id": users[0].id}).json()
+    assert [t["feedback_status"] for t in todos] == ["pending"]
+
+    # 提前到逾期水位线之前：调度任务不会再处理，修改时直接置为逾期
+    data = move(datetime.now(timezone.utc) - timedelta(days=3))
+    assert data["overdue_count"] == 2
+    statuses = sorted(iu.feedback_status for iu in db.query(models.ItemUser).filter_by(item_id=item.id))
+    assert statuses == ["done", "overdue", "overdue"]
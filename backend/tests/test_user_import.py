@@ -0,0 +1,63 @@
+from backend import models, user_import
+
+CSV = (
+    "username,name,password,role,group\n"
+    "u1,张一,,feedbacker,研发部\n"
+    "u2,张二,,feedbacker,研发部\n"
+    "u3,张三,secret,creator,市场部\n"
+    "u1,重复,,feedbacker,研发部\n"
+    "u4,无分组,,feedbacker,\n"
+    "old,旧用户,,feedbacker,市场部\n"
+)
+
+
+def _fast_hash(monkeypatch):
+    calls = []
+
+    def fake_hash(password):
+        calls.append(password)
+        return f"hash:{password}"
+    monkeypatch.setattr(user_import, "get_password_hash", fake_hash)
+    return calls
+
+
+def test_import_groups_sync(client, db, monkeypatch):
+    calls = _fast_hash(monkeypatch)
+    db.add(models.User(username="old", name="旧用户", role="feedbacker", password_hash="x"))
+    db.add(models.Group(name="市场部", is_org=True))
+    db.commit()
+
+    res = client.post("/api/groups/import", files={"file": ("users.csv", CSV.encode("utf-8-sig"), "text/csv")})
+    assert res.status_code == 200
+    assert res.json() == {"rows_processed": 6, "users_created": 3, "users_skipped": 1,
+                          "groups_created": 1, "memberships_added": 4}
+    # 相同的默认密码只计算一次
+    assert sorted(calls) == ["admin", "secret"]
+    users = {u.username: u for u in db.query(models.User)}
+    assert users["u1"].name == "张一" and users["u1"].password_hash == "hash:admin"
+    assert "u4" not in users and users["old"].password_hash == "x"
+    groups = {g.name: sorted(u.username for u in g.users) for g in db.query(models.Group)}
+    assert groups == {"研发部": ["u1", "u2"], "市场部": ["old", "u3"]}
+
+    # 重复导入不产生新数据
+    res = client.post("/api/groups/import", files={"file": ("users.csv", CSV.encode("utf-8-sig"), "text/csv")})
+    assert res.json()["users_created"] == 0 and res.json()["memberships_added"] == 0
+
+
+def test_import_groups_background_job(client, db, monkeypatch):
+    _fast_hash(monkeypatch)
+    res = client.post("/api/groups/import", params={"background": True},
+                      files={"file": ("users.csv", CSV.encode("utf-8"), "text/csv")})
+    job_id = res.json()["job_id"]
+    # TestClient 在返回前已执行完后台任务
+    job = client.get(f"/api/import_jobs/{job_id}").json()
+    assert job["status"] == "finished" and job["phase"] == "done"
+    assert job["total_rows"] == 6 and job["processed"] == job["total_new"] == 4
+    assert job["result"]["users_created"] == 4
+    assert client.get("/api/import_jobs/unknown").status_code == 404
+
+
+def test_hash_passwords_parallel_dedup():
+    hashes = user_import.hash_passwords(["a", "b", "a"], workers=2)
+    assert set(hashes) == {"a", "b"}
+    assert all(h.startswith("$2") for h in hashes.values())
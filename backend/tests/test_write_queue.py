@@ -0,0 +1,93 @@
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from backend import models, schemas
+from backend.database import Base, build_engine
+from backend.write_queue import CommitTimeout, GroupCommitQueue, QueueFull
+
+
+def _setup(tmp_path, n):
+    engine = build_engine(f"sqlite:///{tmp_path / 'gc.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    db = factory()
+    db.add(models.User(username="u", name="u", role="feedbacker"))
+    item = models.Item(title="t", deadline=datetime(2030, 1, 1), creator_id=1, assigned_count=n)
+    db.add(item)
+    db.flush()
+    ius = [models.ItemUser(item_id=item.id, user_id=1) for _ in range(n)]
+    db.add_all(ius)
+    db.commit()
+    ids = [iu.id for iu in ius]
+    db.close()
+    return engine, factory, ids
+
+
+def test_concurrent_submissions_are_grouped(tmp_path):
+    engine, factory, ids = _setup(tmp_path, 50)
+    q = GroupCommitQueue(factory, max_wait_ms=20)
+    results = {}
+
+    def worker(iu_id):
+        results[iu_id] = q.submit(schemas.FeedbackCreate(item_user_id=iu_id, content="ok"))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    q.stop()
+
+    assert all(r["status"] == "created" for r in results.values())
+    assert q.metrics["entries"] == 50
+    assert q.metrics["batches"] < 50
+    with factory() as db:
+        assert db.query(models.Feedback).count() == 50
+        item = db.query(models.Item).one()
+        assert (item.done_count, item.status) == (50, "finished")
+    engine.dispose()
+
+
+def test_full_queue_rejects(tmp_path):
+    engine, factory, ids = _setup(tmp_path, 1)
+    q = GroupCommitQueue(factory, max_depth=1, submit_timeout=0.01)
+    # 不启动后台线程，直接占满队列
+    q.start = lambda: None
+    q._queue.put(("occupied", None))
+    with pytest.raises(QueueFull):
+        q.submit(schemas.FeedbackCreate(item_user_id=ids[0], content="x"))
+    assert q.metrics["rejected"] == 1
+    engine.dispose()
+
+
+def test_hung_writer_times_out(tmp_path):
+    engine, factory, ids = _setup(tmp_path, 1)
+    q = GroupCommitQueue(factory, result_timeout=0.2)
+    release = threading.Event()
+    q._write = lambda batch: release.wait()
+    with pytest.raises(CommitTimeout):
+        q.submit(schemas.FeedbackCreate(item_user_id=ids[0], content="x"))
+    assert q.metrics["timeouts"] == 1
+    release.set()
+    engine.dispose()
+
+
+def test_dead_writer_is_reported_and_restarted(tmp_path):
+    engine, factory, ids = _setup(tmp_path, 1)
+    q = GroupCommitQueue(factory, result_timeout=5)
+    # 模拟写入线程已退出：线程在取走条目前结束
+    real_run = q._run
+    q._run = lambda: None
+    with pytest.raises(CommitTimeout, match="已退出"):
+        q.submit(schemas.FeedbackCreate(item_user_id=ids[0], content="x"))
+    q._run = real_run
+    q.start()
+    # 重新启动的线程处理队列中的条目，后续提交正常
+    assert q.submit(schemas.FeedbackCreate(item_user_id=ids[0], content="y"))["status"] == "created"
+    q.stop()
+    with factory() as db:
+        assert db.query(models.Feedback).count() == 2
+    engine.dispose()
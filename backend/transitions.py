@@ -0,0 +1,100 @@
+"""
+分配与事项的状态迁移（调度任务，每步一条集合 UPDATE）
+- mark_overdue：截止时间已过仍为 'pending' 的分配置为 'overdue'，并按状态重算这些事项的 overdue_count
+- close_expired：截止超过 FEEDBACK_AUTO_CLOSE_HOURS 小时仍在进行中的事项置为 'closed'（未设置时不启用）
+两者都以 app_meta 中的水位线限定 items.deadline 的范围（索引范围扫描），每次只处理上次运行之后到期的事项。
+创建事项时截止时间已过的分配直接写为 'overdue'，修改截止时间时由 rederive_overdue 按新的截止时间重新判定，
+二者都不依赖水位线。
+读路径据此按存储的状态过滤（如待办默认包含已逾期），不再在读取时逐行比较截止时间。
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, func, update
+try:
+    from . import models
+    from .counters import OVERDUE_STATUS, recompute_item_counters
+    from .meta import get_meta, set_meta, to_epoch, from_epoch
+except (ImportError, ValueError):
+    import models
+    from counters import OVERDUE_STATUS, recompute_item_counters
+    from meta import get_meta, set_meta, to_epoch, from_epoch
+
+OVERDUE_KEY = "overdue_until"
+CLOSE_KEY = "auto_close_until"
+CLOSED_STATUS = "closed"
+_close_hours = os.environ.get("FEEDBACK_AUTO_CLOSE_HOURS")
+AUTO_CLOSE_AFTER = timedelta(hours=float(_close_hours)) if _close_hours else None
+
+
+def _deadline_window(db, key, until):
+    since = from_epoch(get_meta(db, key) or 0)
+    item = models.Item.__table__.c
+    return item.deadline > since, item.deadline <= until
+
+
+def mark_overdue(db, now=None):
+    """
+    返回 {"assignments_marked": 置为逾期的分配数, "items_updated": 重算计数的事项数}；不负责提交
+    """
+    now = now or datetime.now(timezone.utc)
+    items, item_users = models.Item.__table__, models.ItemUser.__table__
+    window = _deadline_window(db, OVERDUE_KEY, now)
+    expired = select(items.c.id).where(*window)
+    marked = db.execute(
+        update(item_users)
+        .where(item_users.c.feedback_status == "pending", item_users.c.item_id.in_(expired))
+        .values(feedback_status=OVERDUE_STATUS)
+    ).rowcount
+    updated = db.execute(
+        update(items).where(*window).values(overdue_count=(
+            select(func.count(item_users.c.id))
+            .where(item_users.c.item_id == items.c.id, item_users.c.feedback_status == OVERDUE_STATUS)
+            .scalar_subquery()
+        ))
+    ).rowcount
+    set_meta(db, OVERDUE_KEY, to_epoch(now))
+    return {"assignments_marked": marked, "items_updated": updated}
+
+
+def rederive_overdue(db, item_id, deadline, now=None):
+    """
+    事项截止时间修改后调用（同一事务内）：未反馈的分配按新的截止时间在 'pending' / 'overdue' 之间切换，
+    并重算该事项的计数。截止时间提前到水位线之前时调度任务不会再处理它，推迟时已逾期的分配需要恢复
+    返回切换的分配数；不负责提交
+    """
+    now = now or datetime.now(timezone.utc)
+    overdue = to_epoch(deadline) <= to_epoch(now)
+    src, dst = ("pending", OVERDUE_STATUS) if overdue else (OVERDUE_STATUS, "pending")
+    item_users = models.ItemUser.__table__
+    changed = db.execute(
+        update(item_users)
+        .where(item_users.c.item_id == item_id, item_users.c.feedback_status == src)
+        .values(feedback_status=dst)
+    ).rowcount
+    recompute_item_counters(db, [item_id])
+    return changed
+
+
+def close_expired(db, now=None, after=AUTO_CLOSE_AFTER):
+    """
+    返回关闭的事项数；未启用自动关闭时返回 None。不负责提交
+    """
+    if after is None:
+        return None
+    now = now or datetime.now(timezone.utc)
+    items = models.Item.__table__
+    cutoff = now - after
+    closed = db.execute(
+        update(items)
+        .where(*_deadline_window(db, CLOSE_KEY, cutoff), items.c.status == "ongoing")
+        .values(status=CLOSED_STATUS)
+    ).rowcount
+    set_meta(db, CLOSE_KEY, to_epoch(cutoff))
+    return closed
+
+
+def apply_transitions(db, now=None):
+    now = now or datetime.now(timezone.utc)
+    report = mark_overdue(db, now)
+    report["items_closed"] = close_expired(db, now)
+    return report
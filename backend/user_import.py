@@ -0,0 +1,162 @@
+"""
+批量导入用户（CSV）
+- 一次查询预取已存在的用户名，文件内重复的用户名只取第一行
+- 密码哈希（bcrypt）并行计算：bcrypt 计算期间释放 GIL，线程池即可占满多核，
+  且不必在服务进程中 fork 子进程；相同的明文密码（如统一的默认密码）只计算一次并复用
+- 用户、分组与分组成员均以 INSERT ... ON CONFLICT DO NOTHING 批量写入
+- 可作为后台任务运行，进度写入 import_jobs 表，任何工作进程都能查询；后台任务按批次提交，
+  同步调用时整个导入在调用方的一个事务内完成
+
+导入规则与原实现一致：已存在的用户不修改，只补充分组关联；link_groups=True 时缺少分组的行被跳过。
+"""
+import csv
+import io
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+try:
+    from . import models
+    from .auth import get_password_hash
+except (ImportError, ValueError):
+    import models
+    from auth import get_password_hash
+
+HASH_WORKERS = int(os.environ.get("FEEDBACK_IMPORT_HASH_WORKERS", os.cpu_count() or 1))
+WRITE_BATCH_SIZE = 1000
+
+
+def parse_csv(content, default_password):
+    """
+    解析 CSV 文本，返回规范化的行：{username, name, password, role, group}
+    """
+    rows = []
+    for row in csv.DictReader(io.StringIO(content)):
+        username = (row.get("username") or "").strip()
+        rows.append({
+            "username": username,
+            "name": row.get("name") or username,
+            "password": row.get("password") or default_password,
+            "role": row.get("role") or "feedbacker",
+            "group": row.get("group") or row.get("group_name") or "",
+        })
+    return rows
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    计算 {明文: 哈希}；每个不同的明文只计算一次，多个时并行计算
+    """
+    unique = list(dict.fromkeys(passwords))
+    workers = HASH_WORKERS if workers is None else workers
+    if workers <= 1 or len(unique) <= 1:
+        return {p: get_password_hash(p) for p in unique}
+    with ThreadPoolExecutor(max_workers=min(workers, len(unique)), thread_name_prefix="password-hash") as pool:
+        return dict(zip(unique, pool.map(get_password_hash, unique)))
+
+
+def _chunks(items, size=WRITE_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def import_users(db, rows, owner_id=None, link_groups=False, progress=None, workers=None):
+    """
+    在调用方事务内导入用户，返回统计；不负责提交
+    progress(phase, processed, total) 在各阶段及每个写入批次后回调，后台任务借此更新进度并提交
+    """
+    report = {"rows_processed": len(rows), "users_created": 0, "users_skipped": 0,
+              "groups_created": 0, "memberships_added": 0}
+    notify = progress or (lambda *args: None)
+
+    seen = set()
+    valid = []
+    for row in rows:
+        if not row["username"] or (link_groups and not row["group"]) or row["username"] in seen:
+            continue
+        seen.add(row["username"])
+        valid.append(row)
+
+    existing = set(db.execute(select(models.User.username)).scalars())
+    new_rows = [r for r in valid if r["username"] not in existing]
+    report["users_skipped"] = len(valid) - len(new_rows)
+
+    notify("hashing", 0, len(new_rows))
+    hashes = hash_passwords([r["password"] for r in new_rows], workers)
+
+    now = datetime.now(timezone.utc)
+    insert_users = sqlite_insert(models.User.__table__).on_conflict_do_nothing(index_elements=["username"])
+    written = 0
+    for batch in _chunks(new_rows):
+        result = db.execute(insert_users, [
+            {"username": r["username"], "name": r["name"], "password_hash": hashes[r["password"]],
+             "role": r["role"], "group": r["group"], "created_at": now}
+            for r in batch
+        ])
+        report["users_created"] += max(result.rowcount, 0)
+        written += len(batch)
+        notify("writing", written, len(new_rows))
+
+    if link_groups and valid:
+        names = sorted({r["group"] for r in valid})
+        # 同名分组取最早创建的一个（与原实现的 .first() 一致）
+        by_name = select(models.Group.name, models.Group.id).where(models.Group.name.in_(names))\
+            .order_by(models.Group.id.desc())
+        groups = dict(db.execute(by_name).all())
+        missing = [n for n in names if n not in groups]
+        if missing:
+            db.execute(models.Group.__table__.insert(),
+                       [{"name": n, "is_org": True, "owner_id": owner_id, "created_at": now} for n in missing])
+            report["groups_created"] = len(missing)
+            groups = dict(db.execute(by_name).all())
+        user_ids = {}
+        for batch in _chunks([r["username"] for r in valid], 5000):
+            user_ids.update(db.execute(
+                select(models.User.username, models.User.id).where(models.User.username.in_(batch))
+            ).all())
+        links = [{"group_id": groups[r["group"]], "user_id": user_ids[r["username"]]} for r in valid]
+        insert_links = sqlite_insert(models.group_users).on_conflict_do_nothing()
+        for batch in _chunks(links):
+            result = db.execute(insert_links, batch)
+            report["memberships_added"] += max(result.rowcount, 0)
+    notify("done", len(new_rows), len(new_rows))
+    return report
+
+
+# ---- 后台任务 ----
+
+def create_job(db, total_rows):
+    job = models.ImportJob(id=uuid.uuid4().hex, status="queued", total_rows=total_rows)
+    db.add(job)
+    db.commit()
+    return job
+
+
+def run_job(session_factory, job_id, rows, owner_id=None, link_groups=False):
+    """
+    在独立会话中执行导入；每个写入批次与进度一起提交（插入均为 ON CONFLICT DO NOTHING，中断后可重新导入）
+    """
+    db = session_factory()
+
+    def progress(phase, processed, total):
+        db.query(models.ImportJob).filter(models.ImportJob.id == job_id).update(
+            {"status": "running", "phase": phase, "processed": processed, "total_new": total,
+             "updated_at": datetime.now(timezone.utc)})
+        db.commit()
+
+    try:
+        report = import_users(db, rows, owner_id=owner_id, link_groups=link_groups, progress=progress)
+        db.query(models.ImportJob).filter(models.ImportJob.id == job_id).update(
+            {"status": "finished", "phase": "done", "result": json.dumps(report),
+             "updated_at": datetime.now(timezone.utc)})
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        db.query(models.ImportJob).filter(models.ImportJob.id == job_id).update(
+            {"status": "failed", "error": str(exc), "updated_at": datetime.now(timezone.utc)})
+        db.commit()
+    finally:
+        db.close()
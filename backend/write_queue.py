@@ -0,0 +1,173 @@
+"""
+反馈写入的组提交队列 (Group Commit)
+截止时间前的提交高峰中，每个 create_feedback 单独提交意味着每次都要获取写锁并刷盘。
+开启后，并发请求的反馈先进入进程内有界队列，由后台线程在几毫秒的窗口内收集成一批，
+以一个事务（feedback_writer.submit_feedbacks）提交；每个调用方在事务持久化之后才拿到结果。
+
+配置（环境变量）：
+- FEEDBACK_GROUP_COMMIT=1                 开启（默认关闭，直接提交）
+- FEEDBACK_GROUP_COMMIT_WAIT_MS=5          收集窗口
+- FEEDBACK_GROUP_COMMIT_MAX_BATCH=256      单批最大条数
+- FEEDBACK_GROUP_COMMIT_DEPTH=2000         队列容量，满时在 FEEDBACK_GROUP_COMMIT_TIMEOUT 秒后拒绝（503）
+- FEEDBACK_GROUP_COMMIT_RESULT_TIMEOUT=30  等待所在批次提交的上限，超时或写入线程已退出时返回 503，
+                                          请求线程不会无限阻塞
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+try:
+    from .database import SessionLocal
+    from .feedback_writer import submit_feedbacks
+except (ImportError, ValueError):
+    from database import SessionLocal
+    from feedback_writer import submit_feedbacks
+
+GROUP_COMMIT_ENABLED = os.environ.get("FEEDBACK_GROUP_COMMIT", "0") == "1"
+
+
+class QueueFull(Exception):
+    """队列已满（背压），调用方应稍后重试"""
+
+
+class CommitTimeout(Exception):
+    """未在期限内拿到结果（写入线程卡住或已退出）；该条反馈可能已经写入，也可能没有"""
+
+
+RESULT_POLL_SECONDS = 0.5
+
+
+class GroupCommitQueue:
+    def __init__(self, session_factory=SessionLocal, max_wait_ms=5, max_batch=256, max_depth=2000, submit_timeout=1.0,
+                 result_timeout=30.0):
+        self.session_factory = session_factory
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.submit_timeout = submit_timeout
+        self.result_timeout = result_timeout
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self.metrics = {"batches": 0, "entries": 0, "rejected": 0, "failed_batches": 0, "timeouts": 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="feedback-group-commit", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5):
+        """处理完已入队的条目后停止"""
+        self._stopping = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, entry):
+        """
+        提交一条 schemas.FeedbackCreate，阻塞至所在批次提交完成，返回 submit_feedbacks 的单条结果
+        """
+        self.start()
+        future = Future()
+        try:
+            self._queue.put((entry, future), timeout=self.submit_timeout)
+        except queue.Full:
+            self.metrics["rejected"] += 1
+            raise QueueFull()
+        deadline = time.monotonic() + self.result_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                return future.result(timeout=max(min(remaining, RESULT_POLL_SECONDS), 0))
+            except FutureTimeout:
+                pass
+            if self._thread is None or not self._thread.is_alive():
+                # 写入线程已退出：重新启动以处理队列中的其余条目，本条的结果无从得知
+                self.metrics["timeouts"] += 1
+                self.start()
+                raise CommitTimeout("写入线程已退出")
+            if remaining <= RESULT_POLL_SECONDS:
+                self.metrics["timeouts"] += 1
+                raise CommitTimeout(f"{self.result_timeout:g} 秒内未完成提交")
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                try:
+                    self._commit(batch)
+                except Exception as exc:
+                    # 兜底：不让意外异常结束写入线程，也不让本批调用方一直等待
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(exc)
+            elif self._stopping:
+                return
+
+    def _write(self, batch):
+        db = self.session_factory()
+        try:
+            results = submit_feedbacks(db, [entry for entry, _ in batch])
+            db.commit()
+            return results
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _commit(self, batch):
+        try:
+            results = self._write(batch)
+        except Exception as exc:
+            self.metrics["failed_batches"] += 1
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            # 整批失败时逐条重试，避免一条异常数据拖垮同批的其他请求
+            for item in batch:
+                self._commit([item])
+            return
+        self.metrics["batches"] += 1
+        self.metrics["entries"] += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+_feedback_queue = None
+_feedback_queue_lock = threading.Lock()
+
+
+def get_feedback_queue():
+    """开启组提交时返回进程内共享队列，否则返回 None"""
+    global _feedback_queue
+    if not GROUP_COMMIT_ENABLED:
+        return None
+    with _feedback_queue_lock:
+        if _feedback_queue is None:
+            _feedback_queue = GroupCommitQueue(
+                max_wait_ms=float(os.environ.get("FEEDBACK_GROUP_COMMIT_WAIT_MS", 5)),
+                max_batch=int(os.environ.get("FEEDBACK_GROUP_COMMIT_MAX_BATCH", 256)),
+                max_depth=int(os.environ.get("FEEDBACK_GROUP_COMMIT_DEPTH", 2000)),
+                submit_timeout=float(os.environ.get("FEEDBACK_GROUP_COMMIT_TIMEOUT", 1.0)),
+                result_timeout=float(os.environ.get("FEEDBACK_GROUP_COMMIT_RESULT_TIMEOUT", 30)),
+            )
+        return _feedback_queue
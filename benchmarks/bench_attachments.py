@@ -0,0 +1,117 @@
+"""
+附件下载基准：StaticFiles 挂载（旧实现） vs /api/uploads 附件端点
+每个并发客户端模拟多次打开事项详情页并下载同一附件；
+附件端点在首次下载后携带 If-None-Match 重新验证（304），断点续传只取剩余部分。
+
+用法：
+    python -m benchmarks.bench_attachments [--size-mb 5] [--concurrency 10 50 100] [--views 5]
+"""
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+
+from backend import attachments
+from backend.routers import uploads
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(app):
+    config = uvicorn.Config(app, host="127.0.0.1", port=free_port(), log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{config.port}"
+
+
+async def client_views(client, url, views, conditional):
+    transferred = 0
+    etag = None
+    for _ in range(views):
+        headers = {"If-None-Match": etag} if conditional and etag else {}
+        res = await client.get(url, headers=headers)
+        assert res.status_code in (200, 304), res.status_code
+        etag = res.headers.get("etag")
+        transferred += len(res.content)
+    return transferred
+
+
+async def run(url, concurrency, views, conditional):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        sizes = await asyncio.gather(*[client_views(client, url, views, conditional) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return elapsed, sum(sizes)
+
+
+async def resume(url, size):
+    async with httpx.AsyncClient(timeout=120) as client:
+        res = await client.get(url, headers={"Range": f"bytes={size // 2}-"})
+        return res.status_code, len(res.content)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--views", type=int, default=5)
+    args = parser.parse_args()
+
+    upload_dir = tempfile.mkdtemp()
+    attachments.UPLOAD_DIR = upload_dir
+    size = int(args.size_mb * 1024 * 1024)
+    rel, _ = attachments.store_stream(io.BytesIO(os.urandom(size)), "附件.docx", upload_dir=upload_dir)
+
+    legacy = FastAPI()
+    legacy.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
+    current = FastAPI()
+    current.include_router(uploads.router, prefix="/api")
+
+    servers = []
+    try:
+        targets = []
+        for name, app, path, conditional in [("static", legacy, f"/uploads/{rel}", False),
+                                             ("endpoint", current, f"/api/uploads/{rel}", True)]:
+            server, thread, base = serve(app)
+            servers.append((server, thread))
+            targets.append((name, base + path, conditional))
+
+        print(f"attachment {args.size_mb} MB, {args.views} views per client")
+        print(f"{'impl':<10}{'clients':>8}{'seconds':>10}{'req/s':>10}{'MB sent':>10}")
+        for concurrency in args.concurrency:
+            for name, url, conditional in targets:
+                elapsed, transferred = asyncio.run(run(url, concurrency, args.views, conditional))
+                reqs = concurrency * args.views
+                print(f"{name:<10}{concurrency:>8}{elapsed:>10.2f}{reqs / elapsed:>10.0f}{transferred / 1048576:>10.1f}")
+        status, received = asyncio.run(resume(targets[1][1], size))
+        print(f"resume from 50%: status {status}, {received / 1048576:.1f} MB received")
+    finally:
+        for server, thread in servers:
+            server.should_exit = True
+            thread.join()
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+事项导出基准：一次性加载全部行再拼接 CSV（旧做法） vs yield_per 流式导出（/api/items/export/excel）
+统计 tracemalloc 峰值内存与耗时。
+
+用法：
+    python -m benchmarks.bench_export [--items 500000] [--formats csv xlsx]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from backend import exporting, models
+from backend.database import Base, build_engine
+from backend.routers.items import EXPORT_HEADER, _export_rows, apply_item_filters, item_filters, order_items
+
+
+def legacy_csv(db):
+    items = db.query(models.Item).order_by(models.Item.created_at.desc()).all()
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_HEADER)
+    for item in items:
+        writer.writerow([item.id, item.title, item.creator_id, item.status, item.created_at, item.deadline,
+                         item.assigned_count, item.done_count, item.overdue_count, "", 0])
+    return [output.getvalue().encode("utf-8")]
+
+
+def streamed(db, fmt):
+    query, rank = apply_item_filters(db, item_filters())
+    query, _, _ = order_items(query, rank, "created_at", "desc")
+    rows = _export_rows(query)
+    if fmt == "csv":
+        return exporting.stream_csv(EXPORT_HEADER, rows)
+    return exporting.stream_xlsx(EXPORT_HEADER, rows, title="事项")
+
+
+def measure(session_factory, make_chunks):
+    db = session_factory()
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = 0
+    for chunk in make_chunks(db):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "xlsx"])
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    base = datetime(2030, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"username": "creator", "name": "发起人", "role": "admin"}])
+        batch = 50000
+        for offset in range(0, args.items, batch):
+            conn.execute(insert(models.Item), [
+                {"title": f"事项{i}", "description": "描述", "status": "ongoing", "must_feedback": True,
+                 "deadline": base + timedelta(minutes=i), "creator_id": 1, "created_at": base + timedelta(seconds=i),
+                 "assigned_count": 20, "done_count": i % 21, "overdue_count": 0}
+                for i in range(offset, min(offset + batch, args.items))
+            ])
+    session_factory = sessionmaker(bind=engine)
+
+    cases = []
+    if not args.skip_legacy:
+        cases.append(("legacy csv", legacy_csv))
+    for fmt in args.formats:
+        cases.append((f"stream {fmt}", lambda db, fmt=fmt: streamed(db, fmt)))
+
+    print(f"{args.items} items")
+    print(f"{'impl':<14}{'seconds':>10}{'peak MB':>10}{'output MB':>11}")
+    for name, fn in cases:
+        elapsed, peak, size = measure(session_factory, fn)
+        print(f"{name:<14}{elapsed:>10.1f}{peak / 1048576:>10.1f}{size / 1048576:>11.1f}")
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
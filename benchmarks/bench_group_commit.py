@@ -0,0 +1,112 @@
+"""
+反馈组提交基准：每请求单独提交 vs GroupCommitQueue 合并提交
+
+数据形状与 stress_test_simulation.py 一致：用户分属 4 个部门，每个事项分配 30-50 人。
+并发线程模拟截止前的提交高峰，每个线程依次为不同的待反馈分配提交反馈。
+
+用法：
+    python -m benchmarks.bench_group_commit [--threads 64] [--feedbacks 4000] [--synchronous FULL]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import sessionmaker
+
+from backend import models, schemas
+from backend.database import Base, build_engine
+from backend.feedback_writer import submit_feedbacks
+from backend.write_queue import GroupCommitQueue
+
+GROUPS = ["市场部", "运营部", "人事部", "研发部"]
+
+
+def seed(engine, n_users=1000, n_items=200):
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"username": f"user_{i}", "name": f"用户{i}", "role": "feedbacker",
+                                             "group": random.choice(GROUPS)} for i in range(n_users)])
+        conn.execute(insert(models.Item), [{"title": f"事项{i}", "description": "", "status": "ongoing", "must_feedback": True,
+                                             "deadline": now + timedelta(days=3), "creator_id": random.randint(1, n_users),
+                                             "created_at": now} for i in range(n_items)])
+        rows = []
+        for item_id in range(1, n_items + 1):
+            for uid in random.sample(range(1, n_users + 1), random.randint(30, 50)):
+                rows.append({"item_id": item_id, "user_id": uid, "feedback_status": "pending"})
+        conn.execute(insert(models.ItemUser), rows)
+        conn.exec_driver_sql("UPDATE items SET assigned_count = (SELECT count(*) FROM item_users WHERE item_id = items.id)")
+        return [r[0] for r in conn.execute(select(models.ItemUser.id))]
+
+
+def run(grouped, threads, feedbacks, synchronous):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.environ["FEEDBACK_DB_SYNCHRONOUS"] = synchronous
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    ids = seed(engine)
+    random.shuffle(ids)
+    work = ids[:feedbacks]
+    commit_queue = GroupCommitQueue(factory) if grouped else None
+    errors = []
+
+    def direct(entry):
+        db = factory()
+        try:
+            submit_feedbacks(db, [entry])
+            db.commit()
+        finally:
+            db.close()
+
+    def worker(chunk):
+        for iu_id in chunk:
+            entry = schemas.FeedbackCreate(item_user_id=iu_id, content="已完成")
+            try:
+                commit_queue.submit(entry) if grouped else direct(entry)
+            except Exception as exc:
+                errors.append(exc)
+
+    chunks = [work[i::threads] for i in range(threads)]
+    pool = [threading.Thread(target=worker, args=(c,)) for c in chunks]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    commits = commit_queue.metrics["batches"] if grouped else len(work) - len(errors)
+    if grouped:
+        commit_queue.stop()
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return elapsed, commits, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--feedbacks", type=int, default=4000)
+    parser.add_argument("--synchronous", default="FULL", help="PRAGMA synchronous（FULL 时每次提交都刷盘）")
+    args = parser.parse_args()
+
+    print(f"{args.feedbacks} feedbacks, {args.threads} threads, synchronous={args.synchronous}")
+    print(f"{'mode':<10}{'seconds':>10}{'feedback/s':>12}{'commits':>10}{'commits/s':>11}{'errors':>8}")
+    for grouped in (False, True):
+        elapsed, commits, errors = run(grouped, args.threads, args.feedbacks, args.synchronous)
+        name = "grouped" if grouped else "direct"
+        print(f"{name:<10}{elapsed:>10.2f}{args.feedbacks / elapsed:>12.0f}{commits:>10}{commits / elapsed:>11.0f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+分组列表基准：逐组懒加载 g.users（旧实现） vs 聚合成员查询（GET /api/groups?members=ids|count）
+统计耗时与执行的 SQL 语句数。
+
+用法：
+    python -m benchmarks.bench_groups [--groups 500] [--members 200] [--users 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base, build_engine
+from backend.routers.groups import get_groups
+
+
+def legacy_groups(db):
+    groups = db.query(models.Group).all()
+    return [{"id": g.id, "name": g.name, "user_ids": [u.id for u in g.users]} for g in groups]
+
+
+def measure(engine, session_factory, listing):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    db = session_factory()
+    start = time.perf_counter()
+    rows = listing(db)
+    elapsed = time.perf_counter() - start
+    db.close()
+    event.remove(engine, "before_cursor_execute", listener)
+    return elapsed, len(statements), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"username": f"user{i:06d}", "name": f"员工{i}", "role": "feedbacker", "password_hash": "x"}
+            for i in range(1, args.users + 1)
+        ])
+        conn.execute(insert(models.Group), [
+            {"name": f"分组{i}", "is_org": True} for i in range(args.groups)
+        ])
+        conn.execute(insert(models.group_users), [
+            {"group_id": g, "user_id": u}
+            for g in range(1, args.groups + 1)
+            for u in rng.sample(range(1, args.users + 1), args.members)
+        ])
+    session_factory = sessionmaker(bind=engine)
+
+    cases = [
+        ("legacy lazy", legacy_groups),
+        ("members=ids", lambda db: get_groups(user_id=1, role="admin", members="ids", db=db)),
+        ("members=count", lambda db: get_groups(user_id=1, role="admin", members="count", db=db)),
+    ]
+    print(f"{args.groups} groups x {args.members} members")
+    print(f"{'impl':<16}{'ms':>10}{'queries':>10}")
+    for name, listing in cases:
+        elapsed, queries, _ = measure(engine, session_factory, listing)
+        print(f"{name:<16}{elapsed * 1000:>10.1f}{queries:>10}")
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+SQL 统计开销基准：同一批主键查询在未挂载事件、已挂载但不在请求内、在 track() 统计内三种情况下的耗时
+挂载游标事件本身的开销来自 SQLAlchemy 的事件分发，与监听函数做什么无关；指纹按语句文本缓存。
+
+用法：
+    python -m benchmarks.bench_instrumentation [--queries 20000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+
+from backend import models
+from backend.database import Base, build_engine
+from backend.instrumentation import instrument, track
+
+
+def run(engine, n):
+    user = models.User.__table__
+    stmt = select(user.c.id, user.c.username).where(user.c.id == 1)
+    with engine.connect() as conn:
+        for _ in range(1000):  # 预热编译缓存
+            conn.execute(stmt).first()
+        start = time.perf_counter()
+        for _ in range(n):
+            conn.execute(stmt).first()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"username": "user1", "name": "员工1", "role": "feedbacker"}])
+
+    plain = run(engine, args.queries)
+    instrument(engine)
+    idle = run(engine, args.queries)
+    with track() as stats:
+        tracked = run(engine, args.queries)
+
+    print(f"{args.queries} primary-key selects")
+    print(f"{'mode':<28}{'us/query':>10}{'overhead':>10}")
+    for label, seconds in (("no listeners", plain), ("instrumented, no request", idle), ("instrumented, tracked", tracked)):
+        print(f"{label:<28}{seconds / args.queries * 1e6:>10.1f}{(seconds / plain - 1) * 100:>9.1f}%")
+    print(f"tracked: {stats.queries} queries, {len(stats.fingerprints)} fingerprint(s)")
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+参与人解析基准：SQL UNION 展开分组（旧实现） vs 成员位图索引（membership.py）
+统计索引重建耗时与单次解析耗时。
+
+用法：
+    python -m benchmarks.bench_membership [--users 20000] [--groups 500] [--members 200] [--pick 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select, union
+from sqlalchemy.orm import sessionmaker
+
+from backend import membership, models
+from backend.database import Base, build_engine
+
+
+def sql_union(db, user_ids, group_ids):
+    selected = union(
+        select(models.User.id.label("user_id")).where(models.User.id.in_(user_ids)),
+        select(models.group_users.c.user_id).where(models.group_users.c.group_id.in_(group_ids)),
+    ).subquery()
+    return sorted(db.execute(select(selected.c.user_id)).scalars())
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--pick", type=int, default=50, help="每次选择的分组数与单选用户数")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"username": f"user{i:06d}", "name": f"员工{i}", "role": "feedbacker", "password_hash": "x"}
+            for i in range(1, args.users + 1)
+        ])
+        conn.execute(insert(models.Group), [{"name": f"分组{i}", "is_org": True} for i in range(args.groups)])
+        conn.execute(insert(models.group_users), [
+            {"group_id": g, "user_id": u}
+            for g in range(1, args.groups + 1)
+            for u in rng.sample(range(1, args.users + 1), args.members)
+        ])
+    db = sessionmaker(bind=engine)()
+    user_ids = rng.sample(range(1, args.users + 1), args.pick)
+    group_ids = rng.sample(range(1, args.groups + 1), args.pick)
+
+    start = time.perf_counter()
+    index = membership.MembershipIndex.build(db, membership.directory_stamp(db))
+    build = time.perf_counter() - start
+    membership.get_index(db)
+
+    legacy, expected = timed(lambda: sql_union(db, user_ids, group_ids), args.repeat)
+    cached, resolved = timed(lambda: membership.resolve_user_ids(db, user_ids=user_ids, group_ids=group_ids), args.repeat)
+    bitmap, bits = timed(lambda: index.resolve(user_ids=user_ids, group_ids=group_ids), args.repeat)
+    assert resolved == expected == membership.from_bitmap(bits)
+
+    # 单个成员变动后的下一次解析：增量应用变更日志
+    refresh = 0.0
+    for i in range(args.repeat):
+        db.execute(insert(models.group_users).prefix_with("OR IGNORE").values(group_id=group_ids[0], user_id=args.users - i))
+        db.commit()
+        start = time.perf_counter()
+        membership.get_index(db)
+        refresh += time.perf_counter() - start
+    refresh /= args.repeat
+
+    print(f"{args.users} users, {args.groups} groups x {args.members} members; "
+          f"select {args.pick} groups + {args.pick} users -> {len(expected)} assignees")
+    print(f"index build             {build * 1000:>10.1f} ms")
+    print(f"sql union               {legacy * 1000:>10.2f} ms")
+    print(f"resolve_user_ids        {cached * 1000:>10.2f} ms  (incl. version check + id list)")
+    print(f"bitmap resolve only     {bitmap * 1e6:>10.1f} us")
+    print(f"refresh after 1 change  {refresh * 1000:>10.2f} ms  (incremental, vs full build above)")
+    db.close()
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
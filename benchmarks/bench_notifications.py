@@ -0,0 +1,84 @@
+"""
+提醒分发基准：逐条发送（每个分配一次网络调用） vs 按收件人合并摘要 + 限流并发（notifications.py）
+网络接收端以固定延迟的模拟 sink 代替，另测本地 FileSink 的实际吞吐。
+
+用法：
+    python -m benchmarks.bench_notifications [--reminders 50000] [--recipients 5000] [--latency-ms 2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.notifications import Digest, Dispatcher, FileSink, build_digests
+
+
+class LatencySink:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    async def send(self, digest):
+        await asyncio.sleep(self.latency)
+        self.calls += 1
+
+
+def make_reminders(n, recipients):
+    deadline = datetime(2030, 1, 1)
+    return [{"item_user_id": i, "item_id": i // recipients, "user_id": i % recipients,
+             "deadline": deadline + timedelta(minutes=i // recipients), "title": f"事项{i // recipients}",
+             "username": f"user{i % recipients}", "name": f"员工{i % recipients}"} for i in range(n)]
+
+
+def per_row(reminders):
+    return [Digest(r["user_id"], r["username"], r["name"], [r]) for r in reminders]
+
+
+def run(label, sink, digests, concurrency, n_reminders):
+    stats = Dispatcher(sink, concurrency=concurrency).dispatch_sync(digests)
+    print(f"{label:<32}{len(digests):>9}{stats['seconds']:>10.2f}{n_reminders / stats['seconds']:>14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reminders", type=int, default=50000)
+    parser.add_argument("--recipients", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--sample", type=int, default=1000, help="逐条串行发送只测前 N 条再外推")
+    args = parser.parse_args()
+
+    reminders = make_reminders(args.reminders, args.recipients)
+    latency = args.latency_ms / 1000
+    start = time.perf_counter()
+    digests = build_digests(reminders)
+    grouping = time.perf_counter() - start
+
+    print(f"{args.reminders} reminders, {args.recipients} recipients, simulated latency {args.latency_ms} ms")
+    print(f"grouping into digests: {grouping * 1000:.0f} ms")
+    print(f"{'impl':<32}{'calls':>9}{'seconds':>10}{'reminders/s':>14}")
+
+    sample = per_row(reminders[:args.sample])
+    stats = Dispatcher(LatencySink(latency), concurrency=1).dispatch_sync(sample)
+    estimated = stats["seconds"] * args.reminders / args.sample
+    print(f"{'per-row, sequential (est.)':<32}{args.reminders:>9}{estimated:>10.2f}{args.reminders / estimated:>14.0f}")
+    run(f"per-row, concurrency {args.concurrency}", LatencySink(latency), per_row(reminders),
+        args.concurrency, args.reminders)
+    run(f"digest, concurrency {args.concurrency}", LatencySink(latency), digests, args.concurrency, args.reminders)
+
+    fd, path = tempfile.mkstemp(suffix=".jsonl")
+    os.close(fd)
+    try:
+        run("digest, FileSink", FileSink(path), digests, args.concurrency, args.reminders)
+        print(f"FileSink output: {os.path.getsize(path) / 1048576:.1f} MB")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
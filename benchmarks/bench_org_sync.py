@@ -0,0 +1,76 @@
+"""
+组织分组同步基准：逐部门查询并整体替换成员（旧实现） vs 集合语句差异同步（org_sync.py）
+
+用法：
+    python -m benchmarks.bench_org_sync [--users 50000] [--departments 200] [--moved 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base, build_engine
+from backend.org_sync import sync_org_groups
+
+
+def legacy_sync(db):
+    names = [n for (n,) in db.query(models.User.group).distinct().all() if n]
+    for name in names:
+        g = db.query(models.Group).filter(models.Group.name == name).first()
+        if not g:
+            g = models.Group(name=name, is_org=True)
+            db.add(g)
+            db.flush()
+        g.users = db.query(models.User).filter(models.User.group == name).all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--departments", type=int, default=200)
+    parser.add_argument("--moved", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.users} users, {args.departments} departments, {args.moved} moved between runs")
+    print(f"{'impl':<10}{'run':<10}{'seconds':>10}{'statements':>12}")
+    for name, sync in [("legacy", legacy_sync), ("set-based", sync_org_groups)]:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        engine = build_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(insert(models.User), [
+                {"username": f"u{i}", "name": f"员工{i}", "role": "feedbacker", "group": f"部门{i % args.departments}"}
+                for i in range(args.users)
+            ])
+        statements = {"n": 0}
+        event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__("n", statements["n"] + 1))
+        session_factory = sessionmaker(bind=engine)
+        for run in ("initial", "changed", "unchanged"):
+            if run == "changed":
+                with engine.begin() as conn:
+                    conn.execute(update(models.User).where(models.User.id <= args.moved)
+                                 .values(group=f"部门{args.departments}"))
+            db = session_factory()
+            statements["n"] = 0
+            start = time.perf_counter()
+            sync(db)
+            db.commit()
+            elapsed = time.perf_counter() - start
+            db.close()
+            print(f"{name:<10}{run:<10}{elapsed:>10.2f}{statements['n']:>12}")
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+截止提醒基准：每小时全量扫描 24 小时内的待反馈分配（旧 check_pending_feedback） vs 提醒引擎的单个 tick
+积压越多，旧实现每次扫描越慢；引擎稳态下每个 tick 只读取新到点的事项。
+
+用法：
+    python -m benchmarks.bench_reminders [--items 2000] [--assignees 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base, build_engine
+from backend.reminders import ReminderEngine
+
+
+def legacy_scan(db, now):
+    return db.query(models.ItemUser).join(models.Item)\
+        .filter(models.ItemUser.feedback_status == "pending")\
+        .filter(models.Item.deadline <= now + timedelta(hours=24)).all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--assignees", type=int, default=50)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"username": f"user{i:06d}", "name": f"员工{i}", "role": "feedbacker", "password_hash": "x"}
+            for i in range(1, args.assignees + 1)
+        ])
+        # 截止时间均匀分布在未来 48 小时内
+        conn.execute(insert(models.Item), [
+            {"title": f"事项{i}", "status": "ongoing", "creator_id": 1,
+             "deadline": (now + timedelta(minutes=1 + i * 48 * 60 // args.items)).replace(tzinfo=None)}
+            for i in range(args.items)
+        ])
+        conn.execute(insert(models.ItemUser), [
+            {"item_id": i, "user_id": u, "feedback_status": "pending"}
+            for i in range(1, args.items + 1) for u in range(1, args.assignees + 1)
+        ])
+    session_factory = sessionmaker(bind=engine)
+
+    with session_factory() as db:
+        start = time.perf_counter()
+        rows = legacy_scan(db, now)
+        legacy = time.perf_counter() - start
+
+    db = session_factory()
+
+    sent = []
+    reminder_engine = ReminderEngine(dispatch=sent.extend)
+    start = time.perf_counter()
+    reminder_engine.run(db, now)
+    first = time.perf_counter() - start
+    first_sent = len(sent)
+
+    ticks = 60
+    start = time.perf_counter()
+    for minute in range(1, ticks + 1):
+        reminder_engine.run(db, now + timedelta(minutes=minute))
+    steady = (time.perf_counter() - start) / ticks
+
+    print(f"{args.items} items x {args.assignees} assignees, deadlines spread over 48h")
+    print(f"legacy hourly scan      {legacy * 1000:>9.1f} ms  ({len(rows)} rows, every run)")
+    print(f"engine first run        {first * 1000:>9.1f} ms  ({first_sent} reminders)")
+    print(f"engine per-minute tick  {steady * 1000:>9.1f} ms  ({(len(sent) - first_sent) / ticks:.0f} reminders/tick)")
+    db.close()
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+事项搜索基准：LIKE '%kw%' 全表扫描 vs FTS5 trigram 全文索引
+
+用法：
+    python -m benchmarks.bench_search [--items 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base, build_engine
+from backend.search import search_items
+
+# 常用汉字片段，模拟中文标题/描述
+WORDS = ["关于", "年度", "预算", "编制", "的", "通知", "请", "各部门", "安全", "检查", "系统", "升级",
+         "公司", "发展", "培训", "安排", "工作", "总结", "会议", "纪要", "材料", "报送", "消防", "演练"]
+
+
+def sentence(n):
+    return "".join(random.choice(WORDS) for _ in range(n))
+
+
+def seed(engine, n_items):
+    rows = [{"title": sentence(6), "description": sentence(20), "status": "ongoing",
+             "deadline": datetime(2030, 1, 1), "creator_id": 1, "created_at": datetime(2024, 1, 1)}
+            for _ in range(n_items)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Item), rows)
+
+
+def timed(fn, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    seed(engine, args.items)
+    db = sessionmaker(bind=engine)()
+
+    def like(kw):
+        return db.query(models.Item).filter(
+            or_(models.Item.title.like(f"%{kw}%"), models.Item.description.like(f"%{kw}%"))
+        ).limit(20).all()
+
+    print(f"{args.items} items")
+    print(f"{'keyword':<12}{'LIKE ms':>10}{'FTS ms':>10}{'hits':>6}")
+    for kw in ["消防演练", "年度预算编制", "纪要材料报送", "不存在的词"]:
+        like_ms, _ = timed(lambda: like(kw))
+        fts_ms, hits = timed(lambda: search_items(db, kw, limit=20))
+        print(f"{kw:<12}{like_ms:>10.2f}{fts_ms:>10.2f}{hits:>6}")
+    db.close()
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+SQLite 引擎配置档基准测试：legacy（回滚日志） vs production（WAL + busy_timeout 等）
+
+模拟截止日期前的混合负载：
+- 写线程：与 POST /api/feedbacks 相同的事务（插入 Feedback + 更新 ItemUser 状态）
+- 读线程：与 GET /api/items 相同的分页查询
+
+用法：
+    python -m benchmarks.bench_sqlite_profile [--seconds 5] [--writers 8] [--readers 8]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base, build_engine
+
+
+def seed(session_factory, n_users=500, n_items=200, per_item=40):
+    db = session_factory()
+    now = datetime.now(timezone.utc)
+    db.add_all([models.User(username=f"u{i}", name=f"用户{i}", role="feedbacker", group=f"部门{i % 10}") for i in range(n_users)])
+    db.flush()
+    items = [models.Item(title=f"事项{i}", description="压测", deadline=now + timedelta(days=1), creator_id=1) for i in range(n_items)]
+    db.add_all(items)
+    db.flush()
+    rows = []
+    for item in items:
+        for uid in random.sample(range(1, n_users + 1), per_item):
+            rows.append(models.ItemUser(item_id=item.id, user_id=uid))
+    db.add_all(rows)
+    db.commit()
+    ids = [iu.id for iu in rows]
+    db.close()
+    return ids
+
+
+def run(profile, seconds, writers, readers):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}", profile=profile)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    item_user_ids = seed(session_factory)
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def writer():
+        while time.perf_counter() < stop:
+            db = session_factory()
+            try:
+                iu_id = random.choice(item_user_ids)
+                db.add(models.Feedback(item_user_id=iu_id, content="ok"))
+                db.query(models.ItemUser).filter(models.ItemUser.id == iu_id).update(
+                    {"feedback_status": "done", "last_feedback_time": datetime.now(timezone.utc)}
+                )
+                db.commit()
+                key = "writes"
+            except OperationalError:
+                db.rollback()
+                key = "locked"
+            finally:
+                db.close()
+            with lock:
+                counts[key] += 1
+
+    def reader():
+        while time.perf_counter() < stop:
+            db = session_factory()
+            try:
+                query = db.query(models.Item).filter(models.Item.status == "ongoing")
+                query.count()
+                query.order_by(models.Item.created_at.desc()).limit(20).all()
+                key = "reads"
+            except OperationalError:
+                key = "locked"
+            finally:
+                db.close()
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12}{'reads/s':>10}{'writes/s':>10}{'locked':>8}")
+    for profile in ("legacy", "production"):
+        c = run(profile, args.seconds, args.writers, args.readers)
+        print(f"{profile:<12}{c['reads'] / args.seconds:>10.0f}{c['writes'] / args.seconds:>10.0f}{c['locked']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+待办列表基准：逐条查询 + 双重 Pydantic 构造（旧实现） vs 单条 JOIN 投影（GET /api/todos）
+
+用法：
+    python -m benchmarks.bench_todos [--todos 1000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import event, insert
+from sqlalchemy.orm import sessionmaker
+from typing import List
+
+from backend import models, schemas
+from backend.database import Base, build_engine
+from backend.routers.feedback import get_todos
+
+
+def legacy_get_todos(user_id, db):
+    item_users = db.query(models.ItemUser).filter(models.ItemUser.user_id == user_id, models.ItemUser.feedback_status == "pending").all()
+    results = []
+    for iu in item_users:
+        item = db.query(models.Item).filter(models.Item.id == iu.item_id).first()
+        if item:
+            todo_data = schemas.Item.model_validate(item).model_dump()
+            todo_data["item_user_id"] = iu.id
+            results.append(schemas.TodoItem(**todo_data))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--todos", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    base = datetime(2030, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"username": f"u{i}", "name": f"u{i}", "role": "feedbacker"} for i in range(args.users)])
+        conn.execute(insert(models.Item), [{"title": f"事项{i}", "description": "描述", "status": "ongoing", "must_feedback": True,
+                                             "deadline": base + timedelta(hours=i), "creator_id": 1, "created_at": base}
+                                            for i in range(args.todos)])
+        conn.execute(insert(models.ItemUser), [{"item_id": i + 1, "user_id": u + 1, "feedback_status": "pending"}
+                                               for u in range(args.users) for i in range(args.todos)])
+
+    queries = {"n": 0}
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.__setitem__("n", queries["n"] + 1))
+    session_factory = sessionmaker(bind=engine)
+    # FastAPI 会按 response_model 校验返回值，这里同样计入
+    adapter = TypeAdapter(List[schemas.TodoItem])
+
+    def run(fn):
+        db = session_factory()
+        queries["n"] = 0
+        start = time.perf_counter()
+        result = adapter.validate_python(fn(db))
+        elapsed = (time.perf_counter() - start) * 1000
+        db.close()
+        return elapsed, queries["n"], len(result)
+
+    print(f"{args.todos} pending todos for user 1")
+    print(f"{'impl':<10}{'ms':>10}{'queries':>10}{'rows':>8}")
+    for name, fn in [("legacy", lambda db: legacy_get_todos(1, db)),
+                     ("joined", lambda db: get_todos(user_id=1, response=Response(), db=db))]:
+        elapsed, n, rows = run(fn)
+        print(f"{name:<10}{elapsed:>10.1f}{n:>10}{rows:>8}")
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+状态迁移基准：逐行加载待反馈分配、在 Python 中比较截止时间后逐条更新 vs transitions.mark_overdue 的集合 UPDATE
+另测水位线生效后的增量运行（每 5 分钟一次，只处理新到期的事项）。
+
+用法：
+    python -m benchmarks.bench_transitions [--items 2000] [--assignees 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base, build_engine
+from backend.transitions import mark_overdue
+
+
+def setup(path, items, assignees, now):
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"username": f"user{i:06d}", "name": f"员工{i}", "role": "feedbacker", "password_hash": "x"}
+            for i in range(1, assignees + 1)
+        ])
+        # 截止时间均匀分布在过去 24 小时到未来 24 小时
+        conn.execute(insert(models.Item), [
+            {"title": f"事项{i}", "status": "ongoing", "creator_id": 1, "assigned_count": assignees,
+             "deadline": (now + timedelta(minutes=i * 48 * 60 // items - 24 * 60)).replace(tzinfo=None)}
+            for i in range(items)
+        ])
+        conn.execute(insert(models.ItemUser), [
+            {"item_id": i, "user_id": u, "feedback_status": "pending"}
+            for i in range(1, items + 1) for u in range(1, assignees + 1)
+        ])
+    return engine
+
+
+def legacy_sweep(db, now):
+    naive_now = now.replace(tzinfo=None)
+    marked = 0
+    for iu in db.query(models.ItemUser).filter(models.ItemUser.feedback_status == "pending").all():
+        item = db.get(models.Item, iu.item_id)
+        if item.deadline <= naive_now:
+            iu.feedback_status = "overdue"
+            item.overdue_count = (item.overdue_count or 0) + 1
+            marked += 1
+    return marked
+
+
+def cleanup(engine, path):
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--assignees", type=int, default=50)
+    args = parser.parse_args()
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+    results = []
+    for label in ("legacy", "set-based"):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        engine = setup(path, args.items, args.assignees, now)
+        with sessionmaker(bind=engine)() as db:
+            start = time.perf_counter()
+            marked = legacy_sweep(db, now) if label == "legacy" else mark_overdue(db, now)["assignments_marked"]
+            db.commit()
+            results.append((f"{label} first sweep", time.perf_counter() - start, marked))
+            if label == "set-based":
+                runs = 12
+                start = time.perf_counter()
+                marked = 0
+                for step in range(1, runs + 1):
+                    marked += mark_overdue(db, now + timedelta(minutes=5 * step))["assignments_marked"]
+                    db.commit()
+                results.append(("set-based incremental run", (time.perf_counter() - start) / runs, marked // runs))
+        cleanup(engine, path)
+
+    print(f"{args.items} items x {args.assignees} assignees, deadlines spread over -24h..+24h")
+    print(f"{'impl':<28}{'ms':>10}{'marked':>10}")
+    for label, seconds, marked in results:
+        print(f"{label:<28}{seconds * 1000:>10.1f}{marked:>10}")
+
+
+if __name__ == "__main__":
+    main()
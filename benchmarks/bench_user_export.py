@@ -0,0 +1,99 @@
+"""
+用户导出基准：StringIO 一次性拼接（旧实现） vs 流式 CSV/XLSX（GET /api/users/export）
+统计 tracemalloc 峰值内存与耗时。
+
+用法：
+    python -m benchmarks.bench_user_export [--users 50000] [--formats csv xlsx]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.auth import export_users
+from backend.database import Base, build_engine
+
+
+def legacy_export(db):
+    users = db.query(models.User).all()
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['ID', 'Username', 'Name', 'Role', 'Group', 'Password_Hash', 'Default_Password_Note'])
+    for user in users:
+        writer.writerow([user.id, user.username, user.name, user.role, user.group, user.password_hash, "123456 (Default)"])
+    output.seek(0)
+    return sum(len(chunk) for chunk in iter([output.getvalue().encode("utf-8")]))
+
+
+def streamed_export(db, fmt):
+    # 与 ASGI 服务器一样异步消费 StreamingResponse 的 body_iterator，逐块计数不保留
+    response = export_users(format=fmt, columns=None, db=db)
+
+    async def consume():
+        size = 0
+        async for chunk in response.body_iterator:
+            size += len(chunk)
+        return size
+
+    return asyncio.run(consume())
+
+
+def measure(session_factory, export):
+    db = session_factory()
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = export(db)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "xlsx"])
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    # bcrypt 哈希固定为 60 个字符
+    fake_hash = "$2b$12$" + "x" * 53
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"username": f"user{i:06d}", "name": f"员工{i}", "role": "feedbacker",
+             "group": f"部门{i % 40}", "password_hash": fake_hash}
+            for i in range(args.users)
+        ])
+    session_factory = sessionmaker(bind=engine)
+
+    cases = [("legacy csv", legacy_export)]
+    for fmt in args.formats:
+        cases.append((f"stream {fmt}", lambda db, fmt=fmt: streamed_export(db, fmt)))
+    print(f"{args.users} users")
+    print(f"{'impl':<14}{'seconds':>10}{'peak MB':>10}{'output MB':>11}")
+    for name, export in cases:
+        elapsed, peak, size = measure(session_factory, export)
+        print(f"{name:<14}{elapsed:>10.1f}{peak / 1048576:>10.1f}{size / 1048576:>11.1f}")
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
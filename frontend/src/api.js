@@ -12,3 +12,54 @@ apiClient.interceptors.request.use(config => {
     return config
 })
 export default apiClient
+
+// 分块上传大附件：失败的分块会重试，断线后从服务端记录的 next_index 继续；返回上传会话 ID
+export async function uploadResumable(file, { retries = 3, onProgress } = {}) {
+    const { data: created } = await apiClient.post('/upload_sessions', {
+        filename: file.name,
+        size: file.size,
+        creator_id: Number(localStorage.getItem('user_id')) || null
+    })
+    let session = created
+    const chunkSize = session.max_chunk_bytes
+    while (session.received_bytes < file.size) {
+        const start = session.next_index * chunkSize
+        const chunk = file.slice(start, start + chunkSize)
+        for (let attempt = 0; ; attempt++) {
+            try {
+                const res = await apiClient.put(`/upload_sessions/${session.id}/chunks/${session.next_index}`, chunk, {
+                    headers: { 'Content-Type': 'application/octet-stream' }
+                })
+                session = res.data
+                break
+            } catch (e) {
+                if (attempt >= retries) throw e
+                session = (await apiClient.get(`/upload_sessions/${session.id}`)).data
+                if (session.received_bytes >= start + chunk.size) break
+            }
+        }
+        if (onProgress) onProgress(session.received_bytes / file.size)
+    }
+    await apiClient.post(`/upload_sessions/${session.id}/finalize`)
+    return session.id
+}
+
+// 按游标拉取完整用户目录（id/name/group/role）；未变化时浏览器凭 ETag 重新验证得到 304，不再传输数据
+export async function fetchUserDirectory(params = {}) {
+    const users = []
+    let cursor = null
+    do {
+        const res = await apiClient.get('/users/directory', {
+            params: { ...params, limit: 5000, ...(cursor ? { cursor } : {}) }
+        })
+        users.push(...res.data.users)
+        cursor = res.data.next_cursor
+    } while (cursor)
+    return users
+}
+
+// 在服务端解析参与人选择（分组并、交、差与去重），返回 { user_ids, count }
+export async function resolveSelection(selection) {
+    const res = await apiClient.post('/groups/resolve', selection)
+    return res.data
+}
@@ -1,6 +1,7 @@
 from fastmcp import FastMCP
 from backend.database import SessionLocal
 from backend.models import Item, Feedback, ItemUser, User
+from backend.search import search_items as search_items_ranked
 import sys
 import os
 
@@ -24,19 +25,25 @@ def get_system_stats() -> str:
         db.close()
 
 @mcp.tool()
-def search_items(keyword: str) -> str:
-    """根据关键词搜索事项及其反馈情况"""
+def search_items(keyword: str, limit: int = 50) -> str:
+    """根据关键词搜索事项（标题与描述，按相关度排序）及其反馈情况；limit 为最多返回条数，0 表示返回全部匹配"""
     db = SessionLocal()
     try:
-        items = db.query(Item).filter(Item.title.contains(keyword)).all()
+        # 多取一条判断是否截断
+        items = search_items_ranked(db, keyword, limit=limit + 1 if limit > 0 else None)
         if not items:
             return "未找到相关事项"
+        truncated = limit > 0 and len(items) > limit
+        if truncated:
+            items = items[:limit]
         
         results = []
         for item in items:
             # 简单起见，这里只统计反馈数量
             feedback_count = db.query(Feedback).join(ItemUser).filter(ItemUser.item_id == item.id).count()
             results.append(f"ID: {item.id} | 标题: {item.title} | 状态: {item.status} | 反馈数: {feedback_count}")
+        if truncated:
+            results.append(f"（仅显示相关度最高的前 {limit} 条，还有更多匹配；可增大 limit 或传 0 返回全部）")
         return "\n".join(results)
     finally:
         db.close()
@@ -16,6 +16,7 @@ from mcp.server.stdio import stdio_server
 
 from backend.database import SessionLocal
 from backend.models import Item, Feedback, ItemUser, User
+from backend.search import search_items as search_items_ranked
 
 # 初始化 Server
 server = Server("feedback-system")
@@ -33,11 +34,13 @@ async def handle_list_tools() -> list[types.Tool]:
         ),
         types.Tool(
             name="search_items",
-            description="根据关键词搜索事项及其反馈情况",
+            description="根据关键词搜索事项（标题与描述，按相关度排序）及其反馈情况",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "keyword": {"type": "string", "description": "搜索关键词"},
+                    "limit": {"type": "integer", "description": "最多返回条数，默认 50，0 表示返回全部匹配",
+                              "default": 50, "minimum": 0},
                 },
                 "required": ["keyword"],
             },
@@ -62,16 +65,23 @@ async def handle_call_tool(
         if not keyword:
             return [types.TextContent(type="text", text="请输入关键词")]
             
+        limit = int(arguments.get("limit", 50))
         db = SessionLocal()
         try:
-            items = db.query(Item).filter(Item.title.contains(keyword)).all()
+            # 多取一条判断是否截断
+            items = search_items_ranked(db, keyword, limit=limit + 1 if limit > 0 else None)
             if not items:
                 return [types.TextContent(type="text", text="未找到相关事项")]
+            truncated = limit > 0 and len(items) > limit
+            if truncated:
+                items = items[:limit]
             
             results = []
             for item in items:
                 feedback_count = db.query(Feedback).join(ItemUser).filter(ItemUser.item_id == item.id).count()
                 results.append(f"ID: {item.id} | 标题: {item.title} | 状态: {item.status} | 反馈数: {feedback_count}")
+            if truncated:
+                results.append(f"（仅显示相关度最高的前 {limit} 条，还有更多匹配；可增大 limit 或传 0 返回全部）")
             
             return [types.TextContent(type="text", text="\n".join(results))]
         finally:
@@ -4,6 +4,8 @@ from faker import Faker
 from backend.database import SessionLocal, engine, Base
 from backend import models
 from backend.auth import get_password_hash
+from backend.counters import recompute_item_counters
+from backend.stats import rebuild_rollups
 from sqlalchemy import text
 import sys
 import time
@@ -174,6 +176,11 @@ def simulate_activity(db, user_ids, days=180):
         # 清理 session 以释放内存
         db.expire_all()
 
+    # 批量写入绕过了接口，按实际分配数据回填事项计数与统计汇总
+    recompute_item_counters(db)
+    rebuild_rollups(db)
+    db.commit()
+
     print(f"Simulation completed. Total Items: {total_items}, Total Feedbacks: {total_feedbacks}")
 
 def main():
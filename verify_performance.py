@@ -1,6 +1,7 @@
 import time
 from backend.database import SessionLocal
 from backend import models
+from backend.search import search_items
 from sqlalchemy import func
 
 def verify_performance():
@@ -30,6 +31,13 @@ def verify_performance():
         ).limit(20).all()
         end_time = time.time()
         print(f"Search '{keyword}' (limit 20) took: {end_time - start_time:.4f}s. Found {len(results)} items.")
+
+        # 全文索引路径（trigram 需要至少 3 个字符）
+        for keyword in ["的", "公司发展", "系统的"]:
+            start_time = time.time()
+            results = search_items(db, keyword, limit=20)
+            end_time = time.time()
+            print(f"FTS search '{keyword}' (limit 20) took: {end_time - start_time:.4f}s. Found {len(results)} items.")
         
         print("\nTesting Complex Query (Stats)...")
         # Simulate getting stats for a user (e.g., pending tasks)